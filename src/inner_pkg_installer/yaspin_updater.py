@@ -11,6 +11,9 @@ class YaspinLogUpdater:
     def ok(self, ok_msg: str):
         self.spinner.ok(ok_msg)
 
+    def set_text(self, text: str):
+        self.spinner.text = text
+
 
 @contextmanager
 def yaspin_log_updater(msg, logger: logging.Logger):
@@ -0,0 +1,152 @@
+"""
+Contains class for caching built distributions, keyed by the content of
+what they were built from.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Iterable, List, Union
+
+from packaging.tags import sys_tags
+
+import srepkg.utils.cache_dirs as cd
+
+DEFAULT_MAX_ARTIFACT_ENTRIES = 50
+
+# VCS metadata, left out of a source tree's digest at any depth whether it
+# is a directory or (as in a git worktree) a file. The commit it points to
+# is covered by _git_head.
+IGNORED_VCS_NAMES = {".git", ".hg"}
+# Directories that don't affect what gets built from a source tree, left
+# out of its digest at any depth.
+IGNORED_SRC_DIRS = {"__pycache__"}
+# Left out only at the root of a source tree, since e.g. mypkg/build can be
+# a real subpackage.
+IGNORED_SRC_ROOT_DIRS = {".nox", ".tox", ".venv", "build", "dist", "venv"}
+
+
+class BuildArtifactCache:
+    """
+    Stores the dists built from an input (a sdist or a source tree) under
+    a key made from the input's sha256, the requested distribution types,
+    and the current interpreter / platform tag.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = None,
+        max_entries: int = DEFAULT_MAX_ARTIFACT_ENTRIES,
+    ):
+        if cache_dir is None:
+            cache_dir = cd.srepkg_cache_root() / "build_artifacts"
+        self._lru_dir = cd.LruCacheDir(root=cache_dir, max_entries=max_entries)
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _update_with_file(hasher, file_path: Path):
+        with file_path.open(mode="rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+
+    @classmethod
+    def file_digest(cls, file_path: Path) -> str:
+        hasher = hashlib.sha256()
+        cls._update_with_file(hasher, file_path)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _git_head(src_path: Path) -> Union[str, None]:
+        # Versions are often derived from git metadata (e.g. setuptools_scm)
+        # which isn't part of the hashed tree, so include HEAD.
+        if not (src_path / ".git").exists():
+            return None
+        p = subprocess.run(
+            ["git", "-C", str(src_path), "rev-parse", "HEAD"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        )
+        return p.stdout.strip() if p.returncode == 0 else None
+
+    @classmethod
+    def source_tree_digest(cls, src_path: Path) -> str:
+        hasher = hashlib.sha256()
+        for dir_path, dir_names, file_names in os.walk(src_path):
+            at_root = Path(dir_path) == src_path
+            dir_names[:] = sorted(
+                name
+                for name in dir_names
+                if name not in IGNORED_VCS_NAMES
+                and name not in IGNORED_SRC_DIRS
+                and not (at_root and name in IGNORED_SRC_ROOT_DIRS)
+                and not name.endswith(".egg-info")
+            )
+            for file_name in sorted(
+                name for name in file_names if name not in IGNORED_VCS_NAMES
+            ):
+                file_path = Path(dir_path) / file_name
+                rel_path = file_path.relative_to(src_path).as_posix()
+                hasher.update(rel_path.encode("utf-8") + b"\0")
+                if file_path.is_symlink():
+                    hasher.update(os.readlink(file_path).encode("utf-8"))
+                else:
+                    cls._update_with_file(hasher, file_path)
+                hasher.update(b"\0")
+        git_head = cls._git_head(src_path)
+        if git_head:
+            hasher.update(git_head.encode("utf-8"))
+        return hasher.hexdigest()
+
+    @staticmethod
+    def key(input_digest: str, distributions: Iterable[str]) -> str:
+        key_data = {
+            "input": input_digest,
+            "distributions": sorted(distributions),
+            "tag": str(next(iter(sys_tags()))),
+        }
+        return hashlib.sha256(
+            json.dumps(key_data, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:32]
+
+    def _log_result(self, result: str, description: str):
+        logging.getLogger(__name__).info(
+            f"Build artifact cache {result} for {description} "
+            f"(hits: {self.hits}, misses: {self.misses})"
+        )
+
+    def fetch(
+        self, key: str, dest_dir: Path, description: str = ""
+    ) -> Union[List[Path], None]:
+        """
+        Copies the artifacts cached under key into dest_dir and returns
+        their new paths, or returns None on a cache miss.
+        """
+        entry = self._lru_dir.entry_path(key)
+        if not entry.is_dir():
+            self.misses += 1
+            self._log_result("miss", description)
+            return None
+
+        self._lru_dir.touch(entry)
+        fetched = []
+        for artifact in sorted(entry.iterdir()):
+            if artifact.name == cd.LAST_USED_MARKER:
+                continue
+            fetched.append(Path(shutil.copy2(artifact, dest_dir)))
+
+        self.hits += 1
+        self._log_result("hit", description)
+        return fetched
+
+    def store(self, key: str, artifacts: Iterable[Path]):
+        staging_dir = self._lru_dir.staging_dir()
+        for artifact in artifacts:
+            shutil.copy2(artifact, staging_dir)
+        entry = self._lru_dir.publish(staging_dir, key)
+        self._lru_dir.evict(keep=entry)
@@ -0,0 +1,204 @@
+"""
+Contains class that provides isolated build environments, reused across
+builds and srepkg runs when projects have the same build requirements.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import time
+import venv
+from pathlib import Path
+from typing import Iterable, List
+
+import build
+import pyproject_hooks
+from packaging.requirements import Requirement
+
+import srepkg.dist_builder_sub_process as dbs
+import srepkg.error_handling.custom_exceptions as ce
+import srepkg.utils.cache_dirs as cd
+import srepkg.utils.logged_err_detecting_subprocess as leds
+
+DEFAULT_MAX_BUILD_ENVS = 10
+# Written last when an env is created, so it also marks the env complete.
+REQUIREMENTS_FILENAME = "srepkg_build_requires.json"
+# An env lock older than this was left by a process that died while
+# creating the env.
+STALE_LOCK_SECONDS = 60 * 60
+LOCK_POLL_SECONDS = 1
+
+
+class BuildEnvCache:
+    """
+    Maps the [build-system].requires of a project to a virtual environment
+    with those requirements installed. Environments are created once,
+    shared by every project with the same requirements, and evicted least
+    recently used first.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = None,
+        max_envs: int = DEFAULT_MAX_BUILD_ENVS,
+    ):
+        if cache_dir is None:
+            cache_dir = cd.srepkg_cache_root() / "build_envs"
+        self._lru_dir = cd.LruCacheDir(root=cache_dir, max_entries=max_envs)
+
+    @staticmethod
+    def normalized_requires(requires: Iterable[str]) -> List[str]:
+        return sorted({str(Requirement(item)) for item in requires})
+
+    @staticmethod
+    def env_key(requires: List[str]) -> str:
+        key_data = {
+            "requires": requires,
+            "implementation": sys.implementation.name,
+            "python_version": platform.python_version(),
+            "platform": sys.platform,
+            "machine": platform.machine(),
+        }
+        return hashlib.sha256(
+            json.dumps(key_data, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:32]
+
+    @staticmethod
+    def env_python(env_path: Path) -> Path:
+        if sys.platform == "win32":
+            return env_path / "Scripts" / "python.exe"
+        return env_path / "bin" / "python"
+
+    @staticmethod
+    def install(python_executable: Path, requires: Iterable[str]):
+        requires = list(requires)
+        if not requires:
+            return
+        leds.LoggedErrDetectingSubprocess(
+            cmd=[str(python_executable), "-m", "pip", "install", *requires],
+            gen_logger_name=__name__,
+            std_out_logger_name="std_out",
+            std_err_logger_name="std_err",
+            default_exception=ce.BuildEnvCreationError,
+        ).run()
+
+    @staticmethod
+    def _is_complete(env_path: Path) -> bool:
+        return (env_path / REQUIREMENTS_FILENAME).exists()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _env_lock(env_path: Path):
+        # Waits while another srepkg process creates the same env.
+        lock_path = env_path.with_name(f".{env_path.name}.lock")
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL))
+                break
+            except FileExistsError:
+                try:
+                    lock_age = time.time() - lock_path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if lock_age > STALE_LOCK_SECONDS:
+                    lock_path.unlink(missing_ok=True)
+                else:
+                    time.sleep(LOCK_POLL_SECONDS)
+        try:
+            yield
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+    def _create_env(self, env_path: Path, requires: List[str]):
+        # A venv can't be moved once created (its scripts hard-code its
+        # path), so it is built in place, and only counts as cached once
+        # its requirements file is written. Until then LruCacheDir doesn't
+        # see it as an entry, so it is never evicted half-built.
+        shutil.rmtree(env_path, ignore_errors=True)
+        try:
+            venv.EnvBuilder(with_pip=True, symlinks=os.name != "nt").create(
+                env_path
+            )
+            self.install(self.env_python(env_path), requires)
+            with (env_path / REQUIREMENTS_FILENAME).open(mode="w") as f:
+                json.dump(requires, f)
+        except Exception:
+            shutil.rmtree(env_path, ignore_errors=True)
+            raise
+
+    def python_for_requires(self, requires: Iterable[str]) -> Path:
+        normalized = self.normalized_requires(requires)
+        env_path = self._lru_dir.entry_path(self.env_key(normalized))
+
+        if self._is_complete(env_path):
+            logging.getLogger(__name__).info(
+                f"Reusing cached build environment {env_path.name} for "
+                f"{normalized}"
+            )
+        else:
+            with self._env_lock(env_path):
+                if not self._is_complete(env_path):
+                    logging.getLogger(__name__).info(
+                        f"Creating build environment {env_path.name} for "
+                        f"{normalized}"
+                    )
+                    self._create_env(env_path, normalized)
+
+        self._lru_dir.touch(env_path)
+        self._lru_dir.evict(keep=env_path)
+        return self.env_python(env_path)
+
+    @staticmethod
+    def dynamic_requires(
+        source_dir: Path,
+        python_executable: Path,
+        distributions: Iterable[str],
+    ) -> List[str]:
+        """
+        Requirements the build backend of source_dir asks for (via
+        get_requires_for_build_*) on top of [build-system].requires, found
+        by running the backend with python_executable.
+        """
+        builder = build.ProjectBuilder(
+            source_dir=str(source_dir),
+            python_executable=str(python_executable),
+            runner=dbs.isolated_env_runner(
+                str(python_executable), pyproject_hooks.quiet_subprocess_runner
+            ),
+        )
+        return sorted(
+            {
+                item
+                for distribution in distributions
+                for item in builder.get_requires_for_build(distribution)
+            }
+        )
+
+    def python_for(
+        self, source_dir: Path, distributions: Iterable[str] = ("wheel",)
+    ) -> Path:
+        """
+        Python executable of an env with source_dir's build requirements:
+        its [build-system].requires plus whatever its backend asks for to
+        build distributions. Both are part of the env key, so a cached env
+        is never modified after it is created.
+        """
+        build_system_requires = build.ProjectBuilder(
+            source_dir=str(source_dir)
+        ).build_system_requires
+        static_python = self.python_for_requires(build_system_requires)
+        dynamic_requires = self.dynamic_requires(
+            source_dir=source_dir,
+            python_executable=static_python,
+            distributions=distributions,
+        )
+        if not dynamic_requires:
+            return static_python
+        return self.python_for_requires(
+            [*build_system_requires, *dynamic_requires]
+        )
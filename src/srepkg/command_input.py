@@ -28,7 +28,8 @@ class SrepkgCommandLine(rep_int.SrepkgCommandInterface):
             help="A reference to the original package to be repackaged. Can "
             "be a local path to the directory where a package's setup.py "
             "or pyproject.toml resides, a  PyPI package name, or a Github"
-            " repo url.",
+            " repo url. Append #subdirectory=<path> to a repo url if the "
+            "package is not at the repo root.",
         )
 
         self._parser.add_argument(
@@ -87,6 +88,91 @@ class SrepkgCommandLine(rep_int.SrepkgCommandInterface):
                  "gets created if it does not already exist.",
         )
 
+        self._parser.add_argument(
+            "-b",
+            "--build_isolation",
+            action="store_true",
+            help="Build original package and srepkg distributions in isolated"
+            " environments that contain only their [build-system] "
+            "requirements. Environments are cached and reused across runs.",
+        )
+
+        self._parser.add_argument(
+            "--no_build_cache",
+            action="store_true",
+            help="Always build original package wheels from source. By "
+            "default, wheels built from the same source tree or sdist on a "
+            "previous run are reused from ~/.cache/srepkg/build_artifacts.",
+        )
+
+        self._parser.add_argument(
+            "--wheel_from_sdist",
+            action="store_true",
+            help="When building the original package from source, build an "
+            "sdist first and build the wheel from the unpacked sdist. Checks "
+            "that the sdist has everything the wheel needs, but is slower "
+            "for pure Python packages. By default, the wheel is built "
+            "directly from the source tree.",
+        )
+
+        self._parser.add_argument(
+            "--no_download_cache",
+            action="store_true",
+            help="Always download original package dists from PyPI. By "
+            "default, dists downloaded on a previous run are reused from "
+            "~/.cache/srepkg/downloads (up to 2 GiB, least recently used "
+            "removed first).",
+        )
+
+        self._parser.add_argument(
+            "--no_git_cache",
+            action="store_true",
+            help="Clone git repos into a temporary directory. By default, "
+            "a mirror of each git repo is kept in ~/.cache/srepkg/git_mirrors "
+            "and only new commits are fetched on later runs.",
+        )
+
+        self._parser.add_argument(
+            "--metadata_max_age",
+            type=float,
+            default=0,
+            help="Seconds that PyPI package metadata cached in "
+            "~/.cache/srepkg/pypi_json by a previous run is used without "
+            "checking PyPI for changes. Default is 0 (always check, but only "
+            "download metadata again if it has changed).",
+        )
+
+        self._parser.add_argument(
+            "--index_url",
+            type=str,
+            help="Package index to get PyPI packages from instead of "
+            "https://pypi.org/simple, e.g. a local mirror. Accepts the "
+            "index's Simple API URL (as used with pip --index-url), JSON API "
+            "URL, or the root URL they are under. Default is "
+            "$SREPKG_INDEX_URL, then index_url in the [index] section of "
+            "~/.config/srepkg/srepkg.ini, then PyPI.",
+        )
+
+        self._parser.add_argument(
+            "--extra_index_url",
+            type=str,
+            action="append",
+            dest="extra_index_urls",
+            help="Fallback package index, tried (in the order given) when a "
+            "package is not found on, or can't be fetched from, the indexes "
+            "before it. Can be given more than once. Default is "
+            "$SREPKG_EXTRA_INDEX_URL (space separated), then "
+            "extra_index_urls in the config file.",
+        )
+
+        self._parser.add_argument(
+            "--json_api_url",
+            type=str,
+            help="JSON API URL of the main package index, if it is not at the "
+            "location derived from --index_url. Indexes without a JSON API "
+            "are read through their Simple API.",
+        )
+
         self._parser.add_argument(
             "-f",
             "--logfile_dir",
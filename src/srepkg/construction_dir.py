@@ -1,13 +1,15 @@
 import abc
+import dataclasses
 import logging
-import pkginfo
 import tempfile
 import uuid
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple, Union
 
+from packaging.utils import canonicalize_name, canonicalize_version
 from yaspin import yaspin
 
+import srepkg.build_artifact_cache as bac
 import srepkg.dist_builder as db
 import srepkg.error_handling.custom_exceptions as ce
 import srepkg.utils.dist_archive_file_tools as cft
@@ -15,10 +17,11 @@ import srepkg.orig_src_preparer_interfaces as osp_int
 import srepkg.repackager_data_structs as rp_ds
 import srepkg.wheel_modifier as wm
 import srepkg.utils.wheel_entry_point_extractor as we_pe
+import srepkg.utils.wheel_index as wi
 
 from inner_pkg_installer import yaspin_updater as yu
 
-DEFAULT_DIST_CLASSES = (pkginfo.SDist, pkginfo.Wheel)
+DEFAULT_DIST_TYPES = (cft.ArchiveDistType.SDIST, cft.ArchiveDistType.WHEEL)
 DEFAULT_SREPKG_SUFFIX = "srepkg"
 
 
@@ -28,7 +31,10 @@ class ConstructionDir(osp_int.ManageableConstructionDir):
     """
 
     def __init__(
-        self, construction_dir_command: Path, srepkg_name_command: str = None
+        self,
+        construction_dir_command: Path,
+        srepkg_name_command: str = None,
+        build_artifact_cache: bac.BuildArtifactCache = None,
     ):
         self._root = construction_dir_command
         self._srepkg_root = construction_dir_command / uuid.uuid4().hex
@@ -37,9 +43,19 @@ class ConstructionDir(osp_int.ManageableConstructionDir):
         self._srepkg_inner.mkdir(exist_ok=True, parents=True)
         (self._srepkg_root / "orig_dist").mkdir()
         self._custom_srepkg_name = srepkg_name_command
-        self._supported_dist_types = DEFAULT_DIST_CLASSES
+        self._supported_dist_types = DEFAULT_DIST_TYPES
+        self._dist_metadata_reader = cft.DistMetadataReader()
         self._srepkg_name = None
         self._summary = None
+        self._build_artifact_cache = build_artifact_cache
+        # Dist inventory of orig_dist, valid while (path, st_mtime_ns) of
+        # orig_dist is unchanged, and parsed dists by (name, size,
+        # mtime_ns), so each archive is parsed once however often the
+        # inventory is rebuilt.
+        self._dists_key: Union[Tuple[Path, int], None] = None
+        self._dists: List[rp_ds.DistInfo] = []
+        self._parsed_dists: Dict[Tuple[str, int, int], rp_ds.DistInfo] = {}
+        self._wheel_index: Union[wi.WheelIndex, None] = None
 
     @property
     def _root_contents(self):
@@ -62,39 +78,91 @@ class ConstructionDir(osp_int.ManageableConstructionDir):
         return list(self.orig_pkg_dists.iterdir())
 
     def _get_dist_info(self, dist_path: Path):
-        for dist_class in self.supported_dist_types:
-            try:
-                dist_obj = dist_class(dist_path)
-                return rp_ds.DistInfo(path=dist_path, dist_obj=dist_obj)
-            except ValueError:
-                pass
+        metadata = self._dist_metadata_reader.read(Path(dist_path))
+        if (
+            metadata is None
+            or metadata.dist_type not in self.supported_dist_types
+        ):
+            return None
+        return rp_ds.DistInfo(
+            path=dist_path,
+            name=metadata.name,
+            version=metadata.version,
+            dist_type=metadata.dist_type,
+        )
+
+    def _parsed_dist_info(self, dist_path: Path):
+        stat = dist_path.stat()
+        # Keyed by file name rather than path, so renaming srepkg_root in
+        # finalize() doesn't cause a re-parse.
+        key = (dist_path.name, stat.st_size, stat.st_mtime_ns)
+        dist_info = self._parsed_dists.get(key)
+        if key not in self._parsed_dists:
+            dist_info = self._get_dist_info(dist_path)
+        elif dist_info is not None and dist_info.path != dist_path:
+            dist_info = dataclasses.replace(dist_info, path=dist_path)
+        self._parsed_dists[key] = dist_info
+        return dist_info
+
+    def invalidate_dists(self):
+        """
+        Makes the next access of dists re-list orig_dist. Call after adding
+        or rewriting a dist, since directory mtime granularity may be too
+        coarse to show the change.
+        """
+        self._dists_key = None
+        self._wheel_index = None
 
     @property
     def dists(self):
-        return [
-            self._get_dist_info(entry)
-            for entry in self._orig_pkg_dists_contents
-        ]
+        dists_key = (
+            self.orig_pkg_dists,
+            self.orig_pkg_dists.stat().st_mtime_ns,
+        )
+        if dists_key != self._dists_key:
+            self._dists = [
+                self._parsed_dist_info(entry)
+                for entry in self._orig_pkg_dists_contents
+            ]
+            self._dists_key = dists_key
+        return self._dists
 
     @property
     def _unique_orig_pkgs(self):
-        unique_pkgs = {
-            rp_ds.UniquePkg(
-                # DistInfo changes any "_" to "-" in pkg name. Undo that.
-                name=dist.dist_obj.name.replace("-", "_"),
-                version=dist.dist_obj.version,
+        dists = self.dists
+        # Names and versions from file names are normalized, but ones read
+        # from an archive's metadata may not be, so compare canonical forms.
+        unique_pkgs = {}
+        for dist in sorted(dists, key=lambda dist: dist.path.name):
+            unique_pkgs.setdefault(
+                (
+                    canonicalize_name(dist.name),
+                    canonicalize_version(dist.version),
+                ),
+                rp_ds.UniquePkg(
+                    name=dist.name.replace("-", "_"), version=dist.version
+                ),
             )
-            for dist in self.dists
-        }
         if len(unique_pkgs) > 1:
-            raise ce.MultiplePackagesPresent(self.dists)
-        return unique_pkgs
+            raise ce.MultiplePackagesPresent(dists)
+        return set(unique_pkgs.values())
 
     @property
     def orig_pkg_name(self):
         if self._unique_orig_pkgs:
             return list(self._unique_orig_pkgs)[0].name
 
+    @property
+    def _display_pkg_name(self) -> Union[str, None]:
+        # Dist file names (used to identify the package) are normalized, but
+        # srepkg names keep the project's own spelling (e.g. Flask), which
+        # only the wheel's METADATA has.
+        wheel_index = self.wheel_index
+        metadata = wheel_index.metadata if wheel_index else None
+        if metadata is None or not metadata.get("Name"):
+            return self.orig_pkg_name
+        return metadata["Name"].replace("-", "_")
+
     @property
     def pypi_version(self):
         if self._unique_orig_pkgs:
@@ -103,7 +171,10 @@ class ConstructionDir(osp_int.ManageableConstructionDir):
     @property
     def has_wheel(self):
         return any(
-            [type(dist.dist_obj) == pkginfo.Wheel for dist in self.dists]
+            [
+                dist.dist_type == cft.ArchiveDistType.WHEEL
+                for dist in self.dists
+            ]
         )
 
     @property
@@ -112,13 +183,32 @@ class ConstructionDir(osp_int.ManageableConstructionDir):
             return [
                 dist.path
                 for dist in self.dists
-                if type(dist.dist_obj) == pkginfo.Wheel
+                if dist.dist_type == cft.ArchiveDistType.WHEEL
             ][0]
 
+    @property
+    def wheel_index(self) -> Union[wi.WheelIndex, None]:
+        """
+        Index of the wheel at wheel_path, shared by everything that reads
+        the wheel's file list or .dist-info metadata.
+        """
+        wheel_path = self.wheel_path
+        if wheel_path is None:
+            return None
+        if (
+            self._wheel_index is None
+            or self._wheel_index.wheel_path != wheel_path
+        ):
+            self._wheel_index = wi.WheelIndex(wheel_path=wheel_path)
+        return self._wheel_index
+
     @property
     def has_sdist(self):
         return any(
-            [type(dist.dist_obj) == pkginfo.SDist for dist in self.dists]
+            [
+                dist.dist_type == cft.ArchiveDistType.SDIST
+                for dist in self.dists
+            ]
         )
 
     # @property
@@ -137,6 +227,10 @@ class ConstructionDir(osp_int.ManageableConstructionDir):
     def supported_dist_types(self):
         return self._supported_dist_types
 
+    @property
+    def build_artifact_cache(self):
+        return self._build_artifact_cache
+
     def _rename_sub_dirs(self, srepkg_root_new: str, srepkg_inner_new: str):
 
         self._srepkg_inner.replace(
@@ -150,6 +244,8 @@ class ConstructionDir(osp_int.ManageableConstructionDir):
             self._srepkg_root.parent.absolute() / srepkg_root_new
         )
         self._srepkg_inner = self._srepkg_root / srepkg_inner_new
+        if self._wheel_index is not None and self.wheel_path is not None:
+            self._wheel_index.relocate(self.wheel_path)
 
     def _update_srepkg_and_dir_names(self, discovered_pkg_name: str):
         if self._custom_srepkg_name:
@@ -165,15 +261,18 @@ class ConstructionDir(osp_int.ManageableConstructionDir):
         self._srepkg_name = srepkg_name
 
     def _ensure_valid_console_script_names(self):
-        wheel_dist_info = wm.WheelDistInfo(wheel_path=self.wheel_path)
+        wheel_dist_info = wm.WheelDistInfo(
+            wheel_path=self.wheel_path, wheel_index=self.wheel_index
+        )
         if wheel_dist_info.has_console_script_name_with_dash:
             wm.WheelEntryPointsModifier(
-                wheel_path=self.wheel_path
+                wheel_path=self.wheel_path, wheel_index=self.wheel_index
             ).modify_and_rebuild()
+            self.invalidate_dists()
 
     def _extract_cs_entry_pts_from_wheel(self):
         return we_pe.WheelEntryPointExtractor(
-            self.wheel_path
+            self.wheel_path, wheel_index=self.wheel_index
         ).get_entry_points()
 
     def _ensure_have_wheel(self):
@@ -181,11 +280,12 @@ class ConstructionDir(osp_int.ManageableConstructionDir):
             raise ce.MissingOrigPkgContent(str(self.orig_pkg_dists))
         if not self.has_wheel and self.has_sdist:
             SdistToWheelConverter(self).build_wheel()
+            self.invalidate_dists()
 
     def _set_summary(self):
 
         self._summary = rp_ds.ConstructionDirSummary(
-            pkg_name=self.orig_pkg_name,
+            pkg_name=self._display_pkg_name,
             pkg_version=self.pypi_version,
             srepkg_name=self._srepkg_name,
             srepkg_root=self._srepkg_root,
@@ -198,7 +298,7 @@ class ConstructionDir(osp_int.ManageableConstructionDir):
     def finalize(self):
         self._ensure_have_wheel()
         self._update_srepkg_and_dir_names(
-            discovered_pkg_name=self.orig_pkg_name
+            discovered_pkg_name=self._display_pkg_name
         )
 
         self._ensure_valid_console_script_names()
@@ -217,9 +317,16 @@ class CustomConstructionDir(ConstructionDir):
     """
 
     def __init__(
-        self, construction_dir_command: Path, srepkg_name_command: str = None
+        self,
+        construction_dir_command: Path,
+        srepkg_name_command: str = None,
+        build_artifact_cache: bac.BuildArtifactCache = None,
     ):
-        super().__init__(construction_dir_command, srepkg_name_command)
+        super().__init__(
+            construction_dir_command,
+            srepkg_name_command,
+            build_artifact_cache,
+        )
 
     def settle(self):
         print(
@@ -234,11 +341,16 @@ class TempConstructionDir(ConstructionDir):
     build location (and temp dir is used).
     """
 
-    def __init__(self, srepkg_name_command: str = None):
+    def __init__(
+        self,
+        srepkg_name_command: str = None,
+        build_artifact_cache: bac.BuildArtifactCache = None,
+    ):
         self._temp_dir_obj = tempfile.TemporaryDirectory()
         super().__init__(
             construction_dir_command=Path(self._temp_dir_obj.name),
             srepkg_name_command=srepkg_name_command,
+            build_artifact_cache=build_artifact_cache,
         )
 
     def _set_summary(self):
@@ -270,7 +382,7 @@ class SdistToWheelConverter:
             build_from_dist = next(
                 dist
                 for dist in self._construction_dir.dists
-                if isinstance(dist.dist_obj, pkginfo.sdist.SDist)
+                if dist.dist_type == cft.ArchiveDistType.SDIST
             )
         except StopIteration:
             raise ce.NoSDistForWheelConstruction(
@@ -279,10 +391,7 @@ class SdistToWheelConverter:
 
         return build_from_dist
 
-    def build_wheel(self):
-
-        build_from_dist = self._get_build_from_dist()
-
+    def _convert(self, build_from_dist: rp_ds.DistInfo) -> Path:
         with yu.yaspin_log_updater(
             msg=f"Converting {build_from_dist.path.name} to a wheel",
             logger=logging.getLogger(__name__),
@@ -304,3 +413,30 @@ class SdistToWheelConverter:
 
         completed_msg = f"\tBuilt wheel {wheel_path.name}"
         logging.getLogger(f"std_out.{__name__}").info(completed_msg)
+        return wheel_path
+
+    def build_wheel(self):
+
+        build_from_dist = self._get_build_from_dist()
+        cache = self._construction_dir.build_artifact_cache
+
+        if cache is None:
+            self._convert(build_from_dist)
+            return
+
+        cache_key = cache.key(
+            input_digest=cache.file_digest(build_from_dist.path),
+            distributions=["wheel"],
+        )
+        cached_wheels = cache.fetch(
+            cache_key,
+            self._construction_dir.orig_pkg_dists,
+            description=build_from_dist.path.name,
+        )
+        if cached_wheels:
+            logging.getLogger(f"std_out.{__name__}").info(
+                f"\tUsing cached wheel {cached_wheels[0].name}"
+            )
+            return
+
+        cache.store(cache_key, [self._convert(build_from_dist)])
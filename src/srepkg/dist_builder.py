@@ -1,14 +1,132 @@
-import hashlib
+import json
+import logging
+import subprocess
 import sys
 import tempfile
+from contextlib import contextmanager
 from pathlib import Path
+from typing import List, Tuple, Union
+import srepkg.build_env_cache as bec
 import srepkg.dist_builder_sub_process as dbs
 import srepkg.error_handling.custom_exceptions as ce
+import srepkg.utils.dir_snapshot as dsn
+import srepkg.utils.dist_archive_file_tools as daft
 import srepkg.utils.logged_err_detecting_subprocess as leds
-import srepkg.utils.pkg_type_identifier as pti
+
+
+class BuildWorker:
+    """
+    Long-lived subprocess that runs every dist build sent to it over a
+    pipe, so interpreter startup and import of build happen once.
+    """
+
+    def __init__(self, build_env_cache: bec.BuildEnvCache = None):
+        self._build_env_cache = build_env_cache
+        self._process = None
+        self._log_file = tempfile.TemporaryFile()
+        self._log_offset = 0
+
+    @property
+    def build_env_cache(self) -> Union[bec.BuildEnvCache, None]:
+        return self._build_env_cache
+
+    @property
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        self._process = subprocess.Popen(
+            [sys.executable, dbs.__file__, dbs.WORKER_FLAG],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._log_file,
+            universal_newlines=True,
+        )
+        return self
+
+    def _log_new_output(self, logger: logging.Logger, level: int):
+        self._log_file.seek(self._log_offset)
+        for line in self._log_file:
+            logger.log(level, line.decode("utf-8").strip())
+        self._log_offset = self._log_file.tell()
+
+    def submit(
+        self,
+        distribution: str,
+        source_dir: Path,
+        output_directory: Path,
+        python_executable: Path = None,
+    ) -> List[Path]:
+        build_job = {
+            "distribution": distribution,
+            "source_dir": str(source_dir.absolute()),
+            "output_directory": str(output_directory.absolute()),
+        }
+        if python_executable is not None:
+            build_job["python_executable"] = str(python_executable)
+        if not self.is_running:
+            raise ce.BuildWorkerError(build_job, "Build worker not running")
+
+        self._process.stdin.write(json.dumps(build_job) + "\n")
+        self._process.stdin.flush()
+        result_line = self._process.stdout.readline()
+
+        if not result_line:
+            self._log_new_output(
+                logging.getLogger(f"std_err.{__name__}"), logging.ERROR
+            )
+            raise ce.BuildWorkerError(build_job, "Build worker exited")
+
+        result = json.loads(result_line)
+        if dbs.BUILD_ERROR_KEY in result:
+            self._log_new_output(
+                logging.getLogger(f"std_err.{__name__}"), logging.ERROR
+            )
+            raise ce.BuildWorkerError(build_job, result[dbs.BUILD_ERROR_KEY])
+
+        self._log_new_output(logging.getLogger(__name__), logging.INFO)
+        return [Path(item) for item in result[dbs.DIST_PATHS_KEY]]
+
+    def stop(self):
+        if self._process is None:
+            return
+        if self._process.stdin:
+            self._process.stdin.close()
+        self._process.wait()
+        self._process.stdout.close()
+        self._log_file.close()
+        self._process = None
+
+
+_active_worker: Union[BuildWorker, None] = None
+
+
+@contextmanager
+def build_worker_session(build_env_cache: bec.BuildEnvCache = None):
+    """
+    Routes every DistBuilder.build inside the context through one shared
+    BuildWorker. If build_env_cache is provided, builds run in cached
+    isolated environments.
+    """
+    global _active_worker
+    if _active_worker is not None:
+        yield _active_worker
+        return
+
+    _active_worker = BuildWorker(build_env_cache=build_env_cache).start()
+    try:
+        yield _active_worker
+    finally:
+        _active_worker.stop()
+        _active_worker = None
 
 
 class DistBuilder:
+    """
+    Builds a wheel or sdist from source_dir into output_directory. With
+    distribution=dbs.SDIST_AND_WHEEL, builds an sdist and then a wheel from
+    the unpacked sdist, so both come from one pass over the source tree.
+    """
 
     def __init__(
         self,
@@ -17,6 +135,7 @@ class DistBuilder:
         output_directory: Path,
         std_out_file: Path = tempfile.TemporaryFile(),
         std_err_file: Path = tempfile.TemporaryFile(),
+        build_env_cache: bec.BuildEnvCache = None,
     ):
         self._distribution = distribution
         self._source_dir = source_dir
@@ -24,53 +143,104 @@ class DistBuilder:
         self._output_directory.mkdir(parents=True, exist_ok=True)
         self._std_out_file = std_out_file
         self._std_err_file = std_err_file
+        if build_env_cache is None and _active_worker is not None:
+            build_env_cache = _active_worker.build_env_cache
+        self._build_env_cache = build_env_cache
 
-    @staticmethod
-    def _calc_md5(file_path: Path):
-        hash_md5 = hashlib.md5()
-        with file_path.open(mode="rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+    @property
+    def _python_executable(self) -> Union[Path, None]:
+        if self._build_env_cache is not None:
+            return self._build_env_cache.python_for(
+                self._source_dir, distributions=self._build_distributions
+            )
 
     @property
-    def _files_in_dest_dir(self):
-        return [
+    def _build_distributions(self) -> Tuple[str, ...]:
+        if self._distribution == dbs.SDIST_AND_WHEEL:
+            return "sdist", "wheel"
+        return (self._distribution,)
+
+    @property
+    def _num_expected_dists(self) -> int:
+        return 2 if self._distribution == dbs.SDIST_AND_WHEEL else 1
+
+    @staticmethod
+    def _reported_dist_paths(std_out_lines: List[str]) -> List[Path]:
+        reported_paths = []
+        for line in std_out_lines:
+            if not line.startswith("{"):
+                continue
+            try:
+                reported = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(reported, dict) and dbs.DIST_PATH_KEY in reported:
+                reported_paths.append(Path(reported[dbs.DIST_PATH_KEY]))
+        return reported_paths
+
+    def _detect_new_dists(self, orig_snapshot: dsn.DirSnapshot) -> List[Path]:
+        new_dist_files = [
             item
-            for item in self._output_directory.iterdir()
-            if not item.is_dir()
+            for item in orig_snapshot.changed_files()
+            if daft.ArchiveIdentifier().id_dist_type(item)
+            != daft.ArchiveDistType.UNKNOWN
         ]
+        assert len(new_dist_files) == self._num_expected_dists
+
+        # Same order the subprocess builds in: sdist before wheel.
+        return sorted(
+            new_dist_files,
+            key=lambda item: daft.ArchiveIdentifier().id_dist_type(item)
+            == daft.ArchiveDistType.WHEEL,
+        )
+
+    def build(self) -> Path:
+        """
+        Returns the path of the last dist built.
+        """
+        return self.build_dists()[-1]
+
+    def build_dists(self) -> List[Path]:
+        """
+        Returns the paths of all dists built, in build order.
+        """
+        python_executable = self._python_executable
+
+        if _active_worker is not None:
+            return _active_worker.submit(
+                distribution=self._distribution,
+                source_dir=self._source_dir,
+                output_directory=self._output_directory,
+                python_executable=python_executable,
+            )
 
-    def build(self):
-        orig_dest_checksums = [
-            self._calc_md5(item) for item in self._files_in_dest_dir
+        cmd = [
+            sys.executable,
+            dbs.__file__,
+            self._distribution,
+            str(self._source_dir),
+            str(self._output_directory),
         ]
+        if python_executable is not None:
+            cmd.extend(["--python_executable", str(python_executable)])
 
-        leds.LoggedErrDetectingSubprocess(
-            cmd=[
-                sys.executable,
-                dbs.__file__,
-                self._distribution,
-                str(self._source_dir),
-                str(self._output_directory),
-            ],
+        orig_snapshot = dsn.DirSnapshot(self._output_directory)
+
+        build_process = leds.LoggedErrDetectingSubprocess(
+            cmd=cmd,
             gen_logger_name=__name__,
             std_out_logger_name="std_out",
             std_err_logger_name="std_err",
             default_exception=ce.BuildSubprocessError,
-        ).run()
+        )
+        build_process.run()
 
-        new_dist_files = [
-            item
-            for item in self._files_in_dest_dir
-            if (
-                self._calc_md5(item) not in orig_dest_checksums
-                and (
-                    pti.PkgRefIdentifier(str(item)).identify_for_osp_dispatch()
-                    == pti.PkgRefType.LOCAL_DIST
-                )
-            )
-        ]
-        assert len(new_dist_files) == 1
+        reported_dist_paths = self._reported_dist_paths(
+            build_process.std_out_lines
+        )
+        if len(reported_dist_paths) == self._num_expected_dists and all(
+            item.is_file() for item in reported_dist_paths
+        ):
+            return reported_dist_paths
 
-        return new_dist_files[0]
+        return self._detect_new_dists(orig_snapshot)
@@ -1,7 +1,57 @@
 import argparse
 import build
+import json
+import os
+import pyproject_hooks
 import sys
+import tarfile
+import tempfile
+import traceback
 from pathlib import Path
+from typing import Any, Dict, List, Mapping, Sequence, TextIO
+
+# Key of the JSON line written to stdout that tells the parent process which
+# file was built.
+DIST_PATH_KEY = "srepkg_dist_path"
+# Key of the list of every file a build worker job built, in build order.
+DIST_PATHS_KEY = "srepkg_dist_paths"
+# Key of the JSON line written by a build worker when a job fails.
+BUILD_ERROR_KEY = "srepkg_build_error"
+# Distribution value that builds an sdist, then a wheel from the unpacked
+# sdist.
+SDIST_AND_WHEEL = "sdist_and_wheel"
+# Command line flag that starts a long-lived build worker instead of
+# running a single build.
+WORKER_FLAG = "--worker"
+
+
+def isolated_env_runner(
+    python_executable: str,
+    runner=pyproject_hooks.default_subprocess_runner,
+):
+    """
+    Wraps runner so build backend hooks run with the scripts directory of
+    python_executable's env first on PATH (as build does for its own
+    isolated envs), so tools installed as build requirements are found.
+    """
+    scripts_dir = os.path.dirname(python_executable)
+
+    def run_in_env(
+        cmd: Sequence[str],
+        cwd: str = None,
+        extra_environ: Mapping[str, str] = None,
+    ):
+        path = os.environ.get("PATH")
+        env_environ = {
+            "PATH": (
+                os.pathsep.join([scripts_dir, path])
+                if path is not None
+                else scripts_dir
+            )
+        }
+        runner(cmd, cwd, {**env_environ, **(extra_environ or {})})
+
+    return run_in_env
 
 
 class _DistBuilderArgParser:
@@ -13,6 +63,9 @@ class _DistBuilderArgParser:
         self._parser.add_argument("distribution", type=str)
         self._parser.add_argument("source_dir", type=str)
         self._parser.add_argument("output_directory", type=str)
+        self._parser.add_argument(
+            "--python_executable", type=str, default=sys.executable
+        )
 
     def get_args(self, *args):
         self._define_args()
@@ -22,29 +75,131 @@ class _DistBuilderArgParser:
 
 class _DistBuilder:
 
-    def __init__(self, distribution: str, source_dir: str, output_directory: str):
+    def __init__(
+        self,
+        distribution: str,
+        source_dir: str,
+        output_directory: str,
+        python_executable: str = sys.executable,
+    ):
         self._distribution = distribution
         self._source_dir = source_dir
         self._output_directory = output_directory
+        self._python_executable = python_executable
 
-    def build_dist(self) -> Path:
-        dist_builder = build.ProjectBuilder(
-            source_dir=self._source_dir, python_executable=sys.executable
-        )
+    @property
+    def _is_isolated(self) -> bool:
+        return self._python_executable != sys.executable
+
+    @staticmethod
+    def _check_dynamic_requires(
+        dist_builder: build.ProjectBuilder, distribution: str
+    ):
+        # The isolated env was picked to hold everything the backend asks
+        # for, and is shared with other builds, so never install into it.
+        missing = dist_builder.check_dependencies(distribution)
+        if missing:
+            raise build.BuildException(
+                "Build requirements missing from isolated build "
+                f"environment: {sorted(item[0] for item in missing)}"
+            )
+
+    def _build_from(self, source_dir: str, distribution: str) -> Path:
+        if self._is_isolated:
+            dist_builder = build.ProjectBuilder(
+                source_dir=source_dir,
+                python_executable=self._python_executable,
+                runner=isolated_env_runner(self._python_executable),
+            )
+            self._check_dynamic_requires(dist_builder, distribution)
+        else:
+            dist_builder = build.ProjectBuilder(source_dir=source_dir)
 
         dist_path_str = dist_builder.build(
-            distribution=self._distribution,
+            distribution=distribution,
             output_directory=self._output_directory,
         )
 
         return Path(dist_path_str)
 
+    @staticmethod
+    def _unpack_sdist(sdist_path: Path, unpack_dir: Path) -> Path:
+        with tarfile.open(sdist_path) as tf:
+            if hasattr(tarfile, "data_filter"):
+                tf.extractall(unpack_dir, filter="data")
+            else:
+                tf.extractall(unpack_dir)
+        # An sdist holds a single {name}-{version} top level directory.
+        (sdist_src,) = [item for item in unpack_dir.iterdir() if item.is_dir()]
+        return sdist_src
+
+    def _build_sdist_and_wheel(self) -> List[Path]:
+        sdist_path = self._build_from(self._source_dir, "sdist")
+        with tempfile.TemporaryDirectory() as unpack_dir:
+            sdist_src = self._unpack_sdist(sdist_path, Path(unpack_dir))
+            wheel_path = self._build_from(str(sdist_src), "wheel")
+        return [sdist_path, wheel_path]
+
+    def build_dist(self) -> Path:
+        return self._build_from(self._source_dir, self._distribution)
+
+    def build_dists(self) -> List[Path]:
+        if self._distribution == SDIST_AND_WHEEL:
+            return self._build_sdist_and_wheel()
+        return [self.build_dist()]
+
+
+def report_dist_path(dist_path: Path):
+    print(json.dumps({DIST_PATH_KEY: str(dist_path.absolute())}), flush=True)
+
 
 def main(*args) -> Path:
+    """
+    Builds the requested dist(s), reports each path on stdout, and returns
+    the last one built.
+    """
     dist_builder = _DistBuilderArgParser().get_args(*args)
-    dist_path = dist_builder.build_dist()
-    return dist_path
+    dist_paths = dist_builder.build_dists()
+    for dist_path in dist_paths:
+        report_dist_path(dist_path)
+    return dist_paths[-1]
+
+
+def run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        dist_paths = _DistBuilder(**job).build_dists()
+    except Exception:
+        return {BUILD_ERROR_KEY: traceback.format_exc()}
+    return {
+        DIST_PATH_KEY: str(dist_paths[-1].absolute()),
+        DIST_PATHS_KEY: [str(item.absolute()) for item in dist_paths],
+    }
+
+
+def serve(job_stream: TextIO, result_stream: TextIO):
+    """
+    Runs one build per JSON line read from job_stream and writes one JSON
+    result line per job to result_stream.
+    """
+    for line in job_stream:
+        if not line.strip():
+            continue
+        result = run_job(json.loads(line))
+        result_stream.write(json.dumps(result) + "\n")
+        result_stream.flush()
+
+
+def worker_main():
+    # Keep a private copy of stdout for results, then point fd 1 at stderr
+    # so output from build backends (which inherit fd 1) can't corrupt the
+    # result channel.
+    result_stream = os.fdopen(os.dup(sys.stdout.fileno()), mode="w")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    serve(job_stream=sys.stdin, result_stream=result_stream)
 
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:] == [WORKER_FLAG]:
+        worker_main()
+    else:
+        main()
@@ -1,10 +1,15 @@
+import contextlib
 import logging
 import shutil
+import tempfile
 from packaging.tags import Tag
 from packaging.utils import parse_wheel_filename
 from pathlib import Path
+from typing import List
 
+import srepkg.build_artifact_cache as bac
 import srepkg.dist_builder as db
+import srepkg.dist_builder_sub_process as dbs
 import srepkg.error_handling.custom_exceptions as ce
 import srepkg.orig_src_preparer_interfaces as osp_int
 import srepkg.utils.logged_err_detecting_subprocess as leds
@@ -13,12 +18,32 @@ import inner_pkg_installer.yaspin_updater as yu
 
 
 class DistProviderFromSrc(osp_int.DistProviderInterface):
+    """
+    Builds a wheel of the original package from src_path, plus an sdist if
+    the wheel is not pure Python. With wheel_from_sdist, the sdist is built
+    first and the wheel is built from the unpacked sdist in the same build
+    job. That checks the sdist is complete enough to build from, at the cost
+    of an sdist build (discarded again) for pure packages.
+    """
 
-    def __init__(self, src_path: Path, dest_path: Path):
+    def __init__(
+        self,
+        src_path: Path,
+        dest_path: Path,
+        build_artifact_cache: bac.BuildArtifactCache = None,
+        wheel_from_sdist: bool = False,
+    ):
         self._src_path = src_path
         self._dest_path = dest_path
+        self._build_artifact_cache = build_artifact_cache
+        self._wheel_from_sdist = wheel_from_sdist
 
-    def run(self):
+    @staticmethod
+    def _is_pure(wheel_path: Path) -> bool:
+        name, version, bld, tags = parse_wheel_filename(wheel_path.name)
+        return Tag("py3", "none", "any") in tags
+
+    def _build_from_src_tree(self) -> List[Path]:
         with yu.yaspin_log_updater(
             msg="Building original package wheel from source code",
             logger=logging.getLogger(__name__),
@@ -29,51 +54,153 @@ class DistProviderFromSrc(osp_int.DistProviderInterface):
                 output_directory=self._dest_path,
             ).build()
 
-        wheel_filename = wheel_path.name
-        name, version, bld, tags = parse_wheel_filename(wheel_filename)
+        if self._is_pure(wheel_path):
+            return [wheel_path]
 
-        if Tag("py3", "none", "any") not in tags:
-            with yu.yaspin_log_updater(
-                msg="Building original package Sdist from source code",
-                logger=logging.getLogger(__name__),
-            ):
-                db.DistBuilder(
-                    distribution="sdist",
-                    source_dir=self._src_path,
-                    output_directory=self._dest_path,
-                ).build()
+        with yu.yaspin_log_updater(
+            msg="Building original package Sdist from source code",
+            logger=logging.getLogger(__name__),
+        ):
+            sdist_path = db.DistBuilder(
+                distribution="sdist",
+                source_dir=self._src_path,
+                output_directory=self._dest_path,
+            ).build()
+
+        return [wheel_path, sdist_path]
+
+    def _build_wheel_from_sdist(self) -> List[Path]:
+        with yu.yaspin_log_updater(
+            msg="Building original package Sdist, then wheel from the Sdist",
+            logger=logging.getLogger(__name__),
+        ):
+            sdist_path, wheel_path = db.DistBuilder(
+                distribution=dbs.SDIST_AND_WHEEL,
+                source_dir=self._src_path,
+                output_directory=self._dest_path,
+            ).build_dists()
+
+        if self._is_pure(wheel_path):
+            sdist_path.unlink()
+            return [wheel_path]
+
+        return [wheel_path, sdist_path]
+
+    def _build(self) -> List[Path]:
+        if self._wheel_from_sdist:
+            return self._build_wheel_from_sdist()
+        return self._build_from_src_tree()
+
+    @property
+    def _cache_distributions(self) -> List[str]:
+        # A wheel built from the sdist is cached apart from one built
+        # straight from the source tree, since they can differ.
+        if self._wheel_from_sdist:
+            return [dbs.SDIST_AND_WHEEL]
+        return ["wheel", "sdist"]
+
+    def run(self):
+        if self._build_artifact_cache is None:
+            self._build()
+            return
+
+        cache_key = self._build_artifact_cache.key(
+            input_digest=self._build_artifact_cache.source_tree_digest(
+                self._src_path
+            ),
+            distributions=self._cache_distributions,
+        )
+        cached_dists = self._build_artifact_cache.fetch(
+            cache_key, self._dest_path, description=str(self._src_path)
+        )
+        if cached_dists:
+            cached_filenames = "\n".join(
+                [f"\t• {dist.name}" for dist in cached_dists]
+            )
+            logging.getLogger(f"std_out.{__name__}").info(
+                f"\tUsing cached build of original package:\n"
+                f"{cached_filenames}"
+            )
+            return
+
+        self._build_artifact_cache.store(cache_key, self._build())
 
 
 class DistProviderFromGitRepo(DistProviderFromSrc):
+    """
+    Builds from a checkout of a git remote. The retriever that made the
+    checkout has already checked out the requested git ref.
+    """
+
     def __init__(
         self,
         src_path: Path,
         dest_path: Path,
-        git_ref: str = None,
         version_command=None,
+        build_artifact_cache: bac.BuildArtifactCache = None,
+        wheel_from_sdist: bool = False,
     ):
-        super().__init__(src_path, dest_path)
-        self._git_ref = git_ref
+        super().__init__(
+            src_path, dest_path, build_artifact_cache, wheel_from_sdist
+        )
         self._version_command = version_command
 
-    def checkout_commit_ref(self):
-        if self._git_ref:
+
+class DistProviderFromLocalGitRepo(DistProviderFromSrc):
+    """
+    Builds from a local git repo as of git_ref (default: HEAD). The ref is
+    checked out in a temporary detached worktree of the repo, so nothing is
+    cloned or copied, and the repo's own working tree (including any
+    uncommitted changes) is left alone.
+    """
+
+    def __init__(
+        self,
+        repo_path: Path,
+        dest_path: Path,
+        git_ref: str = None,
+        build_artifact_cache: bac.BuildArtifactCache = None,
+        wheel_from_sdist: bool = False,
+    ):
+        super().__init__(
+            repo_path, dest_path, build_artifact_cache, wheel_from_sdist
+        )
+        self._repo_path = repo_path
+        self._git_ref = git_ref
+
+    def _git(self, *args: str):
+        leds.LoggedErrDetectingSubprocess(
+            cmd=["git", "-C", str(self._repo_path), *args],
+            gen_logger_name=__name__,
+            std_out_logger_name="std_out",
+            std_err_logger_name="std_err",
+            default_exception=ce.GitCheckoutError,
+        ).run()
+
+    @contextlib.contextmanager
+    def _worktree(self):
+        git_ref = self._git_ref or "HEAD"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            worktree = Path(temp_dir) / "worktree"
             with yu.yaspin_log_updater(
-                msg=f"Checking out {self._git_ref}",
+                msg=f"Checking out {git_ref} of {self._repo_path}",
                 logger=logging.getLogger(__name__),
             ):
-                leds.LoggedErrDetectingSubprocess(
-                    cmd=["git", "checkout", self._git_ref],
-                    gen_logger_name=__name__,
-                    std_out_logger_name="std_out",
-                    std_err_logger_name="std_err",
-                    default_exception=ce.GitCheckoutError,
-                    cwd=self._src_path,
-                ).run()
+                self._git(
+                    "worktree", "add", "--detach", str(worktree), git_ref
+                )
+            try:
+                yield worktree
+            finally:
+                self._git("worktree", "remove", "--force", str(worktree))
 
     def run(self):
-        self.checkout_commit_ref()
-        super().run()
+        with self._worktree() as worktree:
+            self._src_path = worktree
+            try:
+                super().run()
+            finally:
+                self._src_path = self._repo_path
 
 
 class DistCopyProvider(osp_int.DistProviderInterface):
@@ -0,0 +1,200 @@
+"""
+Contains class for caching downloaded distributions across srepkg runs,
+keyed by their sha256.
+"""
+
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Union
+
+import srepkg.utils.cache_dirs as cd
+import srepkg.utils.resumable_download as rd
+
+DEFAULT_MAX_DOWNLOAD_CACHE_BYTES = 2 * 1024**3
+PARTIAL_DIR_NAME = ".partial"
+LOCK_FILENAME = ".lock"
+# A partial download whose lock is older than this was abandoned by a
+# process that died, so another process may take it over.
+STALE_LOCK_SECONDS = 60 * 60
+# Unfinished downloads not touched for this long are removed on eviction.
+PARTIAL_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+
+class DownloadCache:
+    """
+    Store of downloaded dists under ~/.cache/srepkg/downloads (or
+    $SREPKG_CACHE_DIR/downloads), one entry per sha256. Hits are
+    hard-linked into the destination directory (copied if the destination
+    is on another filesystem). Entries are published atomically and the
+    least recently used are evicted once the store exceeds max_bytes.
+
+    Downloads in progress live in .partial/<sha256>, claimed with a lock
+    file, so an interrupted download is resumed by the next run instead of
+    started over.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = None,
+        max_bytes: int = DEFAULT_MAX_DOWNLOAD_CACHE_BYTES,
+    ):
+        if cache_dir is None:
+            cache_dir = cd.srepkg_cache_root() / "downloads"
+        self._lru_dir = cd.LruCacheDir(
+            root=cache_dir, max_entries=None, max_bytes=max_bytes
+        )
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _partial_root(self) -> Path:
+        return self._lru_dir.root / PARTIAL_DIR_NAME
+
+    @staticmethod
+    def link_or_copy(src: Path, dest: Path):
+        dest.unlink(missing_ok=True)
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copy2(src, dest)
+
+    def _claim_partial_dir(self, sha256: str) -> Union[Path, None]:
+        partial_dir = self._partial_root / sha256
+        partial_dir.mkdir(parents=True, exist_ok=True)
+        lock_path = partial_dir / LOCK_FILENAME
+        for _ in range(2):
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL))
+                return partial_dir
+            except FileExistsError:
+                try:
+                    lock_age = time.time() - lock_path.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if lock_age < STALE_LOCK_SECONDS:
+                    return None
+                lock_path.unlink(missing_ok=True)
+        return None
+
+    @staticmethod
+    def _cached_file(entry: Path) -> Union[Path, None]:
+        if not entry.is_dir():
+            return None
+        for item in entry.iterdir():
+            if item.name != cd.LAST_USED_MARKER:
+                return item
+        return None
+
+    def has(self, sha256: str) -> bool:
+        return self._cached_file(self._lru_dir.entry_path(sha256)) is not None
+
+    def fetch(
+        self, sha256: str, filename: str, dest_dir: Path
+    ) -> Union[Path, None]:
+        """
+        Links the cached file with sha256 into dest_dir as filename and
+        returns its path, or returns None on a cache miss.
+        """
+        entry = self._lru_dir.entry_path(sha256)
+        cached_file = self._cached_file(entry)
+        if cached_file is None:
+            self.misses += 1
+            return None
+
+        self._lru_dir.touch(entry)
+        dest_path = dest_dir / filename
+        self.link_or_copy(cached_file, dest_path)
+        self.hits += 1
+        logging.getLogger(__name__).info(
+            f"Download cache hit for {filename} (hits: {self.hits}, "
+            f"misses: {self.misses})"
+        )
+        return dest_path
+
+    def _download_to(
+        self,
+        download_dir: Path,
+        url: str,
+        filename: str,
+        sha256: str,
+        on_bytes: Callable[[int], None] = None,
+    ) -> Path:
+        return rd.ResumableDownload(
+            url=url,
+            dest_path=download_dir / filename,
+            expected_sha256=sha256,
+            on_bytes=on_bytes,
+        ).run()
+
+    def download(
+        self,
+        url: str,
+        filename: str,
+        sha256: str,
+        dest_dir: Path,
+        on_bytes: Callable[[int], None] = None,
+    ) -> Path:
+        """
+        Downloads url into the cache (resuming any earlier partial download
+        of the same file), then links it into dest_dir.
+        """
+        partial_dir = self._claim_partial_dir(sha256)
+        if partial_dir is None:
+            # Another process is downloading the same file. Download a
+            # private copy rather than wait.
+            download_dir = self._lru_dir.staging_dir()
+        else:
+            download_dir = partial_dir
+
+        try:
+            downloaded = self._download_to(
+                download_dir, url, filename, sha256, on_bytes
+            )
+            staging_dir = self._lru_dir.staging_dir()
+            downloaded.replace(staging_dir / filename)
+            entry = self._lru_dir.publish(staging_dir, sha256)
+        finally:
+            if partial_dir is None:
+                shutil.rmtree(download_dir, ignore_errors=True)
+            else:
+                (partial_dir / LOCK_FILENAME).unlink(missing_ok=True)
+
+        if partial_dir is not None:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+        self.evict(keep=entry)
+
+        # If another process published the same file first, its copy is
+        # the one kept.
+        dest_path = dest_dir / filename
+        self.link_or_copy(self._cached_file(entry), dest_path)
+        return dest_path
+
+    def get(
+        self,
+        url: str,
+        filename: str,
+        sha256: str,
+        dest_dir: Path,
+        on_bytes: Callable[[int], None] = None,
+    ) -> Path:
+        cached = self.fetch(sha256, filename, dest_dir)
+        if cached is not None:
+            if on_bytes is not None:
+                on_bytes(cached.stat().st_size)
+            return cached
+        return self.download(url, filename, sha256, dest_dir, on_bytes)
+
+    def evict(self, keep: Path = None):
+        self._lru_dir.evict(keep=keep)
+        if not self._partial_root.is_dir():
+            return
+        for partial_dir in self._partial_root.iterdir():
+            try:
+                age = time.time() - partial_dir.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if age > PARTIAL_MAX_AGE_SECONDS:
+                shutil.rmtree(partial_dir, ignore_errors=True)
@@ -123,6 +123,20 @@ class MultipleEntryPtsTxtFiles(Exception):
         return f"{str(self._whl_path)} -> {self._msg}"
 
 
+class RangeRequestsNotSupported(Exception):
+    def __init__(
+        self,
+        url: str,
+        msg="Server did not respond to HTTP Range request with partial "
+        "content.",
+    ):
+        self._url = url
+        self._msg = msg
+
+    def __str__(self):
+        return f"{str(self._url)} -> {self._msg}"
+
+
 class NoConsoleScriptEntryPoints(Exception):
     def __init__(
         self,
@@ -209,6 +223,24 @@ class UnusableVersionArgument(Exception):
         return f"{str(self._version_argument)} -> {self._msg}"
 
 
+class PyPIVersionNotFound(Exception):
+    def __init__(
+        self,
+        pkg_ref: str,
+        version_argument: str,
+        msg="Version argument does not match any release of PyPI package",
+    ):
+        self._pkg_ref = pkg_ref
+        self._version_argument = version_argument
+        self._msg = msg
+
+    def __str__(self):
+        return (
+            f"{str(self._pkg_ref)}, version {str(self._version_argument)} -> "
+            f"{self._msg}"
+        )
+
+
 class PkgVersionWithCommitRef(Exception):
     def __init__(
         self,
@@ -240,3 +272,70 @@ class BuildSubprocessError(Exception):
 
     def __str__(self):
         return f"{str(self._sub_process)} -> {self._msg}"
+
+
+class BuildEnvCreationError(Exception):
+    def __init__(
+        self,
+        sub_process: subprocess.CompletedProcess,
+        msg="Error occurred when installing build requirements into an "
+        "isolated build environment.",
+    ):
+        self._sub_process = sub_process
+        self._msg = msg
+
+    def __str__(self):
+        return f"{str(self._sub_process)} -> {self._msg}"
+
+
+class BuildWorkerError(Exception):
+    def __init__(
+        self,
+        build_job: dict,
+        details: str = "",
+        msg="Error occurred in build worker subprocess when building a sdist"
+        " or wheel.",
+    ):
+        self._build_job = build_job
+        self._details = details
+        self._msg = msg
+
+    def __str__(self):
+        return f"{str(self._build_job)} -> {self._msg}\n{self._details}"
+
+
+class DistDigestMismatch(Exception):
+    def __init__(
+        self,
+        url: str,
+        expected_sha256: str,
+        actual_sha256: str,
+        msg="sha256 of downloaded file does not match digest published by "
+        "package index.",
+    ):
+        self._url = url
+        self._expected_sha256 = expected_sha256
+        self._actual_sha256 = actual_sha256
+        self._msg = msg
+
+    def __str__(self):
+        return (
+            f"{self._url} (expected: {self._expected_sha256}, "
+            f"actual: {self._actual_sha256}) -> {self._msg}"
+        )
+
+
+class MissingGitSubdirectory(Exception):
+    def __init__(
+        self,
+        repo_url: str,
+        subdirectory: str,
+        msg="Subdirectory selected with #subdirectory= does not exist in "
+        "git repo at the requested ref",
+    ):
+        self._repo_url = repo_url
+        self._subdirectory = subdirectory
+        self._msg = msg
+
+    def __str__(self):
+        return f"{self._repo_url}, {self._subdirectory} -> {self._msg}"
@@ -0,0 +1,164 @@
+"""
+Contains class for keeping bare mirrors of git remotes across srepkg runs,
+so a repo that was retrieved before only needs its new commits fetched.
+"""
+
+import hashlib
+import logging
+import shutil
+import subprocess
+from pathlib import Path
+from typing import List
+
+import srepkg.error_handling.custom_exceptions as ce
+import srepkg.utils.cache_dirs as cd
+import srepkg.utils.logged_err_detecting_subprocess as leds
+
+DEFAULT_MAX_GIT_MIRRORS = 20
+# Branches and tags only. A mirror of every ref would also fetch e.g. all
+# of a GitHub repo's refs/pull/*.
+MIRROR_REFSPEC = "+refs/heads/*:refs/heads/*"
+
+
+class GitMirrorCache:
+    """
+    One blob-less bare clone per remote URL under ~/.cache/srepkg/git_mirrors
+    (or $SREPKG_CACHE_DIR/git_mirrors). On reuse, a mirror is updated with
+    git fetch, and a checkout is made with git worktree add, so file
+    contents are only downloaded for commits that get checked out (and only
+    once). The least recently used mirrors beyond max_entries are removed.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path = None,
+        max_entries: int = DEFAULT_MAX_GIT_MIRRORS,
+    ):
+        if cache_dir is None:
+            cache_dir = cd.srepkg_cache_root() / "git_mirrors"
+        self._lru_dir = cd.LruCacheDir(root=cache_dir, max_entries=max_entries)
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+
+    def mirror_path(self, url: str) -> Path:
+        return self._lru_dir.entry_path(self.key(url))
+
+    @staticmethod
+    def _git(*args: str):
+        leds.LoggedErrDetectingSubprocess(
+            cmd=["git", *args],
+            gen_logger_name=__name__,
+            std_out_logger_name="std_out",
+            std_err_logger_name="std_err",
+            default_exception=ce.GitCheckoutError,
+        ).run()
+
+    @staticmethod
+    def _git_succeeds(*args: str) -> bool:
+        return (
+            subprocess.run(
+                ["git", *args],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            ).returncode
+            == 0
+        )
+
+    def _clone(self, url: str) -> Path:
+        staging_dir = self._lru_dir.staging_dir()
+        try:
+            self._git(
+                "clone", "--bare", "--filter=blob:none", url, str(staging_dir)
+            )
+            self._git(
+                "-C",
+                str(staging_dir),
+                "config",
+                "remote.origin.fetch",
+                MIRROR_REFSPEC,
+            )
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        return self._lru_dir.publish(staging_dir, self.key(url))
+
+    def _fetch(self, mirror: Path):
+        self._git("-C", str(mirror), "fetch", "--prune", "--tags", "origin")
+
+    def update(self, url: str) -> Path:
+        """
+        Creates the mirror of url, or fetches what changed since it was last
+        used. Returns the mirror's path.
+        """
+        mirror = self.mirror_path(url)
+        if (mirror / "HEAD").exists():
+            logging.getLogger(__name__).info(f"Updating git mirror of {url}")
+            self._fetch(mirror)
+            self._lru_dir.touch(mirror)
+        else:
+            logging.getLogger(__name__).info(f"Creating git mirror of {url}")
+            mirror = self._clone(url)
+        self._lru_dir.evict(keep=mirror)
+        return mirror
+
+    def _has_commit(self, mirror: Path, git_ref: str) -> bool:
+        return self._git_succeeds(
+            "-C",
+            str(mirror),
+            "rev-parse",
+            "--verify",
+            "--quiet",
+            f"{git_ref}^{{commit}}",
+        )
+
+    def add_worktree(
+        self,
+        url: str,
+        git_ref: str,
+        dest: Path,
+        sparse_dirs: List[str] = None,
+    ):
+        """
+        Checks out git_ref (default: the remote's HEAD) of url into dest (a
+        new or empty directory) as a worktree of the updated mirror. With
+        sparse_dirs, the worktree is a cone-mode sparse checkout of those
+        directories (plus the files of their parent directories).
+        """
+        mirror = self.update(url)
+        git_ref = git_ref or "HEAD"
+        if not self._has_commit(mirror, git_ref):
+            # e.g. a commit no branch or tag reaches
+            self._git_succeeds("-C", str(mirror), "fetch", "origin", git_ref)
+
+        # Worktrees of earlier runs were in temp dirs that no longer exist.
+        self._git("-C", str(mirror), "worktree", "prune")
+        if not sparse_dirs:
+            self._git(
+                "-C",
+                str(mirror),
+                "worktree",
+                "add",
+                "--detach",
+                str(dest),
+                git_ref,
+            )
+            return
+
+        # Sparse checkout settings are per worktree, so other worktrees of
+        # the mirror stay complete.
+        self._git(
+            "-C",
+            str(mirror),
+            "worktree",
+            "add",
+            "--no-checkout",
+            "--detach",
+            str(dest),
+            git_ref,
+        )
+        self._git(
+            "-C", str(dest), "sparse-checkout", "set", "--cone", *sparse_dirs
+        )
+        self._git("-C", str(dest), "checkout", "--detach", git_ref)
@@ -4,47 +4,159 @@ Contains classes for retrieving packages from remote locations.
 
 import functools
 import logging
-import requests
+import subprocess
 import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from packaging.tags import sys_tags, Tag
 from packaging.utils import parse_wheel_filename
 from pathlib import Path
-from typing import Dict, Any, List
+import requests
+from typing import Callable, Dict, Any, FrozenSet, List, Tuple, Union
+from urllib.parse import parse_qs, urldefrag
 
 import inner_pkg_installer.yaspin_updater as yu
+import srepkg.download_cache as dc
 import srepkg.error_handling.custom_exceptions as ce
+import srepkg.git_mirror_cache as gmc
 import srepkg.orig_src_preparer_interfaces as osp_int
 import srepkg.utils.logged_err_detecting_subprocess as leds
+import srepkg.utils.pypi_client as pc
+import srepkg.utils.resumable_download as rd
+import srepkg.utils.wheel_entry_point_extractor as we_pe
+
+MAX_DOWNLOAD_WORKERS = 4
+# Wheels at least this large get their entry points checked with HTTP
+# Range requests before being downloaded.
+LAZY_PROBE_MIN_SIZE = 5 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def sys_tag_priorities() -> Dict[Tag, int]:
+    """
+    Maps each tag supported by the running interpreter to its rank in
+    sys_tags() (0 is the most specific). Built once per process.
+    """
+    priorities = {}
+    for priority, tag in enumerate(sys_tags()):
+        priorities.setdefault(tag, priority)
+    return priorities
+
+
+@functools.lru_cache(maxsize=4096)
+def wheel_tags(wheel_filename: str) -> FrozenSet[Tag]:
+    name, version, bld, tags = parse_wheel_filename(wheel_filename)
+    return tags
+
+
+def wheel_priority(wheel_filename: str) -> Union[int, None]:
+    """
+    Rank of the best of a wheel's tags (including every tag of compressed
+    tag sets like py2.py3-none-any), or None if no tag is supported.
+    """
+    priorities = sys_tag_priorities()
+    supported = [
+        priorities[tag]
+        for tag in wheel_tags(wheel_filename)
+        if tag in priorities
+    ]
+    return min(supported) if supported else None
+
+
+class _DownloadProgress:
+    """
+    Thread-safe byte counts of a set of concurrent downloads, summarized
+    in one line of status text.
+    """
+
+    def __init__(self, dists: List[Dict[str, Any]], on_update: Callable):
+        self._expected_bytes = sum(dist.get("size", 0) for dist in dists)
+        self._num_files = len(dists)
+        self._received_bytes = 0
+        self._num_done = 0
+        self._on_update = on_update
+        self._lock = threading.Lock()
+
+    @property
+    def summary(self) -> str:
+        received_mb = self._received_bytes / 1024**2
+        expected_mb = self._expected_bytes / 1024**2
+        return (
+            f"{self._num_done}/{self._num_files} files, "
+            f"{received_mb:.1f}/{expected_mb:.1f} MB"
+        )
+
+    def add_bytes(self, num_bytes: int):
+        with self._lock:
+            self._received_bytes += num_bytes
+            self._on_update(self.summary)
+
+    def file_done(self):
+        with self._lock:
+            self._num_done += 1
+            self._on_update(self.summary)
 
 
 class PyPIPkgRetriever(osp_int.RemotePkgRetrieverInterface):
     """
     Retrieves packages from Python Package Index.
     """
-    _pypi_api_base = "https://pypi.org/pypi/{}/json"
 
     def __init__(
-        self, pkg_ref: str, copy_dest: Path, version_command: str = None
+        self,
+        pkg_ref: str,
+        copy_dest: Path,
+        version_command: str = None,
+        pkg_metadata: Dict[str, Any] = None,
+        pypi_client: pc.PyPIJsonClient = None,
+        download_cache: dc.DownloadCache = None,
     ):
+        """
+        Args:
+            pkg_ref: PyPI project name
+            copy_dest: directory that downloaded dists are saved in
+            version_command: version to retrieve (default is latest)
+            pkg_metadata: PyPI JSON document of pkg_ref (of the release
+            matching version_command, if provided), if already fetched
+            pypi_client: client used to fetch pkg_metadata if not provided
+            download_cache: optional store of dists downloaded by earlier
+            runs
+        """
         self._pkg_ref = pkg_ref
         self._copy_dest = copy_dest
         self._version_command = version_command
+        self._pkg_metadata_doc = pkg_metadata
+        self._pypi_client = pypi_client
+        self._download_cache = download_cache
+
+    def _fetch_pkg_metadata(self) -> Dict[str, Any]:
+        if self._pypi_client is None:
+            self._pypi_client = pc.PyPIJsonClient()
+        if self._version_command is None:
+            return self._pypi_client.project_json(self._pkg_ref)
+
+        # Per-version document where the index provides one, so the files
+        # of every other release never need to be downloaded or parsed.
+        version_metadata = self._pypi_client.release_json(
+            self._pkg_ref, self._version_command
+        )
+        if version_metadata is None:
+            raise ce.PyPIVersionNotFound(self._pkg_ref, self._version_command)
+        return version_metadata
 
     @property
-    def _pkg_info_url(self) -> str:
-        return self._pypi_api_base.format(self._pkg_ref)
-
-    @property
-    @functools.lru_cache(maxsize=128, typed=False)
     def _pkg_metadata(self) -> Dict[str, Any]:
-        return requests.get(self._pkg_info_url).json()
+        if self._pkg_metadata_doc is None:
+            self._pkg_metadata_doc = self._fetch_pkg_metadata()
+        return self._pkg_metadata_doc
 
     @property
     def _version_url_info(self) -> List[Dict[str, Any]]:
-        if self._version_command:
+        # A project document lists every release under "releases".
+        if self._version_command and "releases" in self._pkg_metadata:
             return self._pkg_metadata["releases"][self._version_command]
-        else:
-            return self._pkg_metadata["urls"]
+        return self._pkg_metadata["urls"]
 
     @property
     def _sdists(self) -> List[Dict[str, Any]]:
@@ -67,29 +179,39 @@ class PyPIPkgRetriever(osp_int.RemotePkgRetrieverInterface):
         ]
 
     @staticmethod
-    def _get_tag(dist_entry: dict) -> Tag:
-        name, version, bld, tag = parse_wheel_filename(dist_entry["filename"])
-        return list(tag)[0]
+    def _get_tags(dist_entry: dict) -> FrozenSet[Tag]:
+        return wheel_tags(dist_entry["filename"])
+
+    @staticmethod
+    def _get_priority(dist_entry: dict) -> Union[int, None]:
+        return wheel_priority(dist_entry["filename"])
 
     def _is_platform_indep_wheel(self, dist_entry: dict) -> bool:
         # Should we ignore abi when doing this check???
-        return self._get_tag(dist_entry).platform == "any"
+        return all(tag.platform == "any" for tag in self._get_tags(dist_entry))
 
     @property
     def _platform_indep_wheels(self) -> List[Dict[str, Any]]:
-        return [
-            dist
-            for dist in self._wheels
-            if self._is_platform_indep_wheel(dist)
-        ]
+        # Best match for the current interpreter first. Wheels with no
+        # supported tag (e.g. py2-none-any) are kept, but go last.
+        return sorted(
+            [
+                dist
+                for dist in self._wheels
+                if self._is_platform_indep_wheel(dist)
+            ],
+            key=lambda dist: (
+                self._get_priority(dist) is None,
+                self._get_priority(dist) or 0,
+            ),
+        )
 
     @property
     def _has_platform_indep_wheel(self) -> bool:
         return len(self._platform_indep_wheels) > 0
 
     def _is_platform_specific_wheel(self, dist_entry: dict) -> bool:
-        tag = self._get_tag(dist_entry)
-        return tag.platform != "any"
+        return not self._is_platform_indep_wheel(dist_entry)
 
     @property
     def _platform_specific_wheels(self) -> List[Dict[str, Any]]:
@@ -101,11 +223,18 @@ class PyPIPkgRetriever(osp_int.RemotePkgRetrieverInterface):
 
     @property
     def _platform_specific_wheels_for_cur_sys(self) -> List[Dict[str, Any]]:
-        return [
-            dist
-            for dist in self._platform_specific_wheels
-            if self._get_tag(dist) in list(sys_tags())
-        ]
+        """
+        Platform specific wheels installable on the current system, best
+        match first.
+        """
+        return sorted(
+            [
+                dist
+                for dist in self._platform_specific_wheels
+                if self._get_priority(dist) is not None
+            ],
+            key=self._get_priority,
+        )
 
     @property
     def _has_platform_specific_wheel_for_cur_sys(self) -> bool:
@@ -127,10 +256,103 @@ class PyPIPkgRetriever(osp_int.RemotePkgRetrieverInterface):
 
         return dists_to_download
 
-    def _download(self, dist: dict) -> None:
-        response = requests.get(dist["url"])
-        with (self._copy_dest / dist["filename"]).open(mode="wb") as dist_file:
-            dist_file.write(response.content)
+    def _download(
+        self, dist: dict, progress: _DownloadProgress = None
+    ) -> None:
+        """
+        Streams dist to a .part file while hashing it, then renames it into
+        place if its sha256 matches the digest listed by PyPI. Interrupted
+        downloads are resumed from the bytes already received. Dists with a
+        sha256 go through the download cache (if any), so a dist downloaded
+        by an earlier run is linked from the cache instead.
+        """
+        expected_sha256 = dist.get("digests", {}).get("sha256")
+        on_bytes = progress.add_bytes if progress is not None else None
+        if self._download_cache is not None and expected_sha256:
+            self._download_cache.get(
+                url=dist["url"],
+                filename=dist["filename"],
+                sha256=expected_sha256,
+                dest_dir=self._copy_dest,
+                on_bytes=on_bytes,
+            )
+        else:
+            rd.ResumableDownload(
+                url=dist["url"],
+                dest_path=self._copy_dest / dist["filename"],
+                expected_sha256=expected_sha256,
+                on_bytes=on_bytes,
+            ).run()
+        if progress is not None:
+            progress.file_done()
+
+    def _download_all(self, dists: List[Dict[str, Any]], updater):
+        # Files download concurrently, so the phase takes as long as the
+        # slowest one. Exceptions from any download are re-raised here.
+        msg = updater.spinner.text
+        progress = _DownloadProgress(
+            dists,
+            on_update=lambda summary: updater.set_text(f"{msg} ({summary})"),
+        )
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(MAX_DOWNLOAD_WORKERS, len(dists)))
+        ) as executor:
+            futures = [
+                executor.submit(self._download, dist, progress)
+                for dist in dists
+            ]
+        for future in futures:
+            future.result()
+
+    @staticmethod
+    def _probe_wheel(dist: dict):
+        """
+        Reads the entry points and WHEEL metadata of a remote wheel without
+        downloading it, so a wheel with no console scripts fails before a
+        large download. Raises NoEntryPtsTxtFile, MultipleEntryPtsTxtFiles
+        or NoConsoleScriptEntryPoints. Other problems (e.g. an index
+        without Range support) just skip the check.
+        """
+        extractor = we_pe.RemoteWheelEntryPointExtractor(dist["url"])
+        try:
+            entry_pts = extractor.get_entry_points()
+            root_is_purelib = extractor.root_is_purelib()
+        except (
+            ce.RangeRequestsNotSupported,
+            requests.RequestException,
+            zipfile.BadZipFile,
+        ) as e:
+            logging.getLogger(__name__).debug(
+                f"Skipped remote check of {dist['filename']}: {e}"
+            )
+            return
+
+        logging.getLogger(__name__).info(
+            f"Remote check of {dist['filename']}: "
+            f"{len(entry_pts.cs_entry_pts)} console script entry point(s), "
+            f"Root-Is-Purelib: {root_is_purelib}, fetched "
+            f"{extractor.range_file.bytes_fetched} of "
+            f"{extractor.range_file.length} bytes"
+        )
+
+    def _is_cached(self, dist: dict) -> bool:
+        expected_sha256 = dist.get("digests", {}).get("sha256")
+        return (
+            self._download_cache is not None
+            and expected_sha256 is not None
+            and self._download_cache.has(expected_sha256)
+        )
+
+    def _probe_large_wheels(self, dists: List[Dict[str, Any]]):
+        # A wheel that is already in the download cache is checked locally
+        # once it is linked into place, at no network cost.
+        for dist in dists:
+            if (
+                dist.get("packagetype") == "bdist_wheel"
+                and dist.get("size", 0) >= LAZY_PROBE_MIN_SIZE
+                and not self._is_cached(dist)
+            ):
+                self._probe_wheel(dist)
 
     def run(self) -> None:
 
@@ -138,9 +360,8 @@ class PyPIPkgRetriever(osp_int.RemotePkgRetrieverInterface):
             msg=f"Retrieving {self._pkg_ref} from Python Packaging Index",
             logger=logging.getLogger(__name__),
         ) as updater:
-
-            for dist in self._dists_to_download:
-                self._download(dist)
+            self._probe_large_wheels(self._dists_to_download)
+            self._download_all(self._dists_to_download, updater)
 
         downloaded_files = "\n".join(
             [f"\t• {dist['filename']}" for dist in self._dists_to_download]
@@ -149,28 +370,200 @@ class PyPIPkgRetriever(osp_int.RemotePkgRetrieverInterface):
         logging.getLogger(f"std_out.{__name__}").info(post_msg)
 
 
+def split_git_url(pkg_ref: str) -> Tuple[str, Union[str, None]]:
+    """
+    Splits a git repo reference written like a pip VCS URL (e.g.
+    git+https://github.com/org/repo#subdirectory=pkgs/cli) into the URL to
+    clone and the package's subdirectory (None if the package is at the
+    repo root).
+    """
+    url, fragment = urldefrag(pkg_ref)
+    if url.startswith("git+"):
+        url = url[len("git+") :]
+    subdirectory = parse_qs(fragment).get("subdirectory", [""])[0].strip("/")
+    return url, subdirectory or None
+
+
 class GithubPkgRetriever(osp_int.RemotePkgRetrieverInterface):
     """
-    Retrieves packages from Github.
+    Retrieves packages from Github (or any other git remote). With a
+    git_mirror_cache, git_ref is checked out from a cached mirror of the
+    repo. Otherwise only what is needed to check out git_ref is fetched:
+        - no git_ref: shallow clone of the default branch
+        - branch or tag: shallow clone of that ref
+        - anything else (e.g. a commit SHA): blob-less partial clone plus a
+          fetch of the commit, so file contents are only downloaded for the
+          commit that gets checked out
+
+    If pkg_ref selects a package with #subdirectory=, the checkout is a
+    cone-mode sparse checkout of that directory, so the rest of the repo's
+    files are never downloaded.
     """
 
-    def __init__(self, pkg_ref: str):
+    def __init__(
+        self,
+        pkg_ref: str,
+        git_ref: str = None,
+        git_mirror_cache: gmc.GitMirrorCache = None,
+    ):
         self._pkg_ref = pkg_ref
+        self._url, self._subdirectory = split_git_url(pkg_ref)
+        self._git_ref = git_ref
+        self._git_mirror_cache = git_mirror_cache
         self._temp_dir_obj = tempfile.TemporaryDirectory()
 
     @property
     def copy_dest(self):
         return Path(self._temp_dir_obj.name)
 
+    @property
+    def src_path(self) -> Path:
+        """
+        Directory of the package within the checkout.
+        """
+        if self._subdirectory:
+            return self.copy_dest / self._subdirectory
+        return self.copy_dest
+
+    @staticmethod
+    def _git(*args: str):
+        leds.LoggedErrDetectingSubprocess(
+            cmd=["git", *args],
+            gen_logger_name=__name__,
+            std_out_logger_name="std_out",
+            std_err_logger_name="std_err",
+            default_exception=ce.GitCheckoutError,
+        ).run()
+
+    @property
+    def _sparse_clone_args(self) -> List[str]:
+        if not self._subdirectory:
+            return []
+        return ["--filter=blob:none", "--sparse"]
+
+    def _set_sparse_checkout(self):
+        if self._subdirectory:
+            self._git(
+                "-C",
+                str(self.copy_dest),
+                "sparse-checkout",
+                "set",
+                "--cone",
+                self._subdirectory,
+            )
+
+    def _ref_is_branch_or_tag(self) -> bool:
+        # ls-remote matches patterns against the tail of ref names (e.g. 1.0
+        # matches refs/heads/release/1.0), which git clone --branch won't
+        # accept, so look for the exact ref names.
+        ls_remote = subprocess.run(
+            [
+                "git",
+                "ls-remote",
+                "--heads",
+                "--tags",
+                self._url,
+                self._git_ref,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if ls_remote.returncode != 0:
+            return False
+        ref_names = {
+            line.split("\t", 1)[-1] for line in ls_remote.stdout.splitlines()
+        }
+        return bool(
+            ref_names
+            & {f"refs/heads/{self._git_ref}", f"refs/tags/{self._git_ref}"}
+        )
+
+    def _clone_at_commit(self):
+        self._git(
+            "clone",
+            "--filter=blob:none",
+            "--no-checkout",
+            self._url,
+            str(self.copy_dest),
+        )
+        # Commits not reachable from any branch or tag aren't in the clone,
+        # so ask for the commit itself. Servers refuse abbreviated SHAs, but
+        # those can only name commits that the clone already has.
+        fetch = subprocess.run(
+            [
+                "git",
+                "-C",
+                str(self.copy_dest),
+                "fetch",
+                "--filter=blob:none",
+                "origin",
+                self._git_ref,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if fetch.returncode != 0:
+            logging.getLogger(__name__).debug(
+                f"Fetch of {self._git_ref} skipped: {fetch.stderr.strip()}"
+            )
+        self._set_sparse_checkout()
+        self._git(
+            "-C",
+            str(self.copy_dest),
+            "checkout",
+            "--detach",
+            self._git_ref,
+        )
+
+    @property
+    def _spinner_msg(self) -> str:
+        if self._git_mirror_cache is not None:
+            return (
+                f"Updating cached git mirror of {self._url} and checking out "
+                f"{self._git_ref or 'HEAD'}"
+            )
+        return f"Cloning {self._pkg_ref} into temporary directory"
+
     def run(self):
         with yu.yaspin_log_updater(
-            msg=f"Cloning {self._pkg_ref} into temporary directory",
+            msg=self._spinner_msg,
             logger=logging.getLogger(__name__),
         ) as updater:
-            leds.LoggedErrDetectingSubprocess(
-                cmd=["git", "clone", self._pkg_ref, self.copy_dest],
-                gen_logger_name=__name__,
-                std_out_logger_name="std_out",
-                std_err_logger_name="std_err",
-                default_exception=ce.GitCheckoutError,
-            ).run()
+            if self._git_mirror_cache is not None:
+                self._git_mirror_cache.add_worktree(
+                    url=self._url,
+                    git_ref=self._git_ref,
+                    dest=self.copy_dest,
+                    sparse_dirs=(
+                        [self._subdirectory] if self._subdirectory else None
+                    ),
+                )
+            elif self._git_ref is None:
+                self._git(
+                    "clone",
+                    "--depth",
+                    "1",
+                    *self._sparse_clone_args,
+                    self._url,
+                    str(self.copy_dest),
+                )
+                self._set_sparse_checkout()
+            elif self._ref_is_branch_or_tag():
+                self._git(
+                    "clone",
+                    "--depth",
+                    "1",
+                    "--branch",
+                    self._git_ref,
+                    *self._sparse_clone_args,
+                    self._url,
+                    str(self.copy_dest),
+                )
+                self._set_sparse_checkout()
+            else:
+                self._clone_at_commit()
+
+        if not self.src_path.is_dir():
+            raise ce.MissingGitSubdirectory(self._url, self._subdirectory)
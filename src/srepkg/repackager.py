@@ -1,3 +1,5 @@
+import srepkg.build_env_cache as bec
+import srepkg.dist_builder as db
 import srepkg.repackager_interfaces as rep_int
 
 
@@ -14,11 +16,17 @@ class Repackager:
         self._service_class_builder = service_class_builder
 
     def repackage(self):
-        construction_dir_summary = (
-            self._service_class_builder.create_orig_src_preparer().prepare()
+        service_class_builder = self._service_class_builder
+        build_env_cache = (
+            bec.BuildEnvCache() if self._srepkg_command.build_isolation else None
         )
 
-        srepkg_builder = self._service_class_builder.create_srepkg_builder(
-            construction_dir_summary=construction_dir_summary
-        )
-        srepkg_builder.build()
+        with db.build_worker_session(build_env_cache=build_env_cache):
+            construction_dir_summary = (
+                service_class_builder.create_orig_src_preparer().prepare()
+            )
+
+            srepkg_builder = service_class_builder.create_srepkg_builder(
+                construction_dir_summary=construction_dir_summary
+            )
+            srepkg_builder.build()
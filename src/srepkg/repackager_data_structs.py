@@ -1,10 +1,13 @@
+import functools
 import tempfile
 
 import pkginfo
 from dataclasses import dataclass, field
 from packaging.utils import parse_wheel_filename
 from pathlib import Path
-from typing import List, NamedTuple, Union
+from typing import Dict, List, NamedTuple, Union
+
+import srepkg.utils.dist_archive_file_tools as daft
 
 
 @dataclass
@@ -32,10 +35,36 @@ class PkgCSEntryPoints:
         return "\n" + "\n".join(as_string_list)
 
 
+PKGINFO_DIST_TYPES = {
+    pkginfo.SDist: daft.ArchiveDistType.SDIST,
+    pkginfo.Wheel: daft.ArchiveDistType.WHEEL,
+}
+
+
 @dataclass
 class DistInfo:
+    """
+    A dist in a construction dir. name, version and dist_type are read
+    from dist_obj if they aren't given.
+    """
+
     path: Path
-    dist_obj: pkginfo.Distribution
+    dist_obj: pkginfo.Distribution = None
+    name: str = None
+    version: str = None
+    dist_type: daft.ArchiveDistType = None
+
+    def __post_init__(self):
+        if self.dist_obj is None:
+            return
+        if self.name is None:
+            self.name = self.dist_obj.name
+        if self.version is None:
+            self.version = self.dist_obj.version
+        if self.dist_type is None:
+            self.dist_type = PKGINFO_DIST_TYPES.get(
+                type(self.dist_obj), daft.ArchiveDistType.UNKNOWN
+            )
 
 
 class UniquePkg(NamedTuple):
@@ -57,20 +86,20 @@ class ConstructionDirSummary:
     )
     temp_dir_obj: tempfile.TemporaryDirectory = None
 
+    @functools.cached_property
+    def _first_path_by_dist_type(self) -> Dict[daft.ArchiveDistType, Path]:
+        first_paths = {}
+        for dist in self.dists:
+            first_paths.setdefault(dist.dist_type, dist.path)
+        return first_paths
+
     @property
     def has_wheel(self):
-        return any(
-            [type(dist.dist_obj) == pkginfo.Wheel for dist in self.dists]
-        )
+        return daft.ArchiveDistType.WHEEL in self._first_path_by_dist_type
 
     @property
     def wheel_path(self):
-        if self.has_wheel:
-            return [
-                dist.path
-                for dist in self.dists
-                if type(dist.dist_obj) == pkginfo.Wheel
-            ][0]
+        return self._first_path_by_dist_type.get(daft.ArchiveDistType.WHEEL)
 
     @property
     def has_platform_indep_wheel(self):
@@ -81,18 +110,11 @@ class ConstructionDirSummary:
 
     @property
     def has_sdist(self):
-        return any(
-            [type(dist.dist_obj) == pkginfo.SDist for dist in self.dists]
-        )
+        return daft.ArchiveDistType.SDIST in self._first_path_by_dist_type
 
     @property
     def sdist_path(self):
-        if self.has_sdist:
-            return [
-                dist.path
-                for dist in self.dists
-                if type(dist.dist_obj) == pkginfo.SDist
-            ][0]
+        return self._first_path_by_dist_type.get(daft.ArchiveDistType.SDIST)
 
     @property
     def src_for_srepkg_wheel(self) -> Union[Path, None]:
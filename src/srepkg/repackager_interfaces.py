@@ -1,6 +1,6 @@
 import abc
 from dataclasses import dataclass
-from typing import Union
+from typing import List, Union
 
 import srepkg.repackager_data_structs as rep_ds
 
@@ -14,6 +14,15 @@ class SrepkgCommand:
     git_ref: Union[str, None] = None
     pypi_version: Union[str, None] = None
     logfile_dir: Union[str, None] = None
+    build_isolation: bool = False
+    no_build_cache: bool = False
+    wheel_from_sdist: bool = False
+    no_download_cache: bool = False
+    no_git_cache: bool = False
+    metadata_max_age: float = 0
+    index_url: Union[str, None] = None
+    extra_index_urls: Union[List[str], None] = None
+    json_api_url: Union[str, None] = None
 
 
 class SrepkgCommandInterface(abc.ABC):
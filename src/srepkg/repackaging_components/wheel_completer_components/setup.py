@@ -2,6 +2,7 @@
 Used building a wheel distribution of re-packaged package.
 """
 
+import functools
 import setuptools
 import zipfile
 from pathlib import Path
@@ -20,7 +21,7 @@ class LocalOrigWheelExaminer:
         """
         self.orig_dist_dir = Path(__file__).parent / "orig_dist"
 
-    @property
+    @functools.cached_property
     def orig_wheel_path(self) -> Path:
         """
         Absolute path of the original package wheel.
@@ -39,16 +40,31 @@ class LocalOrigWheelExaminer:
             )
         return orig_dist_wheels[0]
 
-    @property
-    def wheel_contents(self) -> list[str]:
+    @functools.cached_property
+    def _wheel_index(self) -> tuple[list[str], dict[str, bytes]]:
         """
-        List of paths of all contents in wheel, relative to wheel root.
+        Paths of all contents in wheel, and contents of its .dist-info/WHEEL
+        files, read with a single pass over the wheel's zip.
         """
         with zipfile.ZipFile(str(self.orig_wheel_path), mode="r") as whl:
             contents = whl.namelist()
-        return contents
+            wheel_info_files = {
+                path: whl.read(path)
+                for path in contents
+                if path.count("/") == 1
+                and path.split("/")[0].endswith(".dist-info")
+                and path.endswith("/WHEEL")
+            }
+        return contents, wheel_info_files
 
     @property
+    def wheel_contents(self) -> list[str]:
+        """
+        List of paths of all contents in wheel, relative to wheel root.
+        """
+        return self._wheel_index[0]
+
+    @functools.cached_property
     def dist_info_dir(self) -> str:
         """
         Path of wheel's .dist-info directory, relative to wheel root.
@@ -78,11 +94,10 @@ class LocalOrigWheelExaminer:
 
     @property
     def is_pure_python(self) -> bool | None:
-        with zipfile.ZipFile(self.orig_wheel_path, mode="r") as whl:
-            with whl.open(self.wheel_info_path) as f:
-                for line in f.read().decode("utf-8").splitlines():
-                    if line.startswith("Root-Is-Purelib:"):
-                        return line.split(": ")[1].strip().lower() == "true"
+        wheel_info = self._wheel_index[1][self.wheel_info_path]
+        for line in wheel_info.decode("utf-8").splitlines():
+            if line.startswith("Root-Is-Purelib:"):
+                return line.split(": ")[1].strip().lower() == "true"
         raise ValueError("Cannot determine if original package wheel is pure python")
 
 
@@ -7,10 +7,13 @@ from functools import singledispatch
 from pathlib import Path
 from typing import List, Type, Union, Dict, Callable
 
+import srepkg.build_artifact_cache as bac
 import srepkg.construction_dir as cdn
 import srepkg.dist_provider as opr
+import srepkg.download_cache as dc
 import srepkg.error_handling.custom_exceptions as ce
 import srepkg.error_handling.error_messages as em
+import srepkg.git_mirror_cache as gmc
 import srepkg.orig_src_preparer as osp
 import srepkg.orig_src_preparer_interfaces as osp_int
 import srepkg.remote_pkg_retriever as rpr
@@ -18,13 +21,17 @@ import srepkg.srepkg_builder as sbn
 
 import srepkg.repackager_data_structs as rep_ds
 import srepkg.repackager_interfaces as rep_int
+import srepkg.utils.package_index as pi
+import srepkg.utils.pypi_client as pc
 
 from srepkg.utils.pkg_type_identifier import PkgRefType, PkgRefIdentifier
 
 
 @singledispatch
 def create_construction_dir(
-    construction_dir_command, srepkg_name_command: str = None
+    construction_dir_command,
+    srepkg_name_command: str = None,
+    build_artifact_cache: bac.BuildArtifactCache = None,
 ) -> cdn.ConstructionDir:
     """
     Enables function overloading based on type(construction_dir_command) and
@@ -32,6 +39,7 @@ def create_construction_dir(
         construction_dir_command:
         srepkg_name_command: optional command passed when using custom name
         for a re-packaged package.
+        build_artifact_cache: optional cache of previously built wheels
     Returns:
 
     """
@@ -39,23 +47,40 @@ def create_construction_dir(
 
 
 @create_construction_dir.register(type(None))
-def _(construction_dir_command, srepkg_name_command: str = None):
-    return cdn.TempConstructionDir(srepkg_name_command=srepkg_name_command)
+def _(
+    construction_dir_command,
+    srepkg_name_command: str = None,
+    build_artifact_cache: bac.BuildArtifactCache = None,
+):
+    return cdn.TempConstructionDir(
+        srepkg_name_command=srepkg_name_command,
+        build_artifact_cache=build_artifact_cache,
+    )
 
 
 @create_construction_dir.register(str)
-def _(construction_dir_command, srepkg_name_command: str = None):
+def _(
+    construction_dir_command,
+    srepkg_name_command: str = None,
+    build_artifact_cache: bac.BuildArtifactCache = None,
+):
     return cdn.CustomConstructionDir(
         construction_dir_command=Path(construction_dir_command),
         srepkg_name_command=srepkg_name_command,
+        build_artifact_cache=build_artifact_cache,
     )
 
 
 @create_construction_dir.register(Path)
-def _(construction_dir_command, srepkg_name_command: str = None):
+def _(
+    construction_dir_command,
+    srepkg_name_command: str = None,
+    build_artifact_cache: bac.BuildArtifactCache = None,
+):
     return cdn.CustomConstructionDir(
         construction_dir_command=construction_dir_command,
         srepkg_name_command=srepkg_name_command,
+        build_artifact_cache=build_artifact_cache,
     )
 
 
@@ -71,6 +96,11 @@ class RetrieverProviderDispatch:
         construction_dir: cdn.ConstructionDir,
         version_command: str = None,
         git_ref: str = None,
+        build_artifact_cache: bac.BuildArtifactCache = None,
+        pypi_client: pc.PyPIJsonClient = None,
+        download_cache: dc.DownloadCache = None,
+        git_mirror_cache: gmc.GitMirrorCache = None,
+        wheel_from_sdist: bool = False,
     ):
         """
 
@@ -79,11 +109,29 @@ class RetrieverProviderDispatch:
             construction_dir: object with path and methods management methods for build dir
             version_command: PyPI version
             git_ref: git commit or tag
+            build_artifact_cache: optional cache of previously built dists
+            pypi_client: client used for PyPI JSON API requests
+            download_cache: optional store of previously downloaded dists
+            git_mirror_cache: optional store of mirrors of git remotes
+            wheel_from_sdist: build wheels from source via an sdist
         """
         self._pkg_ref_command = pkg_ref_command
         self._construction_dir = construction_dir
         self._version_command = version_command
         self._git_ref = git_ref
+        self._build_artifact_cache = build_artifact_cache
+        self._pypi_client = pypi_client
+        self._download_cache = download_cache
+        self._git_mirror_cache = git_mirror_cache
+        self._wheel_from_sdist = wheel_from_sdist
+
+    @property
+    def _pkg_ref_identifier(self) -> PkgRefIdentifier:
+        return PkgRefIdentifier(
+            self._pkg_ref_command,
+            pypi_client=self._pypi_client,
+            pypi_version=self._version_command,
+        )
 
     def _create_for_local_src_nongit(
         self,
@@ -91,6 +139,20 @@ class RetrieverProviderDispatch:
         provider = opr.DistProviderFromSrc(
             src_path=Path(self._pkg_ref_command),
             dest_path=self._construction_dir.orig_pkg_dists,
+            build_artifact_cache=self._build_artifact_cache,
+            wheel_from_sdist=self._wheel_from_sdist,
+        )
+        return [provider]
+
+    def _create_for_local_src_git(
+        self,
+    ) -> List[osp_int.DistProviderInterface]:
+        provider = opr.DistProviderFromLocalGitRepo(
+            repo_path=Path(self._pkg_ref_command),
+            dest_path=self._construction_dir.orig_pkg_dists,
+            git_ref=self._git_ref,
+            build_artifact_cache=self._build_artifact_cache,
+            wheel_from_sdist=self._wheel_from_sdist,
         )
         return [provider]
 
@@ -102,15 +164,22 @@ class RetrieverProviderDispatch:
         return [provider]
 
     def _create_for_git_repo(self):
-        retriever = rpr.GithubPkgRetriever(pkg_ref=self._pkg_ref_command)
+        retriever = rpr.GithubPkgRetriever(
+            pkg_ref=self._pkg_ref_command,
+            git_ref=self._git_ref,
+            git_mirror_cache=self._git_mirror_cache,
+        )
         # provider = opr.DistProviderFromSrc(
         #     src_path=retriever.copy_dest,
         #     dest_path=self._construction_dir.orig_pkg_dists)
+        # The retriever checks out git_ref (detached, so concurrent
+        # worktrees of one mirror never hold the same branch).
         provider = opr.DistProviderFromGitRepo(
-            src_path=retriever.copy_dest,
+            src_path=retriever.src_path,
             dest_path=self._construction_dir.orig_pkg_dists,
-            git_ref=self._git_ref,
             version_command=self._version_command,
+            build_artifact_cache=self._build_artifact_cache,
+            wheel_from_sdist=self._wheel_from_sdist,
         )
         return [retriever, provider]
 
@@ -119,13 +188,16 @@ class RetrieverProviderDispatch:
             pkg_ref=self._pkg_ref_command,
             copy_dest=self._construction_dir.orig_pkg_dists,
             version_command=self._version_command,
+            pkg_metadata=self._pkg_ref_identifier.pypi_metadata,
+            pypi_client=self._pypi_client,
+            download_cache=self._download_cache,
         )
         return [retriever]
 
     @property
     def _dispatch_table(self) -> Dict[PkgRefType, Callable]:
         return {
-            # PkgRefType.LOCAL_SRC_GIT: self._create_for_local_src_git,
+            PkgRefType.LOCAL_SRC_GIT: self._create_for_local_src_git,
             PkgRefType.LOCAL_SRC_NONGIT: self._create_for_local_src_nongit,
             PkgRefType.LOCAL_DIST: self._create_for_local_dist,
             PkgRefType.GIT_REPO: self._create_for_git_repo,
@@ -139,9 +211,7 @@ class RetrieverProviderDispatch:
             1 or 2 element List with instance of a DistProviderInterface
             and/or a RemotePkgRetrieverInterface
         """
-        pkg_ref_type = PkgRefIdentifier(
-            self._pkg_ref_command
-        ).identify_for_osp_dispatch()
+        pkg_ref_type = self._pkg_ref_identifier.identify_for_osp_dispatch()
 
         if pkg_ref_type == PkgRefType.UNKNOWN:
             sys.exit(em.PkgIdentifierError.PkgNotFound.msg)
@@ -149,7 +219,10 @@ class RetrieverProviderDispatch:
         if pkg_ref_type == PkgRefType.MULTIPLE_POSSIBLE:
             sys.exit(em.PkgIdentifierError.MultiplePotentialPackages.msg)
 
-        if self._git_ref and not pkg_ref_type == PkgRefType.GIT_REPO:
+        if self._git_ref and pkg_ref_type not in (
+            PkgRefType.GIT_REPO,
+            PkgRefType.LOCAL_SRC_GIT,
+        ):
             raise ce.UnusableGitCommitRef(self._git_ref)
 
         if self._version_command and not pkg_ref_type == PkgRefType.PYPI_PKG:
@@ -167,17 +240,29 @@ class OrigSrcPreparerBuilder:
         srepkg_name_command: str = None,
         version_command: str = None,
         git_ref_command: str = None,
+        build_artifact_cache: bac.BuildArtifactCache = None,
+        pypi_client: pc.PyPIJsonClient = None,
+        download_cache: dc.DownloadCache = None,
+        git_mirror_cache: gmc.GitMirrorCache = None,
+        wheel_from_sdist: bool = False,
     ):
         self._construction_dir_command = construction_dir_command
         self._orig_pkg_ref_command = orig_pkg_ref_command
         self._srepkg_name_command = srepkg_name_command
         self._version_command = version_command
         self._git_ref_command = git_ref_command
+        self._build_artifact_cache = build_artifact_cache
+        self._pypi_client = pypi_client
+        self._download_cache = download_cache
+        self._git_mirror_cache = git_mirror_cache
+        self._wheel_from_sdist = wheel_from_sdist
         self._construction_dir_dispatch = create_construction_dir
 
     def create(self):
         construction_dir = self._construction_dir_dispatch(
-            self._construction_dir_command, self._srepkg_name_command
+            self._construction_dir_command,
+            self._srepkg_name_command,
+            self._build_artifact_cache,
         )
 
         retriever_provider = RetrieverProviderDispatch(
@@ -185,6 +270,11 @@ class OrigSrcPreparerBuilder:
             construction_dir=construction_dir,
             version_command=self._version_command,
             git_ref=self._git_ref_command,
+            build_artifact_cache=self._build_artifact_cache,
+            pypi_client=self._pypi_client,
+            download_cache=self._download_cache,
+            git_mirror_cache=self._git_mirror_cache,
+            wheel_from_sdist=self._wheel_from_sdist,
         ).create()
 
         return osp.OrigSrcPreparer(
@@ -267,6 +357,30 @@ class ServiceBuilder(rep_int.ServiceBuilderInterface):
             srepkg_name_command=self._srepkg_command.srepkg_name,
             git_ref_command=self._srepkg_command.git_ref,
             version_command=self._srepkg_command.pypi_version,
+            build_artifact_cache=(
+                None
+                if self._srepkg_command.no_build_cache
+                else bac.BuildArtifactCache()
+            ),
+            pypi_client=pc.PyPIJsonClient(
+                max_age=self._srepkg_command.metadata_max_age,
+                indexes=pi.configured_indexes(
+                    index_url=self._srepkg_command.index_url,
+                    extra_index_urls=self._srepkg_command.extra_index_urls,
+                    json_api_url=self._srepkg_command.json_api_url,
+                ),
+            ),
+            download_cache=(
+                None
+                if self._srepkg_command.no_download_cache
+                else dc.DownloadCache()
+            ),
+            git_mirror_cache=(
+                None
+                if self._srepkg_command.no_git_cache
+                else gmc.GitMirrorCache()
+            ),
+            wheel_from_sdist=self._srepkg_command.wheel_from_sdist,
         )
         return osp_builder.create()
 
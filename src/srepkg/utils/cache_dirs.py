@@ -0,0 +1,137 @@
+"""
+Contains helpers for locating and managing srepkg's persistent caches.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Union
+
+CACHE_DIR_ENV_VAR = "SREPKG_CACHE_DIR"
+LAST_USED_MARKER = ".srepkg_last_used"
+
+
+def srepkg_cache_root() -> Path:
+    """
+    Root directory of all srepkg caches. Uses $SREPKG_CACHE_DIR if set,
+    otherwise $XDG_CACHE_HOME/srepkg (default ~/.cache/srepkg).
+    """
+    if os.environ.get(CACHE_DIR_ENV_VAR):
+        return Path(os.environ[CACHE_DIR_ENV_VAR])
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    if xdg_cache_home:
+        return Path(xdg_cache_home) / "srepkg"
+    return Path.home() / ".cache" / "srepkg"
+
+
+class LruCacheDir:
+    """
+    Directory whose immediate sub-directories are cache entries. Each
+    entry's last use is recorded in a marker file so the least recently
+    used entries can be evicted. Eviction keeps at most max_entries entries
+    and (if max_bytes is set) at most max_bytes of entry contents.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        max_entries: Union[int, None],
+        max_bytes: int = None,
+    ):
+        self._root = root
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def entry_path(self, key: str) -> Path:
+        return self._root / key
+
+    @property
+    def entries(self) -> List[Path]:
+        return [
+            item
+            for item in self._root.iterdir()
+            if item.is_dir() and (item / LAST_USED_MARKER).exists()
+        ]
+
+    @staticmethod
+    def _last_used(entry: Path) -> int:
+        try:
+            return (entry / LAST_USED_MARKER).stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def entry_size(entry: Path) -> int:
+        total = 0
+        for dir_path, dir_names, file_names in os.walk(entry):
+            for file_name in file_names:
+                try:
+                    total += os.lstat(
+                        os.path.join(dir_path, file_name)
+                    ).st_size
+                except FileNotFoundError:
+                    continue
+        return total
+
+    @staticmethod
+    def touch(entry: Path):
+        # Set the time explicitly; touch() uses the kernel's coarse clock,
+        # which can give entries used milliseconds apart the same mtime.
+        (entry / LAST_USED_MARKER).touch()
+        now_ns = time.time_ns()
+        os.utime(entry / LAST_USED_MARKER, ns=(now_ns, now_ns))
+
+    def staging_dir(self) -> Path:
+        """
+        Empty directory on the same filesystem as the cache, for building
+        an entry before publishing it.
+        """
+        return Path(tempfile.mkdtemp(prefix=".staging_", dir=self._root))
+
+    def publish(self, staging_dir: Path, key: str) -> Path:
+        """
+        Atomically renames a fully populated staging dir to the entry for
+        key. If another process published the same key first, its entry is
+        kept and the staging dir is discarded.
+        """
+        entry = self.entry_path(key)
+        try:
+            staging_dir.replace(entry)
+        except OSError:
+            if not entry.exists():
+                raise
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        self.touch(entry)
+        return entry
+
+    def evict(self, keep: Path = None):
+        """
+        Removes least recently used entries until no more than max_entries
+        remain and their total size is within max_bytes. The entry at keep
+        is never removed.
+        """
+        entries = sorted(self.entries, key=self._last_used, reverse=True)
+        if keep in entries:
+            entries.remove(keep)
+            entries.insert(0, keep)
+
+        num_kept = 0
+        bytes_kept = 0
+        for entry in entries:
+            size = self.entry_size(entry) if self._max_bytes else 0
+            within_limits = (
+                self._max_entries is None or num_kept < self._max_entries
+            ) and (not self._max_bytes or bytes_kept + size <= self._max_bytes)
+            if within_limits or entry == keep:
+                num_kept += 1
+                bytes_kept += size
+            else:
+                shutil.rmtree(entry, ignore_errors=True)
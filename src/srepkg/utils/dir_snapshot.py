@@ -0,0 +1,91 @@
+"""
+Contains class for detecting which files in a directory changed between two
+points in time without reading the contents of unchanged files.
+"""
+
+import hashlib
+import stat
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+# Files modified this close to (or after) the time a snapshot is taken are
+# "racy": on filesystems with coarse timestamps, a later rewrite of the same
+# size can leave their stat info unchanged. Only these files get hashed.
+# Two seconds covers the coarsest common granularity (FAT).
+DEFAULT_RACY_WINDOW_NS = 2_000_000_000
+
+
+class StatKey(NamedTuple):
+    inode: int
+    size: int
+    mtime_ns: int
+
+
+class DirSnapshot:
+    """
+    Records (inode, size, mtime_ns) of each file directly under a directory.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        racy_window_ns: int = DEFAULT_RACY_WINDOW_NS,
+    ):
+        self._directory = directory
+        self._taken_at_ns = time.time_ns()
+        self._racy_window_ns = racy_window_ns
+        self._entries = self._scan()
+        self._digests = {
+            path: self._hash_file(path)
+            for path, stat_key in self._entries.items()
+            if self._is_racy(stat_key)
+        }
+
+    def _scan(self) -> Dict[Path, StatKey]:
+        entries = {}
+        for item in self._directory.iterdir():
+            try:
+                stat_result = item.stat()
+            except FileNotFoundError:
+                continue
+            if stat.S_ISDIR(stat_result.st_mode):
+                continue
+            entries[item] = StatKey(
+                inode=stat_result.st_ino,
+                size=stat_result.st_size,
+                mtime_ns=stat_result.st_mtime_ns,
+            )
+        return entries
+
+    def _is_racy(self, stat_key: StatKey) -> bool:
+        return stat_key.mtime_ns >= self._taken_at_ns - self._racy_window_ns
+
+    @staticmethod
+    def _hash_file(file_path: Path) -> str:
+        hash_sha256 = hashlib.sha256()
+        with file_path.open(mode="rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hash_sha256.update(chunk)
+        return hash_sha256.hexdigest()
+
+    @property
+    def files(self) -> List[Path]:
+        return list(self._entries)
+
+    def _is_changed(self, path: Path, stat_key: StatKey) -> bool:
+        if self._entries.get(path) != stat_key:
+            return True
+        if path in self._digests:
+            return self._hash_file(path) != self._digests[path]
+        return False
+
+    def changed_files(self) -> List[Path]:
+        """
+        Files that were added or modified since the snapshot was taken.
+        """
+        return [
+            path
+            for path, stat_key in self._scan().items()
+            if self._is_changed(path, stat_key)
+        ]
@@ -1,8 +1,20 @@
 import subprocess
 import zipfile
 import tarfile
+from email.parser import HeaderParser
 from enum import Enum, auto
-from pathlib import Path
+from pathlib import Path, PurePosixPath
+from typing import Callable, Dict, NamedTuple, Tuple, Union
+
+from packaging.utils import (
+    InvalidSdistFilename,
+    InvalidWheelFilename,
+    canonicalize_name,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
+from packaging.version import Version
+
 import srepkg.error_handling.custom_exceptions as ce
 import srepkg.utils.logged_err_detecting_subprocess as leds
 from srepkg.error_handling.custom_exceptions import UnsupportedCompressionType
@@ -58,6 +70,136 @@ class ArchiveIdentifier:
         return self.dist_file_table[self.id_file_type(possible_archive)]
 
 
+class DistMetadata(NamedTuple):
+    dist_type: ArchiveDistType
+    name: str
+    version: str
+
+
+class DistMetadataReader:
+    """
+    Reads the dist type, name and version of an original package dist. The
+    archive format comes from ArchiveIdentifier. Name and version are taken
+    from the file name if it is normalized per PEP 427 (wheels) or PEP 625
+    (.tar.gz sdists); otherwise the archive is opened and read up to its
+    first top-level PKG-INFO (sdists) or .dist-info/METADATA (wheels).
+    """
+
+    def __init__(self, archive_identifier: ArchiveIdentifier = None):
+        if archive_identifier is None:
+            archive_identifier = ArchiveIdentifier()
+        self._archive_identifier = archive_identifier
+
+    @staticmethod
+    def _is_normalized(
+        name: str, version: str, parsed_version: Version
+    ) -> bool:
+        normalized_name = canonicalize_name(name).replace("-", "_")
+        return name == normalized_name and version == str(parsed_version)
+
+    def _from_filename(
+        self, filename: str, file_type: ArchiveFileType
+    ) -> Union[Tuple[str, str], None]:
+        try:
+            if file_type == ArchiveFileType.WHL:
+                parsed_version = parse_wheel_filename(filename)[1]
+                name, version = filename.split("-")[:2]
+            elif file_type == ArchiveFileType.TAR_GZ:
+                parsed_version = parse_sdist_filename(filename)[1]
+                name, _, version = filename[: -len(".tar.gz")].rpartition("-")
+            else:
+                return None
+        except (InvalidWheelFilename, InvalidSdistFilename):
+            return None
+        if self._is_normalized(name, version, parsed_version):
+            return name, version
+        return None
+
+    @staticmethod
+    def _is_top_level_pkg_info(member_name: str) -> bool:
+        parts = PurePosixPath(member_name).parts
+        return len(parts) == 2 and parts[1] == "PKG-INFO"
+
+    @staticmethod
+    def _is_wheel_metadata(member_name: str) -> bool:
+        parts = PurePosixPath(member_name).parts
+        return (
+            len(parts) == 2
+            and parts[0].endswith(".dist-info")
+            and parts[1] == "METADATA"
+        )
+
+    def _read_tar_gz(self, dist_path: Path) -> Union[bytes, None]:
+        # Stream mode reads members in archive order, so decompression
+        # stops at PKG-INFO instead of covering the whole sdist.
+        with tarfile.open(dist_path, mode="r|gz") as tf:
+            for member in tf:
+                if member.isfile() and self._is_top_level_pkg_info(
+                    member.name
+                ):
+                    return tf.extractfile(member).read()
+        return None
+
+    @staticmethod
+    def _read_zip_member(
+        dist_path: Path, is_metadata_file: Callable[[str], bool]
+    ) -> Union[bytes, None]:
+        with zipfile.ZipFile(dist_path) as zf:
+            for member_name in zf.namelist():
+                if is_metadata_file(member_name):
+                    return zf.read(member_name)
+        return None
+
+    @property
+    def _metadata_readers(
+        self,
+    ) -> Dict[ArchiveFileType, Callable[[Path], Union[bytes, None]]]:
+        return {
+            ArchiveFileType.TAR_GZ: self._read_tar_gz,
+            ArchiveFileType.ZIP: lambda dist_path: self._read_zip_member(
+                dist_path, self._is_top_level_pkg_info
+            ),
+            ArchiveFileType.WHL: lambda dist_path: self._read_zip_member(
+                dist_path, self._is_wheel_metadata
+            ),
+        }
+
+    def _from_archive(
+        self, dist_path: Path, file_type: ArchiveFileType
+    ) -> Union[Tuple[str, str], None]:
+        try:
+            metadata_bytes = self._metadata_readers[file_type](dist_path)
+        except (tarfile.TarError, zipfile.BadZipFile, EOFError, OSError):
+            return None
+        if metadata_bytes is None:
+            return None
+        metadata = HeaderParser().parsestr(
+            metadata_bytes.decode("utf-8", errors="replace")
+        )
+        if not metadata["Name"] or not metadata["Version"]:
+            return None
+        return metadata["Name"], metadata["Version"]
+
+    def read(self, dist_path: Path) -> Union[DistMetadata, None]:
+        """
+        Returns None if dist_path is not a wheel or sdist, or if its name
+        and version can't be found.
+        """
+        if not dist_path.is_file():
+            return None
+        file_type = self._archive_identifier.id_file_type(dist_path)
+        dist_type = self._archive_identifier.dist_file_table[file_type]
+        if dist_type == ArchiveDistType.UNKNOWN:
+            return None
+
+        name_and_version = self._from_filename(
+            dist_path.name, file_type
+        ) or self._from_archive(dist_path, file_type)
+        if name_and_version is None:
+            return None
+        return DistMetadata(dist_type, *name_and_version)
+
+
 class CompressedFileExtractor:
 
     @staticmethod
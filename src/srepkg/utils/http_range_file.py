@@ -0,0 +1,128 @@
+"""
+Contains a read-only, seekable file object backed by HTTP Range requests,
+so a remote zip archive (e.g. a wheel) can be opened with zipfile.ZipFile
+while only the parts that are actually read get downloaded.
+"""
+
+import io
+import logging
+import re
+from typing import List, Tuple
+
+import requests
+
+import srepkg.error_handling.custom_exceptions as ce
+import srepkg.utils.pypi_client as pc
+
+# Smallest range requested at a time. The initial request at the end of the
+# file is usually enough for a wheel's whole central directory.
+DEFAULT_MIN_FETCH = 64 * 1024
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+)")
+
+
+class HttpRangeFile(io.RawIOBase):
+    """
+    File-like view of the resource at url. Fetched byte ranges are kept, so
+    each part of the file is requested at most once.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        session: requests.Session = None,
+        min_fetch: int = DEFAULT_MIN_FETCH,
+    ):
+        super().__init__()
+        self._url = url
+        self._session = session if session is not None else pc.http_session()
+        self._min_fetch = min_fetch
+        self._chunks: List[Tuple[int, bytes]] = []
+        self._position = 0
+        self.num_requests = 0
+        self._length = self._fetch_tail()
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @property
+    def bytes_fetched(self) -> int:
+        return sum(len(data) for start, data in self._chunks)
+
+    def _get(self, range_header: str) -> Tuple[int, int, bytes]:
+        """
+        Returns (start, total length, data) of the requested range.
+        """
+        self.num_requests += 1
+        # Streamed, so the body of a server that ignores Range (and sends
+        # the whole file with a 200) is never downloaded.
+        response = self._session.get(
+            self._url, headers={"Range": range_header}, stream=True
+        )
+        with response:
+            content_range = _CONTENT_RANGE.match(
+                response.headers.get("Content-Range", "")
+            )
+            if response.status_code != 206 or not content_range:
+                raise ce.RangeRequestsNotSupported(self._url)
+            start, end, length = (int(item) for item in content_range.groups())
+            return start, length, response.content
+
+    def _fetch_tail(self) -> int:
+        start, length, data = self._get(f"bytes=-{self._min_fetch}")
+        self._chunks.append((start, data))
+        return length
+
+    def _fetch(self, start: int, end: int):
+        # end is exclusive
+        end = min(max(end, start + self._min_fetch), self._length)
+        logging.getLogger(__name__).debug(
+            f"Fetching bytes {start}-{end - 1} of {self._url}"
+        )
+        data_start, _, data = self._get(f"bytes={start}-{end - 1}")
+        self._chunks.append((data_start, data))
+
+    def _cached(self, start: int, end: int):
+        for chunk_start, data in self._chunks:
+            if chunk_start <= start and end <= chunk_start + len(data):
+                offset = start - chunk_start
+                return data[offset : offset + end - start]
+        return None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        elif whence == io.SEEK_END:
+            self._position = self._length + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        start = self._position
+        end = min(start + len(buffer), self._length)
+        if start >= end:
+            return 0
+        data = self._cached(start, end)
+        if data is None:
+            self._fetch(start, end)
+            data = self._cached(start, end)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
@@ -45,6 +45,11 @@ class LoggedErrDetectingSubprocess:
         self._cwd = cwd
         self._default_exception = default_exception
         self._exception_table = exception_table
+        self._std_out_lines = []
+
+    @property
+    def std_out_lines(self) -> List[str]:
+        return self._std_out_lines
 
     def run(self):
         sub_proc = subprocess.run(
@@ -57,8 +62,9 @@ class LoggedErrDetectingSubprocess:
 
         self._std_out_buffer.seek(0)
         for line in self._std_out_buffer:
+            self._std_out_lines.append(line.decode("utf-8").strip())
             logging.getLogger(self._gen_logger_name).info(
-                line.decode("utf-8").strip()
+                self._std_out_lines[-1]
             )
 
         self._std_err_buffer.seek(0)
@@ -0,0 +1,274 @@
+"""
+Contains classes and functions for locating the package indexes (PyPI or
+mirrors of it) that srepkg fetches metadata and dists from, and for
+reading an index's Simple API project pages.
+"""
+
+import configparser
+import dataclasses
+import json
+import os
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+from urllib.parse import urldefrag, urljoin, urlsplit
+
+from packaging.utils import (
+    InvalidSdistFilename,
+    InvalidWheelFilename,
+    canonicalize_name,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
+from packaging.version import Version
+
+DEFAULT_INDEX_URL = "https://pypi.org/simple"
+INDEX_URL_ENV_VAR = "SREPKG_INDEX_URL"
+EXTRA_INDEX_URL_ENV_VAR = "SREPKG_EXTRA_INDEX_URL"
+JSON_API_URL_ENV_VAR = "SREPKG_JSON_API_URL"
+CONFIG_FILE_ENV_VAR = "SREPKG_CONFIG_FILE"
+CONFIG_SECTION = "index"
+
+SIMPLE_JSON_CONTENT_TYPE = "application/vnd.pypi.simple.v1+json"
+SIMPLE_ACCEPT = f"{SIMPLE_JSON_CONTENT_TYPE}, text/html;q=0.1"
+
+_HASH_FRAGMENT = re.compile(r"sha256=([0-9a-fA-F]{64})")
+
+
+def srepkg_config_file() -> Path:
+    """
+    Path of srepkg's config file. Uses $SREPKG_CONFIG_FILE if set,
+    otherwise $XDG_CONFIG_HOME/srepkg/srepkg.ini (default
+    ~/.config/srepkg/srepkg.ini).
+    """
+    if os.environ.get(CONFIG_FILE_ENV_VAR):
+        return Path(os.environ[CONFIG_FILE_ENV_VAR])
+    xdg_config_home = os.environ.get("XDG_CONFIG_HOME")
+    if xdg_config_home:
+        return Path(xdg_config_home) / "srepkg" / "srepkg.ini"
+    return Path.home() / ".config" / "srepkg" / "srepkg.ini"
+
+
+@dataclasses.dataclass(frozen=True)
+class PackageIndex:
+    """
+    JSON API and Simple API base URLs of one package index, e.g.
+    https://pypi.org/pypi and https://pypi.org/simple. Either may be None
+    if the index doesn't serve that API. alt_simple_url is tried for
+    projects simple_url has no page for.
+    """
+
+    json_url: Union[str, None]
+    simple_url: Union[str, None]
+    alt_simple_url: Union[str, None] = None
+
+    @classmethod
+    def from_url(cls, url: str) -> "PackageIndex":
+        """
+        Index at url, which can be the Simple API URL (as given to pip's
+        --index-url, e.g. https://mirror/simple or devpi's
+        https://mirror/root/pypi/+simple), the JSON API URL (e.g.
+        https://mirror/pypi), or the root they both live under.
+        """
+        url = url.rstrip("/")
+        root, _, last_part = url.rpartition("/")
+        if last_part in ("simple", "pypi"):
+            return cls(json_url=f"{root}/pypi", simple_url=f"{root}/simple")
+        # Either the root of the index or a Simple API URL by another name,
+        # so try it as both. A bare host is only ever a root.
+        return cls(
+            json_url=f"{url}/pypi",
+            simple_url=f"{url}/simple",
+            alt_simple_url=url if urlsplit(url).path else None,
+        )
+
+    def project_json_url(self, project: str) -> str:
+        return f"{self.json_url}/{project}/json"
+
+    def version_json_url(self, project: str, version: str) -> str:
+        return f"{self.json_url}/{project}/{version}/json"
+
+    def simple_project_urls(self, project: str) -> List[str]:
+        return [
+            f"{simple_url}/{canonicalize_name(project)}/"
+            for simple_url in (self.simple_url, self.alt_simple_url)
+            if simple_url
+        ]
+
+
+def _config_values() -> Dict[str, str]:
+    config = configparser.ConfigParser()
+    config.read(srepkg_config_file())
+    if not config.has_section(CONFIG_SECTION):
+        return {}
+    return dict(config[CONFIG_SECTION])
+
+
+def configured_indexes(
+    index_url: str = None,
+    extra_index_urls: List[str] = None,
+    json_api_url: str = None,
+) -> List[PackageIndex]:
+    """
+    Indexes to query, in order: the main index, then the extra (fallback)
+    indexes. Each setting is taken from the first of: the argument, its
+    environment variable, the [index] section of srepkg_config_file(). The
+    main index defaults to PyPI.
+
+    Args:
+        index_url: main index (see PackageIndex.from_url)
+        extra_index_urls: fallback indexes, tried in order if a project is
+        not found on (or can't be fetched from) the indexes before them
+        json_api_url: JSON API URL of the main index, if it isn't at the
+        location derived from index_url
+    """
+    config_values = _config_values()
+
+    index_url = (
+        index_url
+        or os.environ.get(INDEX_URL_ENV_VAR)
+        or config_values.get("index_url")
+        or DEFAULT_INDEX_URL
+    )
+    json_api_url = (
+        json_api_url
+        or os.environ.get(JSON_API_URL_ENV_VAR)
+        or config_values.get("json_api_url")
+    )
+    if extra_index_urls is None:
+        extra_index_urls = os.environ.get(
+            EXTRA_INDEX_URL_ENV_VAR, config_values.get("extra_index_urls", "")
+        ).split()
+
+    main_index = PackageIndex.from_url(index_url)
+    if json_api_url:
+        main_index = dataclasses.replace(
+            main_index, json_url=json_api_url.rstrip("/")
+        )
+
+    indexes = [main_index]
+    for url in extra_index_urls:
+        index = PackageIndex.from_url(url)
+        if index not in indexes:
+            indexes.append(index)
+    return indexes
+
+
+class _SimpleHtmlParser(HTMLParser):
+    """
+    Collects the anchors of a PEP 503 project page.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.anchors: List[Dict[str, Union[str, None]]] = []
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, str]]):
+        if tag == "a":
+            self.anchors.append(dict(attrs))
+
+
+def _file_from_html_anchor(
+    anchor: Dict[str, Union[str, None]], page_url: str
+) -> Dict[str, Any]:
+    url, fragment = urldefrag(urljoin(page_url, anchor["href"]))
+    hash_match = _HASH_FRAGMENT.fullmatch(fragment)
+    return {
+        "filename": url.rsplit("/", 1)[-1],
+        "url": url,
+        "hashes": (
+            {"sha256": hash_match.group(1).lower()} if hash_match else {}
+        ),
+        "requires-python": anchor.get("data-requires-python"),
+        "yanked": "data-yanked" in anchor,
+    }
+
+
+def _file_from_json_entry(
+    entry: Dict[str, Any], page_url: str
+) -> Dict[str, Any]:
+    return dict(entry, url=urljoin(page_url, entry["url"]))
+
+
+def _release_file(simple_file: Dict[str, Any]) -> Union[Dict[str, Any], None]:
+    filename = simple_file["filename"]
+    try:
+        if filename.endswith(".whl"):
+            version = parse_wheel_filename(filename)[1]
+            packagetype = "bdist_wheel"
+        else:
+            version = parse_sdist_filename(filename)[1]
+            packagetype = "sdist"
+    except (InvalidWheelFilename, InvalidSdistFilename):
+        return None
+
+    release_file = {
+        "filename": filename,
+        "url": simple_file["url"],
+        "packagetype": packagetype,
+        "version": str(version),
+        "digests": {
+            name: value
+            for name, value in simple_file.get("hashes", {}).items()
+            if name == "sha256"
+        },
+        "requires_python": simple_file.get("requires-python"),
+        "yanked": bool(simple_file.get("yanked")),
+    }
+    if "size" in simple_file:
+        release_file["size"] = simple_file["size"]
+    return release_file
+
+
+def _latest_version(releases: Dict[str, List[Dict[str, Any]]]) -> str:
+    versions = [
+        Version(version)
+        for version, files in releases.items()
+        if not all(release_file["yanked"] for release_file in files)
+    ] or [Version(version) for version in releases]
+    final_versions = [
+        version for version in versions if not version.is_prerelease
+    ]
+    return str(max(final_versions or versions))
+
+
+def simple_page_document(
+    project: str, content_type: str, body: str, page_url: str
+) -> Union[Dict[str, Any], None]:
+    """
+    Converts a Simple API project page (PEP 691 JSON or PEP 503 HTML) to
+    the layout of a PyPI JSON API project document: "info" (name and
+    latest version), "releases" (files by version) and "urls" (files of
+    the latest version). Returns None if the page lists no usable files.
+    """
+    if content_type.split(";")[0].strip() == SIMPLE_JSON_CONTENT_TYPE:
+        simple_files = [
+            _file_from_json_entry(entry, page_url)
+            for entry in json.loads(body)["files"]
+        ]
+    else:
+        parser = _SimpleHtmlParser()
+        parser.feed(body)
+        simple_files = [
+            _file_from_html_anchor(anchor, page_url)
+            for anchor in parser.anchors
+            if anchor.get("href")
+        ]
+
+    releases: Dict[str, List[Dict[str, Any]]] = {}
+    for simple_file in simple_files:
+        release_file = _release_file(simple_file)
+        if release_file is not None:
+            releases.setdefault(release_file["version"], []).append(
+                release_file
+            )
+    if not releases:
+        return None
+
+    latest_version = _latest_version(releases)
+    return {
+        "info": {"name": project, "version": latest_version},
+        "releases": releases,
+        "urls": releases[latest_version],
+    }
@@ -1,16 +1,20 @@
 import logging
-import requests
+import re
 import subprocess
 import sys
 from enum import Enum, auto
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, Union
 from urllib.parse import urlparse
 import srepkg.error_handling.error_messages as em
 import srepkg.utils.dist_archive_file_tools as cdi
 import srepkg.utils.logged_err_detecting_subprocess as leds
+import srepkg.utils.package_index as pi
+import srepkg.utils.pypi_client as pc
 
 
 class PkgRefType(Enum):
+    LOCAL_SRC_GIT = auto()
     LOCAL_SRC_NONGIT = auto()
     LOCAL_WHEEL = auto()
     LOCAL_SDIST = auto()
@@ -21,11 +25,56 @@ class PkgRefType(Enum):
     MULTIPLE_POSSIBLE = auto()
 
 
+# PEP 508 project name. Refs that don't match can't be on PyPI, so there is
+# no point in asking.
+_VALID_PROJECT_NAME = re.compile(
+    r"^([A-Z0-9]|[A-Z0-9][A-Z0-9._-]*[A-Z0-9])$", re.IGNORECASE
+)
+
+
 class PkgRefIdentifier:
-    def __init__(self, orig_pkg_ref: str):
+    # Results of identify(), keyed by identifier class, ref string, PyPI
+    # version and package indexes (everything the result depends on), so a
+    # ref is only classified once per process.
+    _identified_refs: Dict[
+        Tuple[type, str, Union[str, None], Tuple[pi.PackageIndex, ...]],
+        PkgRefType,
+    ] = {}
+
+    def __init__(
+        self,
+        orig_pkg_ref: str,
+        pypi_client: pc.PyPIJsonClient = None,
+        pypi_version: str = None,
+    ):
         self._orig_pkg_ref = orig_pkg_ref
+        self._pypi_client = pypi_client
+        self._pypi_version = pypi_version
+        self._local_git_repo = None
+
+    @property
+    def pypi_client(self) -> pc.PyPIJsonClient:
+        if self._pypi_client is None:
+            self._pypi_client = pc.PyPIJsonClient()
+        return self._pypi_client
+
+    @classmethod
+    def clear_cache(cls):
+        cls._identified_refs.clear()
+
+    def _has_dot_git(self):
+        return (Path(self._orig_pkg_ref) / ".git").exists()
 
     def is_local_git_repo(self):
+        if self._local_git_repo is None:
+            self._local_git_repo = (
+                Path(self._orig_pkg_ref).is_dir()
+                and self._has_dot_git()
+                and self._git_status_succeeds()
+            )
+        return self._local_git_repo
+
+    def _git_status_succeeds(self):
         # choose to NOT wrape this in LoggedErrorDetectingSubprocess b/c we
         # are OK if subprocess return code != 0
         logging.getLogger(__name__).debug(
@@ -44,17 +93,7 @@ class PkgRefIdentifier:
         for line in p.stderr.strip().split("\n"):
             logging.getLogger(__name__).debug(line)
 
-        return (
-            (p.returncode == 0)
-            and Path(self._orig_pkg_ref).is_dir()
-            and (
-                ".git"
-                in [
-                    item.name
-                    for item in list(Path(self._orig_pkg_ref).iterdir())
-                ]
-            )
-        )
+        return p.returncode == 0
 
     def is_local_src_non_git(self):
         return Path(self._orig_pkg_ref).is_dir() and (
@@ -82,11 +121,31 @@ class PkgRefIdentifier:
             and (Path(self._orig_pkg_ref).suffix != ".whl")
         )
 
+    @property
+    def pypi_metadata(self) -> Union[Dict[str, Any], None]:
+        """
+        PyPI JSON document of the ref (fetched once per run and shared with
+        PyPIPkgRetriever), or None if the ref is not a PyPI project. If a
+        version was provided, this is the document of just that release.
+        """
+        if not _VALID_PROJECT_NAME.match(self._orig_pkg_ref):
+            return None
+        if self._pypi_version is not None:
+            return self.pypi_client.release_json(
+                self._orig_pkg_ref, self._pypi_version
+            )
+        return self.pypi_client.project_json(self._orig_pkg_ref)
+
     def is_pypi_pkg(self):
-        response = requests.get(
-            "https://pypi.python.org/pypi/{}/json".format(self._orig_pkg_ref)
+        if self.pypi_metadata is not None:
+            return True
+        # A missing release doesn't mean a missing project. Only in that
+        # case is the (possibly large) project document needed.
+        return (
+            self._pypi_version is not None
+            and _VALID_PROJECT_NAME.match(self._orig_pkg_ref) is not None
+            and self.pypi_client.project_json(self._orig_pkg_ref) is not None
         )
-        return response.status_code == 200
 
     def is_github_repo(self):
         url_parsed_ref = urlparse(self._orig_pkg_ref)
@@ -97,17 +156,49 @@ class PkgRefIdentifier:
     def is_git_repo(self):
         return self.is_local_git_repo() or self.is_github_repo()
 
-    def _check_all_types(self):
-        return {
-            # PkgRefType.LOCAL_SRC_GIT: self.is_local_git_repo(),
-            PkgRefType.LOCAL_SRC_NONGIT: self.is_local_src_non_git(),
-            PkgRefType.LOCAL_SDIST: self.is_local_sdist(),
-            PkgRefType.LOCAL_WHEEL: self.is_local_wheel(),
-            PkgRefType.PYPI_PKG: self.is_pypi_pkg(),
-            PkgRefType.GIT_REPO: self.is_git_repo(),
-        }
+    @property
+    def _check_stages(self) -> List[Dict[PkgRefType, Callable[[], bool]]]:
+        """
+        Type checks grouped from cheapest to most expensive. A ref that
+        exists on the local filesystem never reaches the URL or network
+        checks.
+        """
+        if Path(self._orig_pkg_ref).exists():
+            return [
+                {
+                    PkgRefType.LOCAL_SRC_GIT: self.is_local_git_repo,
+                    PkgRefType.LOCAL_SRC_NONGIT: self.is_local_src_non_git,
+                    PkgRefType.LOCAL_SDIST: self.is_local_sdist,
+                    PkgRefType.LOCAL_WHEEL: self.is_local_wheel,
+                }
+            ]
+        return [
+            {PkgRefType.GIT_REPO: self.is_github_repo},
+            {PkgRefType.PYPI_PKG: self.is_pypi_pkg},
+        ]
+
+    def _check_all_types(self) -> Dict[PkgRefType, bool]:
+        results = {}
+        for stage in self._check_stages:
+            results.update(
+                {ref_type: check() for ref_type, check in stage.items()}
+            )
+            if any(results.values()):
+                break
+        return results
 
     def identify(self) -> PkgRefType:
+        cache_key = (
+            type(self),
+            self._orig_pkg_ref,
+            self._pypi_version,
+            tuple(self.pypi_client.indexes),
+        )
+        if cache_key not in self._identified_refs:
+            self._identified_refs[cache_key] = self._identify()
+        return self._identified_refs[cache_key]
+
+    def _identify(self) -> PkgRefType:
         pkg_check_results = self._check_all_types()
         matching_items = [
             item[0] for item in pkg_check_results.items() if item[1] is True
@@ -0,0 +1,316 @@
+"""
+Contains a shared, connection-pooled HTTP session and a client for the PyPI
+JSON API (and the Simple API of indexes that don't serve JSON) that fetches
+each project document at most once per run, and revalidates documents
+cached on disk by earlier runs.
+"""
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import srepkg.utils.cache_dirs as cd
+import srepkg.utils.package_index as pi
+
+# Enough pooled connections per host for concurrent downloads.
+HTTP_POOL_MAXSIZE = 10
+# By default, cached documents are always revalidated with PyPI.
+DEFAULT_METADATA_MAX_AGE = 0
+
+_session: Union[requests.Session, None] = None
+_session_lock = threading.Lock()
+
+
+def http_session() -> requests.Session:
+    """
+    Session shared by every HTTP request srepkg makes, so connections (and
+    TLS handshakes) to PyPI and its file host are reused via keep-alive.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_MAXSIZE,
+                pool_maxsize=HTTP_POOL_MAXSIZE,
+            )
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+class MetadataDiskCache:
+    """
+    JSON documents saved across runs, one file per URL, along with the
+    ETag / Last-Modified headers needed to revalidate them.
+    """
+
+    def __init__(self, cache_dir: Path = None):
+        if cache_dir is None:
+            cache_dir = cd.srepkg_cache_root() / "pypi_json"
+        self._cache_dir = cache_dir
+
+    @property
+    def cache_dir(self) -> Path:
+        return self._cache_dir
+
+    def entry_path(self, url: str) -> Path:
+        url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        return self._cache_dir / f"{url_hash}.json"
+
+    def load(self, url: str) -> Union[Dict[str, Any], None]:
+        try:
+            with self.entry_path(url).open(mode="r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def save(self, entry: Dict[str, Any]):
+        # Write to a temp file and rename, so concurrent runs never read a
+        # partially written entry.
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode="w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.entry_path(entry["url"]))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+
+class PyPIJsonClient:
+    """
+    Fetches project documents from the PyPI JSON API. Documents (and
+    projects that don't exist) are remembered for the rest of the process,
+    so identification and retrieval of a package share one request.
+
+    Indexes are queried in order (default: pi.configured_indexes()) until
+    one has the project. An index without a JSON API is read through its
+    Simple API instead, and an index that can't be reached is skipped.
+
+    Documents are also kept in a MetadataDiskCache. A cached document
+    younger than max_age seconds is used without contacting PyPI; an older
+    one is revalidated with If-None-Match / If-Modified-Since and only
+    downloaded again if it changed.
+    """
+
+    _documents: Dict[str, Union[Dict[str, Any], None]] = {}
+
+    def __init__(
+        self,
+        session: requests.Session = None,
+        disk_cache: MetadataDiskCache = None,
+        max_age: float = DEFAULT_METADATA_MAX_AGE,
+        indexes: List[pi.PackageIndex] = None,
+    ):
+        self._session = session
+        self._disk_cache = (
+            disk_cache if disk_cache is not None else MetadataDiskCache()
+        )
+        self._max_age = max_age
+        self._indexes = (
+            indexes if indexes is not None else pi.configured_indexes()
+        )
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            self._session = http_session()
+        return self._session
+
+    @classmethod
+    def clear_cache(cls):
+        cls._documents.clear()
+
+    @property
+    def disk_cache(self) -> MetadataDiskCache:
+        return self._disk_cache
+
+    @property
+    def indexes(self) -> List[pi.PackageIndex]:
+        return self._indexes
+
+    @staticmethod
+    def _validators(entry: Dict[str, Any]) -> Dict[str, str]:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _fetch(
+        self,
+        url: str,
+        accept: str = None,
+        parse: Callable[[requests.Response], Any] = None,
+    ) -> Union[Dict[str, Any], None]:
+        entry = self._disk_cache.load(url)
+
+        if entry and time.time() - entry["fetched_at"] < self._max_age:
+            logging.getLogger(__name__).debug(f"Using cached {url}")
+            return entry["document"]
+
+        logging.getLogger(__name__).debug(f"Fetching {url}")
+        headers = self._validators(entry) if entry else {}
+        if accept:
+            headers["Accept"] = accept
+        response = self.session.get(url, headers=headers)
+
+        if response.status_code == 304 and entry:
+            logging.getLogger(__name__).debug(f"Revalidated cached {url}")
+            entry["fetched_at"] = time.time()
+            self._disk_cache.save(entry)
+            return entry["document"]
+
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        document = parse(response) if parse else response.json()
+        self._disk_cache.save(
+            {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "document": document,
+            }
+        )
+        return document
+
+    def _document(
+        self,
+        url: str,
+        accept: str = None,
+        parse: Callable[[requests.Response], Any] = None,
+    ) -> Union[Dict[str, Any], None]:
+        if url not in self._documents:
+            self._documents[url] = self._fetch(url, accept, parse)
+        return self._documents[url]
+
+    def _simple_document(
+        self, index: pi.PackageIndex, project: str
+    ) -> Union[Dict[str, Any], None]:
+        for url in index.simple_project_urls(project):
+            document = self._document(
+                url,
+                accept=pi.SIMPLE_ACCEPT,
+                parse=lambda response: pi.simple_page_document(
+                    project,
+                    content_type=response.headers.get("Content-Type", ""),
+                    body=response.text,
+                    page_url=response.url,
+                ),
+            )
+            if document is not None:
+                return document
+        return None
+
+    def _index_project_json(
+        self, index: pi.PackageIndex, project: str
+    ) -> Union[Dict[str, Any], None]:
+        document = None
+        if index.json_url:
+            document = self._document(index.project_json_url(project))
+        if document is None and index.simple_url:
+            document = self._simple_document(index, project)
+        return document
+
+    def _index_version_json(
+        self, index: pi.PackageIndex, project: str, version: str
+    ) -> Union[Dict[str, Any], None]:
+        if not index.json_url:
+            return None
+        return self._document(index.version_json_url(project, version))
+
+    def _index_release_json(
+        self, index: pi.PackageIndex, project: str, version: str
+    ) -> Union[Dict[str, Any], None]:
+        version_document = self._index_version_json(index, project, version)
+        if version_document is not None:
+            return version_document
+        project_document = self._index_project_json(index, project)
+        if project_document is not None and version in project_document.get(
+            "releases", {}
+        ):
+            return project_document
+        return None
+
+    @staticmethod
+    def _first_found(
+        lookups: Iterable[Callable[[], Union[Dict[str, Any], None]]],
+    ) -> Union[Dict[str, Any], None]:
+        # Unreachable indexes are skipped. If none could be reached, there
+        # is no answer, so the last error is raised.
+        error = None
+        answered = False
+        for lookup in lookups:
+            try:
+                document = lookup()
+            except requests.RequestException as e:
+                logging.getLogger(__name__).warning(
+                    f"Package index request failed ({e}), trying next index"
+                )
+                error = e
+                continue
+            if document is not None:
+                return document
+            answered = True
+        if error is not None and not answered:
+            raise error
+        return None
+
+    def project_json(self, project: str) -> Union[Dict[str, Any], None]:
+        """
+        JSON document of project from the first index that has it, or None
+        if no index has such a project.
+        """
+        return self._first_found(
+            functools.partial(self._index_project_json, index, project)
+            for index in self._indexes
+        )
+
+    def version_json(
+        self, project: str, version: str
+    ) -> Union[Dict[str, Any], None]:
+        """
+        JSON document of one release of project ("urls" lists only that
+        release's files), or None if no index serves it.
+        """
+        return self._first_found(
+            functools.partial(
+                self._index_version_json, index, project, version
+            )
+            for index in self._indexes
+        )
+
+    def release_json(
+        self, project: str, version: str
+    ) -> Union[Dict[str, Any], None]:
+        """
+        Document listing the files of one release of project from the first
+        index that has it, or None if the release doesn't exist. Uses the
+        per-version endpoint (which doesn't list the files of every other
+        release), and falls back to the project document (which lists every
+        release under "releases") for indexes and proxies that don't serve
+        it.
+        """
+        return self._first_found(
+            functools.partial(
+                self._index_release_json, index, project, version
+            )
+            for index in self._indexes
+        )
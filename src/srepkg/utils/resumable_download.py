@@ -0,0 +1,189 @@
+"""
+Contains class for downloading a file over HTTP so that an interrupted
+download continues from where it stopped instead of starting over.
+"""
+
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Union
+
+import requests
+
+import srepkg.error_handling.custom_exceptions as ce
+import srepkg.utils.pypi_client as pc
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Attempts per download. Each attempt after the first resumes from the
+# bytes already saved.
+DOWNLOAD_ATTEMPTS = 3
+
+_CONTENT_RANGE_START = re.compile(r"bytes (\d+)-")
+
+
+class ResumableDownload:
+    """
+    Streams url to dest_path via dest_path.part. A small journal
+    (dest_path.part.json) records which resource the partial file belongs
+    to, so a later attempt (in this run or a later one) can request just
+    the missing bytes with "Range: bytes=N-". The finished file is checked
+    against expected_sha256 (if provided) before being renamed into place.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        dest_path: Path,
+        expected_sha256: str = None,
+        session: requests.Session = None,
+        on_bytes: Callable[[int], None] = None,
+    ):
+        self._url = url
+        self._dest_path = dest_path
+        self._expected_sha256 = expected_sha256
+        self._session = session if session is not None else pc.http_session()
+        self._on_bytes = on_bytes
+        self.resumed_from = 0
+
+    @property
+    def part_path(self) -> Path:
+        return self._dest_path.with_name(f"{self._dest_path.name}.part")
+
+    @property
+    def journal_path(self) -> Path:
+        return self._dest_path.with_name(f"{self._dest_path.name}.part.json")
+
+    def _load_journal(self) -> Union[Dict[str, Any], None]:
+        try:
+            with self.journal_path.open(mode="r") as f:
+                journal = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if (
+            journal.get("url") != self._url
+            or journal.get("sha256") != self._expected_sha256
+        ):
+            return None
+        return journal
+
+    def _write_journal(self, response: requests.Response):
+        with self.journal_path.open(mode="w") as f:
+            json.dump(
+                {
+                    "url": self._url,
+                    "sha256": self._expected_sha256,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                },
+                f,
+            )
+
+    def discard_partial(self):
+        self.part_path.unlink(missing_ok=True)
+        self.journal_path.unlink(missing_ok=True)
+
+    def _resume_offset(self) -> int:
+        journal = self._load_journal()
+        if journal is None or not self.part_path.exists():
+            self.discard_partial()
+            return 0
+        return self.part_path.stat().st_size
+
+    def _request(self, offset: int) -> requests.Response:
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            # If the resource changed since the partial file was written,
+            # the server sends the whole new version instead of a range.
+            journal = self._load_journal()
+            validator = journal.get("etag") or journal.get("last_modified")
+            if validator:
+                headers["If-Range"] = validator
+        return self._session.get(self._url, headers=headers, stream=True)
+
+    @staticmethod
+    def _range_start(response: requests.Response) -> Union[int, None]:
+        if response.status_code != 206:
+            return None
+        match = _CONTENT_RANGE_START.match(
+            response.headers.get("Content-Range", "")
+        )
+        return int(match.group(1)) if match else None
+
+    def _hash_existing(self, hasher, num_bytes: int):
+        with self.part_path.open(mode="rb") as part_file:
+            remaining = num_bytes
+            while remaining:
+                chunk = part_file.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+                hasher.update(chunk)
+                remaining -= len(chunk)
+
+    def _attempt(self) -> str:
+        offset = self._resume_offset()
+        hasher = hashlib.sha256()
+
+        with self._request(offset) as response:
+            if response.status_code == 416:
+                # Nothing left to send, or the partial file is bad.
+                self.discard_partial()
+                raise requests.ConnectionError(
+                    f"Range not satisfiable for {self._url}"
+                )
+            response.raise_for_status()
+
+            if offset and self._range_start(response) == offset:
+                self.resumed_from = offset
+                self._hash_existing(hasher, offset)
+                if self._on_bytes is not None:
+                    self._on_bytes(offset)
+                mode = "ab"
+            else:
+                offset = 0
+                self._write_journal(response)
+                mode = "wb"
+
+            if offset:
+                logging.getLogger(__name__).info(
+                    f"Resuming download of {self._url} at byte {offset}"
+                )
+
+            with self.part_path.open(mode=mode) as part_file:
+                for chunk in response.iter_content(
+                    chunk_size=DOWNLOAD_CHUNK_SIZE
+                ):
+                    part_file.write(chunk)
+                    hasher.update(chunk)
+                    if self._on_bytes is not None:
+                        self._on_bytes(len(chunk))
+
+        return hasher.hexdigest()
+
+    def run(self) -> Path:
+        for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+            try:
+                actual_sha256 = self._attempt()
+                break
+            except (
+                requests.ConnectionError,
+                requests.Timeout,
+                requests.exceptions.ChunkedEncodingError,
+            ) as e:
+                if attempt == DOWNLOAD_ATTEMPTS:
+                    raise
+                logging.getLogger(__name__).warning(
+                    f"Download of {self._url} interrupted ({e}), retrying"
+                )
+
+        if self._expected_sha256 and actual_sha256 != self._expected_sha256:
+            self.discard_partial()
+            raise ce.DistDigestMismatch(
+                url=self._url,
+                expected_sha256=self._expected_sha256,
+                actual_sha256=actual_sha256,
+            )
+
+        self.part_path.replace(self._dest_path)
+        self.journal_path.unlink(missing_ok=True)
+        return self._dest_path
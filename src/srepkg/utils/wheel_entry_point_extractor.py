@@ -1,40 +1,71 @@
 import configparser
+import email.parser
 import entry_points_txt
-import tempfile
+import io
 from pathlib import Path
+from typing import Callable, Tuple, Union
 from zipfile import ZipFile
 
 import srepkg.repackager_data_structs as re_ds
 import srepkg.error_handling.custom_exceptions as ce
+import srepkg.utils.http_range_file as hrf
+import srepkg.utils.wheel_index as wi
 
 
 class WheelEntryPointExtractor:
 
-    def __init__(self, whl_path: Path):
+    def __init__(self, whl_path: Path, wheel_index: wi.WheelIndex = None):
         self._whl_path = whl_path
+        self._wheel_index = wheel_index
 
-    
-    
-    def _extract_entry_pts_txt(self, output_path: Path) -> Path:
+    @property
+    def _index_open_zip(self) -> Union[Callable[[], ZipFile], None]:
+        # None lets WheelIndex open the local wheel itself, so it notices
+        # if the wheel is rewritten after it is indexed.
+        return None
 
-        with ZipFile(self._whl_path, "r") as zip_obj:
-            filenames_in_whl = zip_obj.namelist()
-            entry_pts_txt = [
-                filename
-                for filename in filenames_in_whl
-                if Path(filename).name == "entry_points.txt"
-            ]
-            if len(entry_pts_txt) == 0:
-                raise ce.NoEntryPtsTxtFile(self._whl_path)
-            if len(entry_pts_txt) > 1:
-                raise ce.MultipleEntryPtsTxtFiles(self._whl_path)
+    @property
+    def _index_metadata_files(self) -> Tuple[str, ...]:
+        return wi.DIST_INFO_METADATA_FILES
 
-            zip_obj.extract(entry_pts_txt[0], output_path)
+    @property
+    def wheel_index(self) -> wi.WheelIndex:
+        if self._wheel_index is None:
+            self._wheel_index = wi.WheelIndex(
+                wheel_path=self._whl_path,
+                metadata_files=self._index_metadata_files,
+                open_zip=self._index_open_zip,
+            )
+        return self._wheel_index
 
-            return output_path / entry_pts_txt[0]
+    def _read_entry_pts_txt(self) -> str:
+        entry_pts_txt = [
+            filename
+            for filename in self.wheel_index.names
+            if Path(filename).name == "entry_points.txt"
+        ]
+        if len(entry_pts_txt) == 0:
+            raise ce.NoEntryPtsTxtFile(self._whl_path)
+        if len(entry_pts_txt) > 1:
+            raise ce.MultipleEntryPtsTxtFiles(self._whl_path)
+
+        return self.wheel_index.read(entry_pts_txt[0]).decode("utf-8")
+
+    def root_is_purelib(self) -> bool:
+        """
+        Value of Root-Is-Purelib in the wheel's .dist-info/WHEEL file.
+        """
+        wheel_files = [
+            filename
+            for filename in self.wheel_index.names
+            if Path(filename).parent.name.endswith(".dist-info")
+            and Path(filename).name == "WHEEL"
+        ]
+        wheel_metadata = email.parser.Parser().parsestr(
+            self.wheel_index.read(wheel_files[0]).decode("utf-8")
+        )
+        return wheel_metadata.get("Root-Is-Purelib", "").lower() == "true"
 
-    
-    
     @staticmethod
     def _convert_to_srepkg_builder_format(
         entry_point: entry_points_txt.EntryPoint,
@@ -58,11 +89,9 @@ class WheelEntryPointExtractor:
 
     
     def get_entry_points(self):
-        temp_dir = tempfile.TemporaryDirectory()
-        output_file = self._extract_entry_pts_txt(Path(temp_dir.name))
-
-        with output_file.open(mode="r") as of:
-            entry_pts_set = entry_points_txt.load(of)
+        entry_pts_set = entry_points_txt.load(
+            io.StringIO(self._read_entry_pts_txt())
+        )
 
         if ("console_scripts" not in entry_pts_set) or (
             not entry_pts_set["console_scripts"]
@@ -75,3 +104,34 @@ class WheelEntryPointExtractor:
         ]
 
         return re_ds.PkgCSEntryPoints(cs_entry_pts=entry_pts_list)
+
+
+class RemoteWheelEntryPointExtractor(WheelEntryPointExtractor):
+    """
+    Reads entry points and WHEEL metadata of a wheel that has not been
+    downloaded, using HTTP Range requests for just the central directory
+    and the files that are read.
+    """
+
+    def __init__(self, whl_url: str):
+        super().__init__(whl_path=whl_url)
+        self._range_file = None
+
+    @property
+    def range_file(self) -> hrf.HttpRangeFile:
+        if self._range_file is None:
+            self._range_file = hrf.HttpRangeFile(self._whl_path)
+        return self._range_file
+
+    def _open_zip(self) -> ZipFile:
+        self.range_file.seek(0)
+        return ZipFile(self.range_file, "r")
+
+    @property
+    def _index_open_zip(self) -> Callable[[], ZipFile]:
+        return self._open_zip
+
+    @property
+    def _index_metadata_files(self) -> Tuple[str, ...]:
+        # Only what the remote check reads, to keep the download small.
+        return ("entry_points.txt", "WHEEL")
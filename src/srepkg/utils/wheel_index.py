@@ -0,0 +1,161 @@
+"""
+Contains class for reading the file list and .dist-info metadata of a wheel
+with a single pass over its zip central directory.
+"""
+
+import email.message
+import email.parser
+import os
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Callable, List, Tuple, Union
+
+DIST_INFO_METADATA_FILES = ("entry_points.txt", "WHEEL", "METADATA", "RECORD")
+
+
+class WheelIndex:
+    """
+    File list of a wheel plus the contents of the metadata_files in its
+    .dist-info directory, read in one pass over the zip. The zip is only
+    opened again if a file that isn't in memory is read, or if a local
+    wheel was rewritten since it was indexed.
+
+    Args:
+        wheel_path: path of the wheel
+        metadata_files: names of .dist-info files to keep in memory
+        open_zip: opens the wheel's zip (default: zipfile.ZipFile of
+        wheel_path), e.g. to read a remote wheel
+    """
+
+    def __init__(
+        self,
+        wheel_path: Union[Path, str],
+        metadata_files: Tuple[str, ...] = DIST_INFO_METADATA_FILES,
+        open_zip: Callable[[], zipfile.ZipFile] = None,
+    ):
+        self._wheel_path = wheel_path
+        self._metadata_files = metadata_files
+        self._is_local = open_zip is None
+        if open_zip is None:
+            open_zip = self._open_local_zip
+        self._open_zip = open_zip
+        self._file_key = None
+        self._load()
+
+    def _open_local_zip(self) -> zipfile.ZipFile:
+        return zipfile.ZipFile(self._wheel_path, "r")
+
+    def _current_file_key(self) -> Union[Tuple[int, int, int], None]:
+        if not self._is_local:
+            return None
+        stat = os.stat(self._wheel_path)
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _is_dist_info_file(name: str, filenames: Tuple[str, ...]) -> bool:
+        parts = PurePosixPath(name).parts
+        return (
+            len(parts) == 2
+            and parts[0].endswith(".dist-info")
+            and parts[1] in filenames
+        )
+
+    def _load(self):
+        self._file_key = self._current_file_key()
+        with self._open_zip() as zip_file:
+            self._names = zip_file.namelist()
+            self._contents = {
+                name: zip_file.read(name)
+                for name in self._names
+                if self._is_dist_info_file(name, self._metadata_files)
+            }
+        self._dist_info_dirname = None
+
+    def _ensure_current(self):
+        if self._current_file_key() != self._file_key:
+            self._load()
+
+    @property
+    def wheel_path(self) -> Union[Path, str]:
+        return self._wheel_path
+
+    def relocate(self, wheel_path: Union[Path, str]):
+        """
+        Points the index at wheel_path, where the indexed wheel was moved
+        (e.g. by renaming a parent directory). The wheel is only read again
+        if it is not the same file.
+        """
+        self._wheel_path = wheel_path
+        self._ensure_current()
+
+    @property
+    def names(self) -> List[str]:
+        self._ensure_current()
+        return self._names
+
+    @property
+    def dist_info_dirname(self) -> str:
+        self._ensure_current()
+        if self._dist_info_dirname is not None:
+            return self._dist_info_dirname
+
+        dist_info_dirs = {
+            name.split("/", 1)[0]
+            for name in self._names
+            if name.split("/", 1)[0].endswith(".dist-info")
+        }
+
+        if len(dist_info_dirs) == 0:
+            raise FileNotFoundError("No dist-info directory")
+        if len(dist_info_dirs) > 1:
+            raise FileExistsError("Multiple dist-info directories found")
+
+        self._dist_info_dirname = next(iter(dist_info_dirs))
+        return self._dist_info_dirname
+
+    def read(self, name: str) -> bytes:
+        self._ensure_current()
+        if name not in self._contents:
+            with self._open_zip() as zip_file:
+                return zip_file.read(name)
+        return self._contents[name]
+
+    def read_dist_info_text(self, filename: str) -> Union[str, None]:
+        """
+        Text of filename in the .dist-info directory, or None if the wheel
+        doesn't have it.
+        """
+        name = f"{self.dist_info_dirname}/{filename}"
+        if name not in self._names:
+            return None
+        return self.read(name).decode("utf-8")
+
+    @property
+    def entry_points_txt(self) -> Union[str, None]:
+        return self.read_dist_info_text("entry_points.txt")
+
+    @property
+    def record(self) -> Union[str, None]:
+        return self.read_dist_info_text("RECORD")
+
+    def _parsed_dist_info_file(
+        self, filename: str
+    ) -> Union[email.message.Message, None]:
+        text = self.read_dist_info_text(filename)
+        if text is None:
+            return None
+        return email.parser.Parser().parsestr(text)
+
+    @property
+    def wheel_metadata(self) -> Union[email.message.Message, None]:
+        """
+        Parsed .dist-info/WHEEL (e.g. Root-Is-Purelib, Tag).
+        """
+        return self._parsed_dist_info_file("WHEEL")
+
+    @property
+    def metadata(self) -> Union[email.message.Message, None]:
+        """
+        Parsed .dist-info/METADATA (e.g. Name, Version).
+        """
+        return self._parsed_dist_info_file("METADATA")
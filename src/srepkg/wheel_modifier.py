@@ -1,35 +1,192 @@
 from __future__ import annotations
 
+import base64
 import configparser
-import contextlib
+import copy
+import csv
+import hashlib
+import io
 import os
-import shutil
+import stat
 import tempfile
 import zipfile
 from pathlib import Path
-from typing import Callable
+from typing import BinaryIO, Callable, Dict
 
-from wheel.cli.pack import pack
-from wheel.cli.unpack import unpack
+import srepkg.utils.wheel_index as wi
 
+COPY_CHUNK_SIZE = 1024 * 1024
 
-def silent_unpack(path: str, dest: str):
-    """Unpack a .whl file silently."""
-    with open(os.devnull, 'w') as devnull:
-        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
-            unpack(path, dest)
 
-def silent_pack(directory: str, dest_dir: str, build_number: str | None):
-    """Pack a directory into a .whl file silently."""
-    with open(os.devnull, 'w') as devnull:
-        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
-            pack(directory, dest_dir, build_number)
+def record_hash(data: bytes) -> str:
+    """Hash of data in the format of a wheel's RECORD file."""
+    digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest())
+    return f"sha256={digest.rstrip(b'=').decode('ascii')}"
+
+
+class WheelMemberRewriter:
+    """
+    Replaces the contents of some members of a wheel and updates their
+    lines in the wheel's RECORD. The local headers and compressed data of
+    all other members are copied verbatim (with copy_file_range where the
+    OS supports it), so nothing is decompressed, re-hashed or
+    re-compressed and the cost depends on the size of the central
+    directory and the replaced members rather than on the wheel's size.
+    The rewritten wheel atomically replaces the original.
+    """
 
-class WheelDistInfo:
     def __init__(self, wheel_path: Path):
+        self._wheel_path = Path(wheel_path)
+
+    @staticmethod
+    def _copy_bytes(
+        src_file: BinaryIO, dest_file: BinaryIO, offset: int, length: int
+    ):
+        dest_file.flush()
+        dest_offset = dest_file.tell()
+        copied = 0
+        if hasattr(os, "copy_file_range"):
+            try:
+                while copied < length:
+                    num_copied = os.copy_file_range(
+                        src_file.fileno(),
+                        dest_file.fileno(),
+                        length - copied,
+                        offset + copied,
+                        dest_offset + copied,
+                    )
+                    if num_copied == 0:
+                        break
+                    copied += num_copied
+            except OSError:
+                # e.g. not supported between these filesystems
+                pass
+
+        src_file.seek(offset + copied)
+        dest_file.seek(dest_offset + copied)
+        remaining = length - copied
+        while remaining:
+            chunk = src_file.read(min(COPY_CHUNK_SIZE, remaining))
+            if not chunk:
+                raise zipfile.BadZipFile(f"Unexpected end of {src_file.name}")
+            dest_file.write(chunk)
+            remaining -= len(chunk)
+
+    @staticmethod
+    def _updated_record(
+        record: bytes, replacements: Dict[str, bytes]
+    ) -> bytes:
+        rows = []
+        for row in csv.reader(io.StringIO(record.decode("utf-8"))):
+            if row and row[0] in replacements:
+                data = replacements[row[0]]
+                row = [row[0], record_hash(data), str(len(data))]
+            rows.append(row)
+        new_record = io.StringIO()
+        csv.writer(new_record, lineterminator="\n").writerows(rows)
+        return new_record.getvalue().encode("utf-8")
+
+    @staticmethod
+    def _replacement_info(orig_info: zipfile.ZipInfo) -> zipfile.ZipInfo:
+        new_info = zipfile.ZipInfo(
+            filename=orig_info.filename, date_time=orig_info.date_time
+        )
+        new_info.compress_type = orig_info.compress_type
+        new_info.external_attr = orig_info.external_attr
+        new_info.create_system = orig_info.create_system
+        return new_info
+
+    def _write_members(
+        self,
+        src_file: BinaryIO,
+        src_zip: zipfile.ZipFile,
+        dest_zip: zipfile.ZipFile,
+        replacements: Dict[str, bytes],
+    ):
+        infos = src_zip.infolist()
+        record_name = next(
+            (
+                info.filename
+                for info in infos
+                if info.filename.endswith(".dist-info/RECORD")
+                and info.filename.count("/") == 1
+            ),
+            None,
+        )
+        if record_name is not None:
+            replacements[record_name] = self._updated_record(
+                src_zip.read(record_name), replacements
+            )
+
+        # A member's local header, data and any data descriptor end
+        # where the next member (or the central directory) starts.
+        offsets = sorted(info.header_offset for info in infos)
+        span_ends = dict(zip(offsets, offsets[1:] + [src_zip.start_dir]))
+
+        for info in infos:
+            if info.filename in replacements:
+                dest_zip.writestr(
+                    self._replacement_info(info),
+                    replacements[info.filename],
+                )
+                continue
+
+            copied_info = copy.copy(info)
+            copied_info.header_offset = dest_zip.fp.tell()
+            self._copy_bytes(
+                src_file,
+                dest_zip.fp,
+                offset=info.header_offset,
+                length=span_ends[info.header_offset] - info.header_offset,
+            )
+            # zipfile writes the central directory from filelist, and
+            # its next member at start_dir.
+            dest_zip.filelist.append(copied_info)
+            dest_zip.NameToInfo[copied_info.filename] = copied_info
+            dest_zip.start_dir = dest_zip.fp.tell()
+
+        dest_zip.comment = src_zip.comment
+
+    def _write(
+        self,
+        src_file: BinaryIO,
+        dest_path: Path,
+        replacements: Dict[str, bytes],
+    ):
+        with zipfile.ZipFile(src_file) as src_zip:
+            with zipfile.ZipFile(dest_path, mode="w") as dest_zip:
+                self._write_members(src_file, src_zip, dest_zip, replacements)
+
+    def rewrite(self, replacements: Dict[str, bytes]):
+        """
+        Args:
+            replacements: new contents by member name
+        """
+        replacements = dict(replacements)
+        temp_fd, temp_name = tempfile.mkstemp(
+            dir=self._wheel_path.parent,
+            prefix=f".{self._wheel_path.name}.",
+            suffix=".tmp",
+        )
+        os.close(temp_fd)
+        temp_path = Path(temp_name)
+        try:
+            with self._wheel_path.open(mode="rb") as src_file:
+                self._write(src_file, temp_path, replacements)
+            os.chmod(temp_path, stat.S_IMODE(self._wheel_path.stat().st_mode))
+            os.replace(temp_path, self._wheel_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+
+class WheelDistInfo:
+    def __init__(self, wheel_path: Path, wheel_index: wi.WheelIndex = None):
         self.wheel_path = wheel_path
-        with zipfile.ZipFile(wheel_path) as zip_file:
-            wheel_relative_paths = zip_file.namelist()
+        if wheel_index is None:
+            wheel_index = wi.WheelIndex(wheel_path=wheel_path)
+        self.wheel_index = wheel_index
+        wheel_relative_paths = wheel_index.names
         self.dist_info_dirname = self.get_dist_info_dirname(
             wheel_relative_paths=wheel_relative_paths
         )
@@ -65,17 +222,8 @@ class WheelDistInfo:
 
     def get_entry_points_config(self) -> configparser.ConfigParser | None:
         if self.has_entry_points_txt:
-            with zipfile.ZipFile(self.wheel_path) as zip_file:
-                temp_dir = tempfile.TemporaryDirectory()
-                zip_file.extract(
-                    member=str(self.entry_points_txt_rel_path),
-                    path=temp_dir.name,
-                )
-
-                config = configparser.ConfigParser()
-                config.read(
-                    f"{temp_dir.name}/{self.dist_info_dirname}/entry_points.txt"
-                )
+            config = configparser.ConfigParser()
+            config.read_string(self.wheel_index.entry_points_txt)
             return config
 
     @property
@@ -94,9 +242,11 @@ class WheelDistInfo:
 
 
 class WheelEntryPointsModifier:
-    def __init__(self, wheel_path: Path):
+    def __init__(self, wheel_path: Path, wheel_index: wi.WheelIndex = None):
         self.wheel_path = wheel_path
-        self.wheel_dist_info = WheelDistInfo(wheel_path=wheel_path)
+        self.wheel_dist_info = WheelDistInfo(
+            wheel_path=wheel_path, wheel_index=wheel_index
+        )
 
     @staticmethod
     def fix_console_script_names(
@@ -112,54 +262,29 @@ class WheelEntryPointsModifier:
                 )
                 entry_points_config.set("console_scripts", new_name, func)
 
-    def modify_entry_points_txt(
+    def modified_entry_points_txt(
         self,
-        unpacked_wheel_path: Path,
         config_modifier: Callable[[configparser.ConfigParser], None],
-    ):
-        entry_points_txt_path = (
-            unpacked_wheel_path
-            / self.wheel_dist_info.dist_info_dirname
-            / "entry_points.txt"
-        )
-        entry_points_config = configparser.ConfigParser()
-        entry_points_config.read(entry_points_txt_path)
+    ) -> bytes:
+        entry_points_config = self.wheel_dist_info.get_entry_points_config()
         config_modifier(entry_points_config)
-        with entry_points_txt_path.open(mode="w") as entry_points_txt_file:
-            entry_points_config.write(entry_points_txt_file)
+        entry_points_txt = io.StringIO()
+        entry_points_config.write(entry_points_txt)
+        return entry_points_txt.getvalue().encode("utf-8")
 
     def modify_and_rebuild(self):
-
-
-        # unpack wheel
-        unpack_dir = tempfile.TemporaryDirectory()
-        silent_unpack(path=str(self.wheel_dist_info.wheel_path), dest=unpack_dir.name)
-        unpacked_wheel = list(Path(unpack_dir.name).iterdir())[0]
-
-        # modify entry_points.txt in unpacked wheel
-        self.modify_entry_points_txt(
-            unpacked_wheel_path=unpacked_wheel,
-            config_modifier=self.fix_console_script_names,
+        if not self.wheel_dist_info.has_entry_points_txt:
+            return
+        entry_points_txt_name = (
+            self.wheel_dist_info.entry_points_txt_rel_path.as_posix()
         )
-
-        # repack wheel
-        rebuild_dir = tempfile.TemporaryDirectory()
-        silent_pack(
-            directory=str(unpacked_wheel),
-            dest_dir=str(rebuild_dir.name),
-            build_number=None,
+        WheelMemberRewriter(wheel_path=self.wheel_path).rewrite(
+            {
+                entry_points_txt_name: self.modified_entry_points_txt(
+                    config_modifier=self.fix_console_script_names
+                )
+            }
         )
-        new_wheel_path = next(Path(rebuild_dir.name).glob("*.whl"), None)
-
-        # For testing, easier not do this check just let shutil raise Except
-        # if not new_wheel_path:
-        #     raise FileNotFoundError("Failed to create new wheel file")
-
-        # overwrite old wheel with new
-        shutil.move(str(new_wheel_path), str(self.wheel_dist_info.wheel_path))
-
-        # clean up
-        shutil.rmtree(rebuild_dir.name)
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,71 @@
+"""
+Compares the cost of finding a newly built file in an output directory
+using stat snapshots (current DistBuilder approach) against hashing every
+file before and after (previous approach), as the directory grows.
+
+Run with: python -m test.benchmark_dir_snapshot
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import srepkg.utils.dir_snapshot as dsn
+
+FILE_SIZE = 1024 * 1024
+DIR_SIZES = [10, 100, 500]
+
+
+def populate(directory: Path, num_files: int):
+    one_day_ago = time.time() - 86_400
+    content = os.urandom(FILE_SIZE)
+    for idx in range(num_files):
+        old_wheel = directory / f"oldpkg{idx}-0.0.0-py3-none-any.whl"
+        old_wheel.write_bytes(content)
+        os.utime(old_wheel, (one_day_ago, one_day_ago))
+
+
+def md5_of(file_path: Path) -> str:
+    hash_md5 = hashlib.md5()
+    with file_path.open(mode="rb") as f:
+        for chunk in iter(lambda: f.read(4096), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+
+def time_md5_detection(directory: Path, new_file: Path) -> float:
+    start = time.perf_counter()
+    before = {md5_of(item) for item in directory.iterdir()}
+    new_file.write_bytes(b"new")
+    _ = [item for item in directory.iterdir() if md5_of(item) not in before]
+    elapsed = time.perf_counter() - start
+    new_file.unlink()
+    return elapsed
+
+
+def time_snapshot_detection(directory: Path, new_file: Path) -> float:
+    start = time.perf_counter()
+    snapshot = dsn.DirSnapshot(directory)
+    new_file.write_bytes(b"new")
+    _ = snapshot.changed_files()
+    elapsed = time.perf_counter() - start
+    new_file.unlink()
+    return elapsed
+
+
+def main():
+    print(f"{'files':>8} {'md5 (s)':>12} {'snapshot (s)':>14}")
+    for num_files in DIR_SIZES:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            directory = Path(temp_dir)
+            populate(directory, num_files)
+            new_file = directory / "newpkg-0.0.0-py3-none-any.whl"
+            md5_time = time_md5_detection(directory, new_file)
+            snapshot_time = time_snapshot_detection(directory, new_file)
+        print(f"{num_files:>8} {md5_time:>12.4f} {snapshot_time:>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
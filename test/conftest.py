@@ -0,0 +1,14 @@
+import pytest
+import srepkg.utils.cache_dirs as cd
+
+
+@pytest.fixture(scope="session", autouse=True)
+def srepkg_cache_root(tmp_path_factory):
+    """
+    Points every srepkg cache at a temporary directory shared by the test
+    session, so tests neither read nor fill the user's ~/.cache/srepkg.
+    """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        cache_root = tmp_path_factory.mktemp("srepkg_cache")
+        monkeypatch.setenv(cd.CACHE_DIR_ENV_VAR, str(cache_root))
+        yield cache_root
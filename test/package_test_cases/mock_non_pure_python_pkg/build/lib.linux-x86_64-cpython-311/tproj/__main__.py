@@ -0,0 +1,9 @@
+import tproj.app as app
+
+
+def main():
+    app.run()
+
+
+if __name__ == "__main__":
+    main()
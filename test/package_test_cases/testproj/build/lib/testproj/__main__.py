@@ -0,0 +1,9 @@
+import testproj.app as app
+
+
+def main():
+    app.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,14 @@
+import functools
+import http.server
+import os
+import re
+import shutil
+import subprocess
+import threading
 import pytest
 from dataclasses import dataclass
 from pathlib import Path
+from zipfile import ZipFile
 import srepkg.repackager_data_structs as rep_ds
 from srepkg.construction_dir import TempConstructionDir
 import srepkg.logging_initializer as lgr
@@ -89,3 +97,220 @@ def app_logger():
     app_logger = lgr.LoggingInitializer()
     app_logger.setup()
     return app_logger
+
+
+def write_large_wheel(
+    orig_wheel: Path, new_wheel: Path, skip_member: str = None
+):
+    """
+    Copies orig_wheel with an 8 MB file added ahead of its contents.
+    """
+    with ZipFile(orig_wheel) as orig_zip, ZipFile(new_wheel, "w") as new_zip:
+        new_zip.writestr("testproj/big.bin", os.urandom(8 * 1024 * 1024))
+        for item in orig_zip.infolist():
+            if item.filename != skip_member:
+                new_zip.writestr(item, orig_zip.read(item))
+
+
+class RangeRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    SimpleHTTPRequestHandler that also answers single-range Range requests
+    with 206 Partial Content.
+    """
+
+    range_pattern = re.compile(r"bytes=(\d*)-(\d*)$")
+
+    def do_GET(self):
+        range_match = self.range_pattern.match(self.headers.get("Range", ""))
+        file_path = Path(self.translate_path(self.path))
+        if not range_match or not file_path.is_file():
+            return super().do_GET()
+
+        content = file_path.read_bytes()
+        first, last = range_match.groups()
+        if first:
+            start = int(first)
+            end = (
+                min(int(last), len(content) - 1) if last else len(content) - 1
+            )
+        else:
+            start = max(len(content) - int(last), 0)
+            end = len(content) - 1
+        body = content[start : end + 1]
+
+        self.send_response(206)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header(
+            "Content-Range", f"bytes {start}-{end}/{len(content)}"
+        )
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ByteCountingRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    SimpleHTTPRequestHandler (no Range support) that adds the number of
+    body bytes it sends to the server's bytes_served, by request path. A
+    client that closes the connection early stops the count.
+    """
+
+    def copyfile(self, source, outputfile):
+        while True:
+            chunk = source.read(64 * 1024)
+            if not chunk:
+                return
+            try:
+                outputfile.write(chunk)
+                outputfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            self.server.bytes_served[self.path] = (
+                self.server.bytes_served.get(self.path, 0) + len(chunk)
+            )
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve_dir(serve_dir: Path, handler_class):
+    handler = functools.partial(handler_class, directory=str(serve_dir))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def local_http_server(tmp_path):
+    """
+    Serves the files in a temp directory over HTTP. Yields (serve_dir,
+    base_url).
+    """
+    serve_dir = tmp_path / "served"
+    serve_dir.mkdir()
+    server = _serve_dir(serve_dir, http.server.SimpleHTTPRequestHandler)
+    yield serve_dir, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def byte_counting_http_server(tmp_path):
+    """
+    Like local_http_server, but also yields a dict of the body bytes sent
+    for each request path: (serve_dir, base_url, bytes_served).
+    """
+    serve_dir = tmp_path / "counted_served"
+    serve_dir.mkdir()
+    server = _serve_dir(serve_dir, ByteCountingRequestHandler)
+    server.bytes_served = {}
+    yield (
+        serve_dir,
+        f"http://127.0.0.1:{server.server_address[1]}",
+        server.bytes_served,
+    )
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def local_range_http_server(tmp_path):
+    """
+    Like local_http_server, but the server supports HTTP Range requests.
+    """
+    serve_dir = tmp_path / "range_served"
+    serve_dir.mkdir()
+    server = _serve_dir(serve_dir, RangeRequestHandler)
+    yield serve_dir, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@dataclass
+class LocalGitRepo:
+    url: str
+    work_dir: Path
+    tagged_commit: str
+    main_commit: str
+    feature_commit: str
+
+
+def git_for_tests(*args: str, cwd: Path) -> str:
+    return subprocess.run(
+        [
+            "git",
+            "-c",
+            "user.name=srepkg test",
+            "-c",
+            "user.email=srepkg-test@example.com",
+            *args,
+        ],
+        cwd=cwd,
+        check=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def local_bare_git_repo(tmp_path) -> LocalGitRepo:
+    """
+    Bare git repo of testproj, served via file:// so clones use the same
+    transport (and honor --depth / --filter) as a remote. History: tag
+    v0.1 <- main, and a feature branch off main. release.txt names the
+    commit's branch. pkgs/testproj is a second copy of testproj, for
+    selecting a package in a subdirectory.
+    """
+    work_dir = tmp_path / "git_work"
+    shutil.copytree(
+        AllExamplePackages.testproj,
+        work_dir,
+        ignore=shutil.ignore_patterns("build", "*.egg-info"),
+    )
+    shutil.copytree(
+        work_dir,
+        work_dir / "pkgs" / "testproj",
+        ignore=shutil.ignore_patterns("pkgs"),
+    )
+    (work_dir / "docs").mkdir()
+    (work_dir / "docs" / "large_file.txt").write_text("docs" * 1000)
+    git_for_tests("init", "-q", cwd=work_dir)
+    git_for_tests("checkout", "-q", "-b", "main", cwd=work_dir)
+    (work_dir / "release.txt").write_text("v0.1")
+    git_for_tests("add", ".", cwd=work_dir)
+    git_for_tests("commit", "-q", "-m", "first", cwd=work_dir)
+    git_for_tests("tag", "v0.1", cwd=work_dir)
+    tagged_commit = git_for_tests("rev-parse", "HEAD", cwd=work_dir)
+
+    (work_dir / "release.txt").write_text("main")
+    git_for_tests("commit", "-q", "-am", "main", cwd=work_dir)
+    main_commit = git_for_tests("rev-parse", "HEAD", cwd=work_dir)
+
+    git_for_tests("checkout", "-q", "-b", "feature", cwd=work_dir)
+    (work_dir / "release.txt").write_text("feature")
+    git_for_tests("commit", "-q", "-am", "feature", cwd=work_dir)
+    feature_commit = git_for_tests("rev-parse", "HEAD", cwd=work_dir)
+    git_for_tests("checkout", "-q", "main", cwd=work_dir)
+
+    bare_dir = tmp_path / "git_bare.git"
+    git_for_tests(
+        "clone", "-q", "--bare", str(work_dir), str(bare_dir), cwd=tmp_path
+    )
+    git_for_tests("remote", "add", "origin", str(bare_dir), cwd=work_dir)
+    git_for_tests("config", "uploadpack.allowFilter", "true", cwd=bare_dir)
+    git_for_tests(
+        "config", "uploadpack.allowAnySHA1InWant", "true", cwd=bare_dir
+    )
+
+    return LocalGitRepo(
+        url=bare_dir.as_uri(),
+        work_dir=work_dir,
+        tagged_commit=tagged_commit,
+        main_commit=main_commit,
+        feature_commit=feature_commit,
+    )
@@ -0,0 +1,114 @@
+import shutil
+from pathlib import Path
+import srepkg.build_artifact_cache as bac
+import srepkg.dist_provider as d_prov
+import srepkg.git_mirror_cache as gmc
+import srepkg.remote_pkg_retriever as rpr
+from test.shared_fixtures import (
+    local_bare_git_repo,
+    sample_pkgs,
+    tmp_construction_dir,
+)
+
+
+class TestBuildArtifactCache:
+
+    def test_fetch_miss_then_hit(self, tmp_path):
+        cache = bac.BuildArtifactCache(cache_dir=tmp_path / "cache")
+        artifact = tmp_path / "dummy-0.1-py3-none-any.whl"
+        artifact.write_bytes(b"wheel contents")
+        dest_dir = tmp_path / "dest"
+        dest_dir.mkdir()
+
+        key = cache.key(cache.file_digest(artifact), ["wheel"])
+        assert cache.fetch(key, dest_dir) is None
+        cache.store(key, [artifact])
+        fetched = cache.fetch(key, dest_dir)
+
+        assert [item.name for item in fetched] == [artifact.name]
+        assert (dest_dir / artifact.name).read_bytes() == b"wheel contents"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_key_depends_on_distributions(self):
+        assert bac.BuildArtifactCache.key(
+            "abc", ["wheel", "sdist"]
+        ) == bac.BuildArtifactCache.key("abc", ["sdist", "wheel"])
+        assert bac.BuildArtifactCache.key(
+            "abc", ["wheel"]
+        ) != bac.BuildArtifactCache.key("abc", ["wheel", "sdist"])
+
+    def test_source_tree_digest(self, tmp_path, sample_pkgs):
+        src_path = tmp_path / "testproj"
+        shutil.copytree(sample_pkgs.testproj, src_path)
+        orig_digest = bac.BuildArtifactCache.source_tree_digest(src_path)
+
+        (src_path / "build").mkdir(exist_ok=True)
+        (src_path / "build" / "leftover.txt").write_text("ignored")
+        assert (
+            bac.BuildArtifactCache.source_tree_digest(src_path) == orig_digest
+        )
+
+        (src_path / "setup.cfg").write_text("[metadata]\nname = changed\n")
+        assert (
+            bac.BuildArtifactCache.source_tree_digest(src_path) != orig_digest
+        )
+
+    def test_nested_build_package_in_digest(self, tmp_path, sample_pkgs):
+        src_path = tmp_path / "testproj"
+        shutil.copytree(sample_pkgs.testproj, src_path)
+        nested_build = src_path / "src" / "testproj" / "build"
+        nested_build.mkdir()
+        (nested_build / "__init__.py").write_text("")
+        orig_digest = bac.BuildArtifactCache.source_tree_digest(src_path)
+
+        (nested_build / "__init__.py").write_text("VERSION = 2\n")
+        assert (
+            bac.BuildArtifactCache.source_tree_digest(src_path) != orig_digest
+        )
+
+    def test_provider_reuses_cached_build(
+        self, tmp_path, sample_pkgs, tmp_construction_dir, mocker
+    ):
+        cache = bac.BuildArtifactCache(cache_dir=tmp_path)
+        src_path = Path(sample_pkgs.testproj)
+        dest_path = tmp_construction_dir.orig_pkg_dists
+
+        d_prov.DistProviderFromSrc(src_path, dest_path, cache).run()
+        built = sorted(item.name for item in dest_path.iterdir())
+        for item in dest_path.iterdir():
+            item.unlink()
+
+        spy = mocker.spy(d_prov.DistProviderFromSrc, "_build")
+        d_prov.DistProviderFromSrc(src_path, dest_path, cache).run()
+
+        assert spy.call_count == 0
+        assert sorted(item.name for item in dest_path.iterdir()) == built
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_mirror_worktree_build_reused(
+        self, tmp_path, local_bare_git_repo, mocker
+    ):
+        # Each worktree's .git file names a different worktrees/<tmp> dir
+        # of the mirror, which must not change the digest.
+        cache = bac.BuildArtifactCache(cache_dir=tmp_path / "artifacts")
+        mirror_cache = gmc.GitMirrorCache(cache_dir=tmp_path / "mirrors")
+        build_spy = mocker.spy(d_prov.DistProviderFromSrc, "_build")
+
+        for run_num in range(2):
+            retriever = rpr.GithubPkgRetriever(
+                pkg_ref=local_bare_git_repo.url,
+                git_ref="v0.1",
+                git_mirror_cache=mirror_cache,
+            )
+            retriever.run()
+            dest_path = tmp_path / f"dists_{run_num}"
+            dest_path.mkdir()
+            d_prov.DistProviderFromGitRepo(
+                src_path=retriever.src_path,
+                dest_path=dest_path,
+                build_artifact_cache=cache,
+            ).run()
+            assert [item.suffix for item in dest_path.iterdir()] == [".whl"]
+
+        assert build_spy.call_count == 1
+        assert (cache.hits, cache.misses) == (1, 1)
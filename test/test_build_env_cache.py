@@ -0,0 +1,173 @@
+import build
+import json
+import pytest
+import subprocess
+from pathlib import Path
+from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
+import srepkg.build_env_cache as bec
+import srepkg.dist_builder as db
+import srepkg.utils.cache_dirs as cd
+from test.shared_fixtures import sample_pkgs
+
+
+@pytest.fixture
+def mock_env_creation(mocker):
+    def create_env(self, env_path: Path, requires):
+        env_path.mkdir(exist_ok=True)
+        (env_path / bec.REQUIREMENTS_FILENAME).write_text(json.dumps(requires))
+
+    return mocker.patch.object(
+        bec.BuildEnvCache, "_create_env", autospec=True, side_effect=create_env
+    )
+
+
+class TestBuildEnvCache:
+
+    def test_key_ignores_order_and_duplicates(self):
+        requires_a = bec.BuildEnvCache.normalized_requires(
+            ["wheel", "setuptools>=42"]
+        )
+        requires_b = bec.BuildEnvCache.normalized_requires(
+            ["setuptools>=42", "wheel", "wheel"]
+        )
+        assert bec.BuildEnvCache.env_key(
+            requires_a
+        ) == bec.BuildEnvCache.env_key(requires_b)
+        assert bec.BuildEnvCache.env_key(
+            requires_a
+        ) != bec.BuildEnvCache.env_key(["hatchling"])
+
+    def test_env_created_once_and_reused(self, tmp_path, mock_env_creation):
+        cache = bec.BuildEnvCache(cache_dir=tmp_path)
+        first = cache.python_for_requires(["setuptools>=42", "wheel"])
+        second = cache.python_for_requires(["wheel", "setuptools>=42"])
+        assert first == second
+        assert mock_env_creation.call_count == 1
+
+    def test_least_recently_used_env_evicted(
+        self, tmp_path, mock_env_creation
+    ):
+        cache = bec.BuildEnvCache(cache_dir=tmp_path, max_envs=2)
+        setuptools_python = cache.python_for_requires(["setuptools"])
+        hatchling_python = cache.python_for_requires(["hatchling"])
+        cache.python_for_requires(["setuptools"])
+        cache.python_for_requires(["flit_core"])
+        assert setuptools_python.parent.parent.exists()
+        assert not hatchling_python.parent.parent.exists()
+        assert len(cd.LruCacheDir(tmp_path, max_entries=2).entries) == 2
+
+    def test_python_for_source_dir(
+        self, tmp_path, mock_env_creation, sample_pkgs, mocker
+    ):
+        mocker.patch.object(
+            bec.BuildEnvCache, "dynamic_requires", return_value=[]
+        )
+        cache = bec.BuildEnvCache(cache_dir=tmp_path)
+        cache.python_for(Path(sample_pkgs.testproj))
+        assert mock_env_creation.call_count == 1
+        requires = mock_env_creation.call_args.args[2]
+        assert any(item.startswith("setuptools") for item in requires)
+
+    def test_dynamic_requires_in_env_key(
+        self, tmp_path, mock_env_creation, sample_pkgs, mocker
+    ):
+        mock_dynamic_requires = mocker.patch.object(
+            bec.BuildEnvCache, "dynamic_requires", return_value=[]
+        )
+        mock_install = mocker.patch.object(bec.BuildEnvCache, "install")
+        cache = bec.BuildEnvCache(cache_dir=tmp_path)
+        static_python = cache.python_for(Path(sample_pkgs.testproj))
+        mock_dynamic_requires.return_value = ["cython"]
+        dynamic_python = cache.python_for(Path(sample_pkgs.testproj))
+
+        assert dynamic_python != static_python
+        assert static_python.parent.parent.exists()
+        assert "cython" in mock_env_creation.call_args.args[2]
+        assert mock_env_creation.call_count == 2
+        mock_install.assert_not_called()
+
+    def test_incomplete_env_recreated(self, tmp_path, mock_env_creation):
+        cache = bec.BuildEnvCache(cache_dir=tmp_path)
+        env_path = tmp_path / cache.env_key(["hatchling"])
+        env_path.mkdir()
+        cache.python_for_requires(["hatchling"])
+        assert mock_env_creation.call_count == 1
+        assert not list(tmp_path.glob(".*.lock"))
+
+    def test_waits_for_env_lock(self, tmp_path, mock_env_creation, mocker):
+        cache = bec.BuildEnvCache(cache_dir=tmp_path)
+        env_path = tmp_path / cache.env_key(["hatchling"])
+        lock_path = tmp_path / f".{env_path.name}.lock"
+        lock_path.touch()
+
+        def other_process_finishes(seconds):
+            mock_env_creation.side_effect(None, env_path, ["hatchling"])
+            lock_path.unlink()
+
+        sleep = mocker.patch.object(
+            bec.time, "sleep", side_effect=other_process_finishes
+        )
+        cache.python_for_requires(["hatchling"])
+        assert sleep.call_count == 1
+        assert mock_env_creation.call_count == 0
+        assert not lock_path.exists()
+
+
+def test_cache_root_env_var(tmp_path, monkeypatch):
+    monkeypatch.setenv(cd.CACHE_DIR_ENV_VAR, str(tmp_path))
+    assert cd.srepkg_cache_root() == tmp_path
+    monkeypatch.delenv(cd.CACHE_DIR_ENV_VAR)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert cd.srepkg_cache_root() == tmp_path / "srepkg"
+
+
+def test_isolated_build(tmp_path, sample_pkgs):
+    cache = bec.BuildEnvCache(cache_dir=tmp_path / "envs")
+    with db.build_worker_session(build_env_cache=cache):
+        wheel_path = db.DistBuilder(
+            distribution="wheel",
+            source_dir=Path(sample_pkgs.testproj),
+            output_directory=tmp_path / "dist",
+        ).build()
+    assert wheel_path.exists()
+
+    # Console scripts of a cached env point at the env's own python.
+    for env_path in (tmp_path / "envs").iterdir():
+        if env_path.is_dir():
+            subprocess.check_call(
+                [
+                    str(bec.BuildEnvCache.env_python(env_path).parent / "pip"),
+                    "--version",
+                ],
+                stdout=subprocess.DEVNULL,
+            )
+
+    # Whatever the backend asked for at build time went into an env keyed
+    # on it, not into the env with just the [build-system].requires.
+    build_system_requires = build.ProjectBuilder(
+        source_dir=sample_pkgs.testproj
+    ).build_system_requires
+    static_python = cache.python_for_requires(build_system_requires)
+    dynamic_requires = cache.dynamic_requires(
+        source_dir=Path(sample_pkgs.testproj),
+        python_executable=static_python,
+        distributions=["wheel"],
+    )
+    static_installed = {
+        canonicalize_name(item["name"])
+        for item in json.loads(
+            subprocess.check_output(
+                [str(static_python), "-m", "pip", "list", "--format=json"]
+            )
+        )
+    }
+    assert not {
+        canonicalize_name(Requirement(item).name) for item in dynamic_requires
+    } & (
+        static_installed
+        - {
+            canonicalize_name(Requirement(item).name)
+            for item in build_system_requires
+        }
+    )
@@ -41,6 +41,75 @@ class TestCommandInput:
         assert args.orig_pkg_ref == self.local_src_pkg_ref
         assert args.dist_out_dir == self.user_dist_out_dir
 
+    def test_build_isolation(self):
+        args = ci.SrepkgCommandLine().get_args([self.local_src_pkg_ref])
+        assert not args.build_isolation
+        args = ci.SrepkgCommandLine().get_args(
+            [self.local_src_pkg_ref, "-b"]
+        )
+        assert args.build_isolation
+
+    def test_no_build_cache(self):
+        args = ci.SrepkgCommandLine().get_args([self.local_src_pkg_ref])
+        assert not args.no_build_cache
+        args = ci.SrepkgCommandLine().get_args(
+            [self.local_src_pkg_ref, "--no_build_cache"]
+        )
+        assert args.no_build_cache
+
+    def test_wheel_from_sdist(self):
+        args = ci.SrepkgCommandLine().get_args([self.local_src_pkg_ref])
+        assert not args.wheel_from_sdist
+        args = ci.SrepkgCommandLine().get_args(
+            [self.local_src_pkg_ref, "--wheel_from_sdist"]
+        )
+        assert args.wheel_from_sdist
+
+    def test_no_download_cache(self):
+        args = ci.SrepkgCommandLine().get_args([self.local_src_pkg_ref])
+        assert not args.no_download_cache
+        args = ci.SrepkgCommandLine().get_args(
+            [self.local_src_pkg_ref, "--no_download_cache"]
+        )
+        assert args.no_download_cache
+
+    def test_no_git_cache(self):
+        args = ci.SrepkgCommandLine().get_args([self.local_src_pkg_ref])
+        assert not args.no_git_cache
+        args = ci.SrepkgCommandLine().get_args(
+            [self.local_src_pkg_ref, "--no_git_cache"]
+        )
+        assert args.no_git_cache
+
+    def test_metadata_max_age(self):
+        args = ci.SrepkgCommandLine().get_args([self.local_src_pkg_ref])
+        assert args.metadata_max_age == 0
+        args = ci.SrepkgCommandLine().get_args(
+            [self.local_src_pkg_ref, "--metadata_max_age", "3600"]
+        )
+        assert args.metadata_max_age == 3600
+
+    def test_index_urls(self):
+        args = ci.SrepkgCommandLine().get_args([self.local_src_pkg_ref])
+        assert args.index_url is None
+        assert args.extra_index_urls is None
+        args = ci.SrepkgCommandLine().get_args(
+            [
+                self.local_src_pkg_ref,
+                "--index_url",
+                "https://mirror.lan/simple",
+                "--extra_index_url",
+                "https://extra1.lan/simple",
+                "--extra_index_url",
+                "https://extra2.lan/simple",
+            ]
+        )
+        assert args.index_url == "https://mirror.lan/simple"
+        assert args.extra_index_urls == [
+            "https://extra1.lan/simple",
+            "https://extra2.lan/simple",
+        ]
+
     def test_too_many_args(self, capsys):
         with pytest.raises(SystemExit):
             ci.SrepkgCommandLine().get_args(
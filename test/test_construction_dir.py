@@ -1,5 +1,6 @@
 import shutil
 import tempfile
+import zipfile
 from pathlib import Path
 from test.shared_fixtures import sample_pkgs, tmp_construction_dir
 
@@ -9,6 +10,7 @@ import srepkg.construction_dir as cdn
 import srepkg.error_handling.custom_exceptions as ce
 import srepkg.repackager_interfaces as rep_int
 import srepkg.service_builder as sb
+import srepkg.utils.wheel_index as wi
 import srepkg.wheel_modifier as wm
 
 
@@ -25,9 +27,7 @@ class TestConstructionDirInit:
             construction_dir.srepkg_inner.parent
             == construction_dir.srepkg_root
         )
-        assert (
-            construction_dir.supported_dist_types == cdn.DEFAULT_DIST_CLASSES
-        )
+        assert construction_dir.supported_dist_types == cdn.DEFAULT_DIST_TYPES
         assert construction_dir._root_contents == [
             construction_dir.srepkg_root
         ]
@@ -82,12 +82,89 @@ class TestConstructionDirFinalize:
         assert construction_dir_summary.pkg_name == orig_pkg_name
         assert len(construction_dir_summary.dists) == num_dists
 
+    def test_srepkg_name_keeps_metadata_spelling(self, tmp_construction_dir):
+        # Normalized wheel file name, but the project spells its name
+        # My-Pkg.
+        wheel_path = (
+            tmp_construction_dir.orig_pkg_dists
+            / "my_pkg-0.0.0-py3-none-any.whl"
+        )
+        with zipfile.ZipFile(self._pkg_refs.testproj_whl) as orig_zip:
+            with zipfile.ZipFile(wheel_path, "w") as new_zip:
+                for item in orig_zip.infolist():
+                    contents = orig_zip.read(item)
+                    if item.filename.endswith(".dist-info/METADATA"):
+                        contents = contents.replace(
+                            b"Name: testproj", b"Name: My-Pkg"
+                        )
+                    new_zip.writestr(
+                        item.filename.replace(
+                            "testproj-0.0.0.dist-info",
+                            "my_pkg-0.0.0.dist-info",
+                        ),
+                        contents,
+                    )
+
+        summary = tmp_construction_dir.finalize()
+        assert tmp_construction_dir.orig_pkg_name == "my_pkg"
+        assert summary.pkg_name == "My_Pkg"
+        assert summary.srepkg_name == "My_Pkgsrepkg"
+        assert summary.srepkg_root.name == "My_Pkg_as_My_Pkgsrepkg"
+
     def test_get_dist_info_no_supported_dist_types(self):
         construction_dir = cdn.TempConstructionDir()
         construction_dir._supported_dist_types = []
         result = construction_dir._get_dist_info(self._pkg_refs.testproj)
         assert result is None
 
+    @pytest.mark.parametrize(
+        "orig_dists, num_parsed",
+        [
+            (["testproj_whl"], 1),
+            (["testproj_whl", "testproj_targz"], 2),
+            # wheel is built from the sdist
+            (["testproj_targz"], 2),
+            # wheel is rebuilt to fix a console script name with a dash
+            (["testprojhyphenentry_whl"], 2),
+        ],
+    )
+    def test_each_dist_parsed_once(
+        self, orig_dists, num_parsed, tmp_construction_dir, mocker
+    ):
+        for orig_dist in orig_dists:
+            shutil.copy2(
+                getattr(self._pkg_refs, orig_dist),
+                tmp_construction_dir.orig_pkg_dists,
+            )
+        get_dist_info_spy = mocker.spy(tmp_construction_dir, "_get_dist_info")
+        summary = tmp_construction_dir.finalize()
+        assert summary.has_wheel
+        assert summary.wheel_path.parent == summary.orig_pkg_dists
+        assert get_dist_info_spy.call_count == num_parsed
+
+    def test_wheel_indexed_once(self, tmp_construction_dir, mocker):
+        shutil.copy2(
+            self._pkg_refs.testproj_whl, tmp_construction_dir.orig_pkg_dists
+        )
+        load_spy = mocker.spy(wi.WheelIndex, "_load")
+        summary = tmp_construction_dir.finalize()
+        assert load_spy.call_count == 1
+        assert (
+            tmp_construction_dir.wheel_index.wheel_path == summary.wheel_path
+        )
+
+    def test_dists_relisted_when_orig_dist_changes(self, tmp_construction_dir):
+        shutil.copy2(
+            self._pkg_refs.testproj_whl, tmp_construction_dir.orig_pkg_dists
+        )
+        assert not tmp_construction_dir.has_sdist
+        shutil.copy2(
+            self._pkg_refs.testproj_targz, tmp_construction_dir.orig_pkg_dists
+        )
+        tmp_construction_dir.invalidate_dists()
+        assert tmp_construction_dir.has_sdist
+        assert len(tmp_construction_dir.dists) == 2
+
     def test_multiple_packages(self, sample_pkgs):
         service_builder = sb.ServiceBuilder(
             rep_int.SrepkgCommand(orig_pkg_ref=self._pkg_refs.testproj)
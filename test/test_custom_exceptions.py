@@ -22,11 +22,20 @@ class TestCustomExceptions:
             (ce.GitCloneError, ("dummy_repo",)),
             (ce.UnusableGitCommitRef, ("dummy_commit_ref",)),
             (ce.UnusableVersionArgument, ("dummy_version_arg",)),
+            (ce.PyPIVersionNotFound, ("dummy_pkg", "dummy_version_arg")),
             (
                 ce.PkgVersionWithCommitRef,
                 ("dummy_commit_ref", "dummy_pkg_version"),
             ),
             (ce.WheelUnpackError, ("dummy_wheel",)),
+            (ce.RangeRequestsNotSupported, ("dummy_url",)),
+            (ce.BuildEnvCreationError, ("",)),
+            (ce.BuildWorkerError, ({},)),
+            (
+                ce.DistDigestMismatch,
+                ("dummy_url", "dummy_expected", "dummy_actual"),
+            ),
+            (ce.MissingGitSubdirectory, ("dummy_url", "dummy_subdirectory")),
         ],
     )
     def test_exception_init_and_print(
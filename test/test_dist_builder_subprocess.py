@@ -1,5 +1,13 @@
+import io
+import json
+import os
+import pytest
+import srepkg.dist_builder as db
 import srepkg.dist_builder_sub_process as dbs
+import srepkg.error_handling.custom_exceptions as ce
+import srepkg.utils.dist_archive_file_tools as daft
 import tempfile
+from pathlib import Path
 from test.shared_fixtures import sample_pkgs
 
 
@@ -11,3 +19,165 @@ def test_dist_builder_subprocess(sample_pkgs):
     assert dist_path.name.endswith(".whl")
 
 
+def test_dist_builder_subprocess_reports_path(sample_pkgs, tmp_path, capsys):
+    dist_path = dbs.main(("wheel", sample_pkgs.testproj, str(tmp_path)))
+    reported = [
+        json.loads(line)
+        for line in capsys.readouterr().out.splitlines()
+        if line.startswith("{")
+    ]
+    assert reported[-1] == {dbs.DIST_PATH_KEY: str(dist_path.absolute())}
+
+
+class TestDistBuilder:
+
+    def test_uses_reported_path(self, sample_pkgs, tmp_path, mocker):
+        (tmp_path / "unrelated-0.0.0-py3-none-any.whl").write_bytes(b"")
+        spy = mocker.spy(daft.ArchiveIdentifier, "id_dist_type")
+        wheel_path = db.DistBuilder(
+            distribution="wheel",
+            source_dir=Path(sample_pkgs.testproj),
+            output_directory=tmp_path,
+        ).build()
+        assert wheel_path.name == "testproj-0.0.0-py3-none-any.whl"
+        spy.assert_not_called()
+
+    def test_fallback_detection(self, sample_pkgs, tmp_path, mocker):
+        (tmp_path / "notes.txt").write_text("not a distribution")
+        mocker.patch.object(
+            db.DistBuilder, "_reported_dist_paths", return_value=[]
+        )
+        sdist_path = db.DistBuilder(
+            distribution="sdist",
+            source_dir=Path(sample_pkgs.testproj),
+            output_directory=tmp_path,
+        ).build()
+        assert sdist_path.name == "testproj-0.0.0.tar.gz"
+
+    def test_sdist_and_wheel_fallback_detection(
+        self, sample_pkgs, tmp_path, mocker
+    ):
+        mocker.patch.object(
+            db.DistBuilder, "_reported_dist_paths", return_value=[]
+        )
+        dist_paths = db.DistBuilder(
+            distribution=dbs.SDIST_AND_WHEEL,
+            source_dir=Path(sample_pkgs.testproj),
+            output_directory=tmp_path,
+        ).build_dists()
+        assert [item.name for item in dist_paths] == [
+            "testproj-0.0.0.tar.gz",
+            "testproj-0.0.0-py3-none-any.whl",
+        ]
+
+
+def test_sdist_and_wheel_from_one_pass(sample_pkgs, tmp_path, capsys):
+    wheel_path = dbs.main(
+        (dbs.SDIST_AND_WHEEL, sample_pkgs.testproj, str(tmp_path))
+    )
+    reported = [
+        json.loads(line)[dbs.DIST_PATH_KEY]
+        for line in capsys.readouterr().out.splitlines()
+        if line.startswith("{")
+    ]
+    assert [Path(item).name for item in reported] == [
+        "testproj-0.0.0.tar.gz",
+        "testproj-0.0.0-py3-none-any.whl",
+    ]
+    assert Path(reported[-1]) == wheel_path.absolute()
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_serve_reports_result_per_job(sample_pkgs, tmp_path):
+    jobs = [
+        {
+            "distribution": "wheel",
+            "source_dir": sample_pkgs.testproj,
+            "output_directory": str(tmp_path),
+        },
+        {
+            "distribution": "wheel",
+            "source_dir": str(tmp_path / "missing"),
+            "output_directory": str(tmp_path),
+        },
+    ]
+    job_stream = io.StringIO("".join(json.dumps(job) + "\n" for job in jobs))
+    result_stream = io.StringIO()
+    dbs.serve(job_stream=job_stream, result_stream=result_stream)
+    results = [
+        json.loads(line) for line in result_stream.getvalue().splitlines()
+    ]
+    assert Path(results[0][dbs.DIST_PATH_KEY]).exists()
+    assert dbs.BUILD_ERROR_KEY in results[1]
+
+
+def test_isolated_env_runner_puts_env_scripts_on_path(tmp_path):
+    environs = []
+    runner = dbs.isolated_env_runner(
+        str(tmp_path / "bin" / "python"),
+        runner=lambda cmd, cwd, extra_environ: environs.append(extra_environ),
+    )
+    runner(["backend_hook"], None, {"PEP517_BUILD_BACKEND": "setuptools"})
+    [environ] = environs
+    assert environ["PATH"].split(os.pathsep)[0] == str(tmp_path / "bin")
+    assert environ["PEP517_BUILD_BACKEND"] == "setuptools"
+
+
+class TestBuildWorker:
+
+    def test_session_uses_one_worker(self, sample_pkgs, tmp_path):
+        with db.build_worker_session() as worker:
+            worker_pid = worker._process.pid
+            with db.build_worker_session() as nested_worker:
+                assert nested_worker is worker
+            dist_paths = [
+                db.DistBuilder(
+                    distribution=distribution,
+                    source_dir=Path(sample_pkgs.testproj),
+                    output_directory=tmp_path,
+                ).build()
+                for distribution in ("wheel", "sdist")
+            ]
+            assert worker._process.pid == worker_pid
+        assert not worker.is_running
+        assert db._active_worker is None
+        assert {path.name for path in dist_paths} == {
+            "testproj-0.0.0-py3-none-any.whl",
+            "testproj-0.0.0.tar.gz",
+        }
+
+    def test_sdist_and_wheel_in_one_job(self, sample_pkgs, tmp_path):
+        with db.build_worker_session():
+            dist_paths = db.DistBuilder(
+                distribution=dbs.SDIST_AND_WHEEL,
+                source_dir=Path(sample_pkgs.tproj_non_pure_py),
+                output_directory=tmp_path,
+            ).build_dists()
+        assert len(dist_paths) == 2
+        assert dist_paths[0].name.endswith(".tar.gz")
+        assert dist_paths[1].name.endswith(".whl")
+        assert all(item.exists() for item in dist_paths)
+
+    def test_failed_job_keeps_worker_alive(self, sample_pkgs, tmp_path):
+        with db.build_worker_session() as worker:
+            with pytest.raises(ce.BuildWorkerError):
+                db.DistBuilder(
+                    distribution="wheel",
+                    source_dir=tmp_path / "missing",
+                    output_directory=tmp_path / "out",
+                ).build()
+            assert worker.is_running
+            wheel_path = db.DistBuilder(
+                distribution="wheel",
+                source_dir=Path(sample_pkgs.testproj),
+                output_directory=tmp_path / "out",
+            ).build()
+        assert wheel_path.exists()
+
+    def test_submit_without_start(self, tmp_path):
+        with pytest.raises(ce.BuildWorkerError):
+            db.BuildWorker().submit(
+                distribution="wheel",
+                source_dir=tmp_path,
+                output_directory=tmp_path,
+            )
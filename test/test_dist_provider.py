@@ -1,8 +1,13 @@
 import pytest
 import srepkg.dist_provider as d_prov
-import tempfile
+import srepkg.error_handling.custom_exceptions as ce
 from pathlib import Path
-from test.shared_fixtures import sample_pkgs, tmp_construction_dir
+from test.shared_fixtures import (
+    git_for_tests,
+    local_bare_git_repo,
+    sample_pkgs,
+    tmp_construction_dir,
+)
 
 
 class TestDistProvider:
@@ -36,8 +41,101 @@ class TestDistProvider:
             == num_orig_pkgs
         )
 
-    def test_null_github_repo(self):
-        src_path = Path(tempfile.TemporaryDirectory().name)
-        dest_path = Path(tempfile.TemporaryDirectory().name)
-        null_git_dist_provider = d_prov.DistProviderFromGitRepo(src_path, dest_path)
-        null_git_dist_provider.checkout_commit_ref()
+    @pytest.mark.parametrize(
+        "src_path, wheel_from_sdist, expected_distributions, num_orig_pkgs",
+        [
+            ("testproj", False, ["wheel"], 1),
+            ("tproj_non_pure_py", False, ["wheel", "sdist"], 2),
+            ("testproj", True, [d_prov.dbs.SDIST_AND_WHEEL], 1),
+            ("tproj_non_pure_py", True, [d_prov.dbs.SDIST_AND_WHEEL], 2),
+        ],
+    )
+    def test_wheel_from_sdist(
+        self,
+        src_path,
+        wheel_from_sdist,
+        expected_distributions,
+        num_orig_pkgs,
+        tmp_construction_dir,
+        sample_pkgs,
+        mocker,
+    ):
+        build_spy = mocker.spy(d_prov.db.DistBuilder, "build_dists")
+        d_prov.DistProviderFromSrc(
+            src_path=Path(getattr(sample_pkgs, src_path)),
+            dest_path=tmp_construction_dir.orig_pkg_dists,
+            wheel_from_sdist=wheel_from_sdist,
+        ).run()
+        assert [
+            call.args[0]._distribution for call in build_spy.call_args_list
+        ] == expected_distributions
+        assert (
+            len(list(tmp_construction_dir.orig_pkg_dists.iterdir()))
+            == num_orig_pkgs
+        )
+
+    def test_github_repo_checkout(self, local_bare_git_repo, tmp_path):
+        # Builds whatever the retriever checked out.
+        dest_path = tmp_path / "dists"
+        dest_path.mkdir()
+        d_prov.DistProviderFromGitRepo(
+            src_path=local_bare_git_repo.work_dir, dest_path=dest_path
+        ).run()
+        assert [item.suffix for item in dest_path.iterdir()] == [".whl"]
+
+
+class TestDistProviderFromLocalGitRepo:
+
+    @pytest.mark.parametrize(
+        "git_ref, expected_release",
+        [(None, "main"), ("v0.1", "v0.1"), ("feature", "feature")],
+    )
+    def test_builds_from_worktree_at_ref(
+        self, git_ref, expected_release, local_bare_git_repo, tmp_path, mocker
+    ):
+        repo_path = local_bare_git_repo.work_dir
+        (repo_path / "release.txt").write_text("uncommitted")
+        built_from = []
+
+        def fake_build(provider):
+            src_path = provider._src_path
+            built_from.append(
+                (src_path, (src_path / "release.txt").read_text())
+            )
+            return []
+
+        mocker.patch.object(d_prov.DistProviderFromSrc, "_build", fake_build)
+        d_prov.DistProviderFromLocalGitRepo(
+            repo_path=repo_path, dest_path=tmp_path, git_ref=git_ref
+        ).run()
+
+        [(src_path, release)] = built_from
+        assert release == expected_release
+        assert src_path != repo_path
+        assert not src_path.exists()
+        assert (repo_path / "release.txt").read_text() == "uncommitted"
+        assert (
+            len(git_for_tests("worktree", "list", cwd=repo_path).splitlines())
+            == 1
+        )
+
+    def test_build(self, local_bare_git_repo, tmp_construction_dir):
+        provider = d_prov.DistProviderFromLocalGitRepo(
+            repo_path=local_bare_git_repo.work_dir,
+            dest_path=tmp_construction_dir.orig_pkg_dists,
+            git_ref="v0.1",
+        )
+        provider.run()
+        assert [
+            item.suffix
+            for item in tmp_construction_dir.orig_pkg_dists.iterdir()
+        ] == [".whl"]
+
+    def test_bad_ref(self, local_bare_git_repo, tmp_path):
+        provider = d_prov.DistProviderFromLocalGitRepo(
+            repo_path=local_bare_git_repo.work_dir,
+            dest_path=tmp_path,
+            git_ref="no-such-ref",
+        )
+        with pytest.raises(ce.GitCheckoutError):
+            provider.run()
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import srepkg.download_cache as dc
+import srepkg.utils.cache_dirs as cd
+from test.shared_fixtures import local_range_http_server
+
+
+class TestDownloadCache:
+
+    content = os.urandom(200 * 1024)
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    def serve(self, served) -> str:
+        serve_dir, base_url = served
+        (serve_dir / "dummy-0.1-py3-none-any.whl").write_bytes(self.content)
+        return f"{base_url}/dummy-0.1-py3-none-any.whl"
+
+    def test_miss_then_hit_links_cached_file(
+        self, local_range_http_server, tmp_path
+    ):
+        url = self.serve(local_range_http_server)
+        cache = dc.DownloadCache(cache_dir=tmp_path / "cache")
+        first_dest = tmp_path / "first"
+        second_dest = tmp_path / "second"
+        first_dest.mkdir()
+        second_dest.mkdir()
+
+        first = cache.get(url, url.split("/")[-1], self.sha256, first_dest)
+        (local_range_http_server[0] / first.name).unlink()
+        second = cache.get(url, first.name, self.sha256, second_dest)
+
+        assert second.read_bytes() == self.content
+        assert first.stat().st_ino == second.stat().st_ino
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert not (
+            tmp_path / "cache" / dc.PARTIAL_DIR_NAME / self.sha256
+        ).exists()
+
+    def test_partial_download_kept_for_next_run(
+        self, local_range_http_server, tmp_path
+    ):
+        url = self.serve(local_range_http_server)
+        cache = dc.DownloadCache(cache_dir=tmp_path / "cache")
+        partial_dir = tmp_path / "cache" / dc.PARTIAL_DIR_NAME / self.sha256
+        partial_dir.mkdir(parents=True)
+        filename = url.split("/")[-1]
+        (partial_dir / f"{filename}.part").write_bytes(self.content[:50000])
+        (partial_dir / f"{filename}.part.json").write_text(
+            f'{{"url": "{url}", "sha256": "{self.sha256}"}}'
+        )
+        received = []
+
+        dest = cache.get(
+            url, filename, self.sha256, tmp_path, on_bytes=received.append
+        )
+
+        assert dest.read_bytes() == self.content
+        assert sum(received) == len(self.content)
+        assert not partial_dir.exists()
+
+    def test_locked_partial_downloads_private_copy(
+        self, local_range_http_server, tmp_path
+    ):
+        url = self.serve(local_range_http_server)
+        cache = dc.DownloadCache(cache_dir=tmp_path / "cache")
+        partial_dir = tmp_path / "cache" / dc.PARTIAL_DIR_NAME / self.sha256
+        partial_dir.mkdir(parents=True)
+        (partial_dir / dc.LOCK_FILENAME).touch()
+
+        dest = cache.get(url, url.split("/")[-1], self.sha256, tmp_path)
+
+        assert dest.read_bytes() == self.content
+        assert (partial_dir / dc.LOCK_FILENAME).exists()
+        assert not list((tmp_path / "cache").glob(".staging_*"))
+
+    def test_evicts_least_recently_used_over_max_bytes(self, tmp_path):
+        cache = dc.DownloadCache(cache_dir=tmp_path / "cache", max_bytes=250)
+        lru_dir = cd.LruCacheDir(root=tmp_path / "cache", max_entries=None)
+        for key in ["old", "new"]:
+            staging_dir = lru_dir.staging_dir()
+            (staging_dir / f"{key}.whl").write_bytes(b"x" * 100)
+            lru_dir.publish(staging_dir, key)
+
+        staging_dir = lru_dir.staging_dir()
+        (staging_dir / "newest.whl").write_bytes(b"x" * 100)
+        cache.evict(keep=lru_dir.publish(staging_dir, "newest"))
+
+        assert sorted(entry.name for entry in lru_dir.entries) == [
+            "new",
+            "newest",
+        ]
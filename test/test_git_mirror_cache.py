@@ -0,0 +1,129 @@
+import subprocess
+import pytest
+import srepkg.error_handling.custom_exceptions as ce
+import srepkg.git_mirror_cache as gmc
+import srepkg.remote_pkg_retriever as rpr
+from test.shared_fixtures import git_for_tests, local_bare_git_repo
+
+
+class TestGitMirrorCache:
+
+    @staticmethod
+    def head(worktree) -> str:
+        return subprocess.run(
+            ["git", "-C", str(worktree), "rev-parse", "HEAD"],
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout.strip()
+
+    def test_mirror_reused_and_fetched(
+        self, local_bare_git_repo, tmp_path, mocker
+    ):
+        cache = gmc.GitMirrorCache(cache_dir=tmp_path / "cache")
+        clone_spy = mocker.spy(cache, "_clone")
+        fetch_spy = mocker.spy(cache, "_fetch")
+        repo = local_bare_git_repo
+
+        cache.add_worktree(repo.url, "main", tmp_path / "first")
+        assert self.head(tmp_path / "first") == repo.main_commit
+        assert (tmp_path / "first" / ".git").is_file()
+
+        (repo.work_dir / "release.txt").write_text("main 2")
+        git_for_tests("commit", "-q", "-am", "main 2", cwd=repo.work_dir)
+        git_for_tests("push", "-q", "origin", "main", cwd=repo.work_dir)
+        new_commit = git_for_tests("rev-parse", "HEAD", cwd=repo.work_dir)
+
+        cache.add_worktree(repo.url, "main", tmp_path / "second")
+        assert self.head(tmp_path / "second") == new_commit
+        assert (tmp_path / "second" / "release.txt").read_text() == "main 2"
+        assert clone_spy.call_count == 1
+        assert fetch_spy.call_count == 1
+
+    def test_mirror_is_blobless_and_branches_only(
+        self, local_bare_git_repo, tmp_path
+    ):
+        cache = gmc.GitMirrorCache(cache_dir=tmp_path / "cache")
+        mirror = cache.update(local_bare_git_repo.url)
+        assert (
+            git_for_tests(
+                "config", "remote.origin.partialclonefilter", cwd=mirror
+            )
+            == "blob:none"
+        )
+        assert (
+            git_for_tests("config", "remote.origin.fetch", cwd=mirror)
+            == gmc.MIRROR_REFSPEC
+        )
+
+    @pytest.mark.parametrize(
+        "git_ref, expected_commit",
+        [
+            (None, "main_commit"),
+            ("feature", "feature_commit"),
+            ("v0.1", "tagged_commit"),
+        ],
+    )
+    def test_worktree_at_ref(
+        self, git_ref, expected_commit, local_bare_git_repo, tmp_path
+    ):
+        cache = gmc.GitMirrorCache(cache_dir=tmp_path / "cache")
+        retriever = rpr.GithubPkgRetriever(
+            pkg_ref=local_bare_git_repo.url,
+            git_ref=git_ref,
+            git_mirror_cache=cache,
+        )
+        retriever.run()
+        assert self.head(retriever.copy_dest) == getattr(
+            local_bare_git_repo, expected_commit
+        )
+
+    def test_worktrees_of_deleted_dirs_pruned(
+        self, local_bare_git_repo, tmp_path
+    ):
+        cache = gmc.GitMirrorCache(cache_dir=tmp_path / "cache")
+        for _ in range(2):
+            retriever = rpr.GithubPkgRetriever(
+                pkg_ref=local_bare_git_repo.url,
+                git_mirror_cache=cache,
+            )
+            retriever.run()
+            del retriever
+        mirror = cache.mirror_path(local_bare_git_repo.url)
+        assert len(list((mirror / "worktrees").iterdir())) == 1
+
+    def test_unknown_ref(self, local_bare_git_repo, tmp_path):
+        cache = gmc.GitMirrorCache(cache_dir=tmp_path / "cache")
+        with pytest.raises(ce.GitCheckoutError):
+            cache.add_worktree(
+                local_bare_git_repo.url, "no-such-ref", tmp_path / "dest"
+            )
+
+    def test_least_recently_used_mirror_evicted(
+        self, local_bare_git_repo, tmp_path
+    ):
+        cache = gmc.GitMirrorCache(cache_dir=tmp_path / "cache", max_entries=1)
+        first = cache.update(local_bare_git_repo.url)
+        second = cache.update(local_bare_git_repo.url.rstrip("/") + "/")
+        assert not first.exists()
+        assert second.exists()
+
+    def test_failed_clone_leaves_no_staging_dir(self, tmp_path):
+        cache = gmc.GitMirrorCache(cache_dir=tmp_path / "cache")
+        with pytest.raises(ce.GitCheckoutError):
+            cache.update((tmp_path / "no_such_repo").as_uri())
+        assert list((tmp_path / "cache").iterdir()) == []
+
+    def test_spinner_names_mirror_update(self, local_bare_git_repo, tmp_path):
+        retriever = rpr.GithubPkgRetriever(
+            pkg_ref=local_bare_git_repo.url,
+            git_ref="v0.1",
+            git_mirror_cache=gmc.GitMirrorCache(cache_dir=tmp_path / "cache"),
+        )
+        assert retriever._spinner_msg == (
+            f"Updating cached git mirror of {local_bare_git_repo.url} and "
+            f"checking out v0.1"
+        )
+        assert rpr.GithubPkgRetriever(
+            pkg_ref=local_bare_git_repo.url
+        )._spinner_msg.startswith("Cloning")
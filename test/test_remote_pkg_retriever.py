@@ -1,8 +1,25 @@
+import hashlib
+import subprocess
+import threading
 import pytest
+from pathlib import Path
 from unittest import mock
 from packaging.utils import parse_wheel_filename
+import srepkg.download_cache as dc
+import srepkg.error_handling.custom_exceptions as ce
+import srepkg.git_mirror_cache as gmc
 import srepkg.remote_pkg_retriever as rpr
-from test.shared_fixtures import sample_pkgs, tmp_construction_dir
+from packaging.tags import sys_tags
+from test.shared_fixtures import (
+    byte_counting_http_server,
+    git_for_tests,
+    local_bare_git_repo,
+    local_http_server,
+    local_range_http_server,
+    sample_pkgs,
+    tmp_construction_dir,
+    write_large_wheel,
+)
 
 
 class TestRemotePackageRetriever:
@@ -78,3 +95,389 @@ class TestPyPIPkgRetriever:
     def test_only_sdist(self, tmp_path):
         retriever = rpr.PyPIPkgRetriever(pkg_ref="howdoi", copy_dest=tmp_path)
         retriever.run()
+
+    @staticmethod
+    def _served_dist(serve_dir, base_url, sha256: str = None):
+        content = b"dist contents" * 100000
+        (serve_dir / "dummy-0.1.tar.gz").write_bytes(content)
+        return {
+            "filename": "dummy-0.1.tar.gz",
+            "url": f"{base_url}/dummy-0.1.tar.gz",
+            "digests": {
+                "sha256": sha256 or hashlib.sha256(content).hexdigest()
+            },
+        }
+
+    def test_download_verifies_digest(self, tmp_path, local_http_server):
+        dist = self._served_dist(*local_http_server)
+        copy_dest = tmp_path / "dest"
+        copy_dest.mkdir()
+        retriever = rpr.PyPIPkgRetriever(pkg_ref="dummy", copy_dest=copy_dest)
+        retriever._download(dist)
+        assert [item.name for item in copy_dest.iterdir()] == [
+            "dummy-0.1.tar.gz"
+        ]
+        assert (
+            hashlib.sha256(
+                (copy_dest / "dummy-0.1.tar.gz").read_bytes()
+            ).hexdigest()
+            == dist["digests"]["sha256"]
+        )
+
+    def test_download_digest_mismatch(self, tmp_path, local_http_server):
+        dist = self._served_dist(*local_http_server, sha256="0" * 64)
+        copy_dest = tmp_path / "dest"
+        copy_dest.mkdir()
+        retriever = rpr.PyPIPkgRetriever(pkg_ref="dummy", copy_dest=copy_dest)
+        with pytest.raises(ce.DistDigestMismatch):
+            retriever._download(dist)
+        assert list(copy_dest.iterdir()) == []
+
+    class DummyUpdater:
+        def __init__(self):
+            self.spinner = mock.Mock(text="Retrieving dummy")
+            self.texts = []
+
+        def set_text(self, text: str):
+            self.texts.append(text)
+
+    def test_downloads_run_concurrently(self, tmp_path, mocker):
+        barrier = threading.Barrier(2, timeout=10)
+
+        def download(retriever, dist, progress=None):
+            # Only returns if both downloads are in progress at once.
+            barrier.wait()
+            (retriever._copy_dest / dist["filename"]).write_bytes(b"")
+
+        mocker.patch.object(
+            rpr.PyPIPkgRetriever,
+            "_download",
+            autospec=True,
+            side_effect=download,
+        )
+        dists = [
+            {"filename": "dummy-0.1.tar.gz"},
+            {"filename": "dummy-0.1-cp311-cp311-linux_x86_64.whl"},
+        ]
+        retriever = rpr.PyPIPkgRetriever(pkg_ref="dummy", copy_dest=tmp_path)
+        retriever._download_all(dists, self.DummyUpdater())
+        assert len(list(tmp_path.iterdir())) == 2
+
+    def test_download_progress_aggregated(self, tmp_path, local_http_server):
+        serve_dir, base_url = local_http_server
+        dists = []
+        for filename in ["dummy-0.1.tar.gz", "dummy-0.1-py3-none-any.whl"]:
+            (serve_dir / filename).write_bytes(b"x" * 1024)
+            dists.append(
+                {
+                    "filename": filename,
+                    "url": f"{base_url}/{filename}",
+                    "size": 1024,
+                }
+            )
+        copy_dest = tmp_path / "dest"
+        copy_dest.mkdir()
+        updater = self.DummyUpdater()
+        retriever = rpr.PyPIPkgRetriever(pkg_ref="dummy", copy_dest=copy_dest)
+        retriever._download_all(dists, updater)
+        assert sorted(item.name for item in copy_dest.iterdir()) == sorted(
+            dist["filename"] for dist in dists
+        )
+        assert updater.texts[-1].startswith("Retrieving dummy (2/2 files")
+
+    @staticmethod
+    def _large_wheel_dist(serve_dir, base_url, sample_pkgs, **kwargs):
+        filename = "testproj-0.0.0-py3-none-any.whl"
+        write_large_wheel(
+            Path(sample_pkgs.testproj_whl), serve_dir / filename, **kwargs
+        )
+        return {
+            "filename": filename,
+            "url": f"{base_url}/{filename}",
+            "packagetype": "bdist_wheel",
+            "size": (serve_dir / filename).stat().st_size,
+        }
+
+    def test_no_entry_points_fails_before_download(
+        self, tmp_path, sample_pkgs, local_range_http_server, mocker
+    ):
+        dist = self._large_wheel_dist(
+            *local_range_http_server,
+            sample_pkgs,
+            skip_member="testproj-0.0.0.dist-info/entry_points.txt",
+        )
+        copy_dest = tmp_path / "dest"
+        copy_dest.mkdir()
+        spy = mocker.spy(rpr.PyPIPkgRetriever, "_download")
+        retriever = rpr.PyPIPkgRetriever(
+            pkg_ref="testproj",
+            copy_dest=copy_dest,
+            pkg_metadata={"urls": [dist]},
+        )
+        with pytest.raises(ce.NoEntryPtsTxtFile):
+            retriever.run()
+        spy.assert_not_called()
+        assert list(copy_dest.iterdir()) == []
+
+    def test_probe_skipped_without_range_support(
+        self, tmp_path, sample_pkgs, byte_counting_http_server
+    ):
+        serve_dir, base_url, bytes_served = byte_counting_http_server
+        dist = self._large_wheel_dist(serve_dir, base_url, sample_pkgs)
+        copy_dest = tmp_path / "dest"
+        copy_dest.mkdir()
+        rpr.PyPIPkgRetriever(
+            pkg_ref="testproj",
+            copy_dest=copy_dest,
+            pkg_metadata={"urls": [dist]},
+        ).run()
+        assert [item.name for item in copy_dest.iterdir()] == [
+            dist["filename"]
+        ]
+        # The probe's 200 response is closed unread, so the wheel is sent
+        # in full only once (plus what fits in socket buffers).
+        assert bytes_served[f"/{dist['filename']}"] < 1.5 * dist["size"]
+
+    def test_cached_wheel_not_probed(
+        self, tmp_path, sample_pkgs, local_range_http_server, mocker
+    ):
+        serve_dir, base_url = local_range_http_server
+        dist = self._large_wheel_dist(serve_dir, base_url, sample_pkgs)
+        dist["digests"] = {
+            "sha256": hashlib.sha256(
+                (serve_dir / dist["filename"]).read_bytes()
+            ).hexdigest()
+        }
+        download_cache = dc.DownloadCache(cache_dir=tmp_path / "cache")
+        probe_spy = mocker.spy(rpr.PyPIPkgRetriever, "_probe_wheel")
+
+        for run_num in range(2):
+            copy_dest = tmp_path / f"dest_{run_num}"
+            copy_dest.mkdir()
+            rpr.PyPIPkgRetriever(
+                pkg_ref="testproj",
+                copy_dest=copy_dest,
+                pkg_metadata={"urls": [dist]},
+                download_cache=download_cache,
+            ).run()
+
+        assert probe_spy.call_count == 1
+        assert download_cache.hits == 1
+
+
+class TestWheelSelection:
+
+    @staticmethod
+    def _wheel_entry(tag) -> dict:
+        return {
+            "filename": f"dummy-0.1-{tag.interpreter}-{tag.abi}-"
+            f"{tag.platform}.whl",
+            "packagetype": "bdist_wheel",
+        }
+
+    @staticmethod
+    def _retriever(tmp_path, dists) -> rpr.PyPIPkgRetriever:
+        return rpr.PyPIPkgRetriever(
+            pkg_ref="dummy", copy_dest=tmp_path, pkg_metadata={"urls": dists}
+        )
+
+    @property
+    def platform_tags(self):
+        return [tag for tag in sys_tags() if tag.platform != "any"]
+
+    def test_best_ranked_platform_wheel_selected(self, tmp_path):
+        if len(self.platform_tags) < 2:
+            pytest.skip("Needs at least two platform specific system tags")
+        best_tag = self.platform_tags[0]
+        dists = [self._wheel_entry(tag) for tag in self.platform_tags[1:150]]
+        dists.insert(len(dists) // 2, self._wheel_entry(best_tag))
+        dists.append({"filename": "dummy-0.1.tar.gz", "packagetype": "sdist"})
+        selected = self._retriever(tmp_path, dists)._dists_to_download
+        assert selected[-1] == self._wheel_entry(best_tag)
+
+    def test_all_tags_of_compressed_tag_set_scored(self, tmp_path):
+        if not self.platform_tags:
+            pytest.skip("Needs a platform specific system tag")
+        tag = self.platform_tags[0]
+        compressed = {
+            "filename": f"dummy-0.1-{tag.interpreter}-{tag.abi}-"
+            f"unsupported_platform.{tag.platform}.whl",
+            "packagetype": "bdist_wheel",
+        }
+        retriever = self._retriever(tmp_path, [compressed])
+        assert retriever._platform_specific_wheels_for_cur_sys == [compressed]
+
+    def test_pure_wheel_ranked_by_priority(self, tmp_path):
+        dists = [
+            {
+                "filename": "dummy-0.1-py2-none-any.whl",
+                "packagetype": "bdist_wheel",
+            },
+            {
+                "filename": "dummy-0.1-py2.py3-none-any.whl",
+                "packagetype": "bdist_wheel",
+            },
+        ]
+        assert self._retriever(tmp_path, dists)._dists_to_download == [
+            dists[1]
+        ]
+
+    def test_tag_index_built_once(self, tmp_path, mocker):
+        rpr.sys_tag_priorities.cache_clear()
+        spy = mocker.spy(rpr, "sys_tags")
+        dists = [self._wheel_entry(tag) for tag in self.platform_tags[:100]]
+        for _ in range(3):
+            self._retriever(tmp_path, dists)._dists_to_download
+        assert spy.call_count == 1
+
+
+class TestGithubPkgRetriever:
+
+    @staticmethod
+    def git_output(retriever: rpr.GithubPkgRetriever, *args: str) -> str:
+        return subprocess.run(
+            ["git", "-C", str(retriever.copy_dest), *args],
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout.strip()
+
+    def is_shallow(self, retriever: rpr.GithubPkgRetriever) -> bool:
+        return (
+            self.git_output(retriever, "rev-parse", "--is-shallow-repository")
+            == "true"
+        )
+
+    @pytest.mark.parametrize(
+        "git_ref, expected_release, expected_commit",
+        [
+            (None, "main", "main_commit"),
+            ("feature", "feature", "feature_commit"),
+            ("v0.1", "v0.1", "tagged_commit"),
+        ],
+    )
+    def test_branch_or_tag_is_shallow(
+        self,
+        git_ref,
+        expected_release,
+        expected_commit,
+        local_bare_git_repo,
+    ):
+        retriever = rpr.GithubPkgRetriever(
+            pkg_ref=local_bare_git_repo.url, git_ref=git_ref
+        )
+        retriever.run()
+        assert self.is_shallow(retriever)
+        assert self.git_output(retriever, "rev-parse", "HEAD") == getattr(
+            local_bare_git_repo, expected_commit
+        )
+        assert (
+            retriever.copy_dest / "release.txt"
+        ).read_text() == expected_release
+
+    @pytest.mark.parametrize("sha_length", [40, 7])
+    def test_commit_sha_partial_clone(self, sha_length, local_bare_git_repo):
+        retriever = rpr.GithubPkgRetriever(
+            pkg_ref=local_bare_git_repo.url,
+            git_ref=local_bare_git_repo.tagged_commit[:sha_length],
+        )
+        retriever.run()
+        assert not self.is_shallow(retriever)
+        assert (
+            self.git_output(
+                retriever, "config", "remote.origin.partialclonefilter"
+            )
+            == "blob:none"
+        )
+        assert (
+            self.git_output(retriever, "rev-parse", "HEAD")
+            == local_bare_git_repo.tagged_commit
+        )
+        assert (retriever.copy_dest / "release.txt").read_text() == "v0.1"
+
+    def test_ref_matching_only_tail_of_branch(self, local_bare_git_repo):
+        # ls-remote <sha7> also lists refs/heads/backport/<sha7>, which
+        # isn't a branch git clone --branch <sha7> can check out.
+        short_sha = local_bare_git_repo.tagged_commit[:7]
+        git_for_tests(
+            "push",
+            "-q",
+            "origin",
+            f"main:refs/heads/backport/{short_sha}",
+            cwd=local_bare_git_repo.work_dir,
+        )
+        retriever = rpr.GithubPkgRetriever(
+            pkg_ref=local_bare_git_repo.url, git_ref=short_sha
+        )
+        assert not retriever._ref_is_branch_or_tag()
+        retriever.run()
+        assert (
+            self.git_output(retriever, "rev-parse", "HEAD")
+            == local_bare_git_repo.tagged_commit
+        )
+
+    def test_unknown_ref(self, local_bare_git_repo):
+        retriever = rpr.GithubPkgRetriever(
+            pkg_ref=local_bare_git_repo.url, git_ref="no-such-ref"
+        )
+        with pytest.raises(ce.GitCheckoutError):
+            retriever.run()
+
+    @pytest.mark.parametrize(
+        "pkg_ref, expected",
+        [
+            (
+                "https://github.com/org/repo",
+                ("https://github.com/org/repo", None),
+            ),
+            (
+                "git+https://github.com/org/repo#subdirectory=pkgs/cli/",
+                ("https://github.com/org/repo", "pkgs/cli"),
+            ),
+            (
+                "https://github.com/org/repo#egg=cli&subdirectory=pkgs/cli",
+                ("https://github.com/org/repo", "pkgs/cli"),
+            ),
+        ],
+    )
+    def test_split_git_url(self, pkg_ref, expected):
+        assert rpr.split_git_url(pkg_ref) == expected
+
+    @pytest.mark.parametrize(
+        "git_ref, use_mirror_cache",
+        [
+            (None, False),
+            ("feature", False),
+            ("tagged_commit", False),
+            (None, True),
+            ("tagged_commit", True),
+        ],
+    )
+    def test_subdirectory_sparse_checkout(
+        self, git_ref, use_mirror_cache, local_bare_git_repo, tmp_path
+    ):
+        if git_ref == "tagged_commit":
+            git_ref = local_bare_git_repo.tagged_commit
+        retriever = rpr.GithubPkgRetriever(
+            pkg_ref=f"{local_bare_git_repo.url}#subdirectory=pkgs/testproj",
+            git_ref=git_ref,
+            git_mirror_cache=(
+                gmc.GitMirrorCache(cache_dir=tmp_path / "cache")
+                if use_mirror_cache
+                else None
+            ),
+        )
+        retriever.run()
+        assert retriever.src_path == retriever.copy_dest / "pkgs" / "testproj"
+        assert (retriever.src_path / "setup.py").exists()
+        # cone mode also checks out files at the repo root
+        assert (retriever.copy_dest / "release.txt").exists()
+        assert not (retriever.copy_dest / "docs").exists()
+        assert not (retriever.copy_dest / "src").exists()
+
+    def test_missing_subdirectory(self, local_bare_git_repo):
+        retriever = rpr.GithubPkgRetriever(
+            pkg_ref=f"{local_bare_git_repo.url}#subdirectory=no/such/dir"
+        )
+        with pytest.raises(ce.MissingGitSubdirectory):
+            retriever.run()
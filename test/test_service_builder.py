@@ -6,6 +6,7 @@ import srepkg.srepkg_builder as sbn
 import srepkg.service_builder as sb
 import srepkg.repackager_interfaces as rep_int
 from test.shared_fixtures import (
+    local_bare_git_repo,
     tmp_construction_dir,
     sample_pkgs,
     dummy_cdir_summary,
@@ -71,6 +72,18 @@ class TestRetrieverProviderDispatch:
                 git_ref="dummy_git_ref",
             ).create()
 
+    def test_local_git_repo_with_git_ref(
+        self, tmp_construction_dir, local_bare_git_repo
+    ):
+        retriever_provider = sb.RetrieverProviderDispatch(
+            pkg_ref_command=str(local_bare_git_repo.work_dir),
+            construction_dir=tmp_construction_dir,
+            git_ref="v0.1",
+        ).create()
+        assert [type(item).__name__ for item in retriever_provider] == [
+            "DistProviderFromLocalGitRepo"
+        ]
+
     def test_version_arg_for_non_pypi_pkg_ref(
         self, tmp_construction_dir, sample_pkgs
     ):
@@ -1,10 +1,26 @@
+import hashlib
+import json
+import os
+import tarfile
+import time
 import pytest
+import requests
 from pathlib import Path
 from typing import NamedTuple
+import srepkg.utils.dir_snapshot as dsn
 import srepkg.utils.dist_archive_file_tools as daft
 import srepkg.utils.cd_context_manager as cdcm
+import srepkg.utils.package_index as pi
 import srepkg.utils.pkg_type_identifier as pti
+import srepkg.utils.pypi_client as pc
+import srepkg.utils.resumable_download as rd
+import srepkg.remote_pkg_retriever as rpr
 import srepkg.error_handling.custom_exceptions as ce
+from test.shared_fixtures import (
+    local_bare_git_repo,
+    local_http_server,
+    local_range_http_server,
+)
 
 
 def test_dir_change_to(tmp_path):
@@ -17,6 +33,57 @@ def test_dir_change_to(tmp_path):
     assert Path.cwd() == cwd
 
 
+class TestDirSnapshot:
+
+    @staticmethod
+    def write_old_files(directory: Path, num_files: int):
+        one_day_ago = 86_400
+        for idx in range(num_files):
+            old_file = directory / f"old_{idx}.whl"
+            old_file.write_bytes(b"x" * 100)
+            stat_result = old_file.stat()
+            os.utime(
+                old_file,
+                (
+                    stat_result.st_atime - one_day_ago,
+                    stat_result.st_mtime - one_day_ago,
+                ),
+            )
+
+    @pytest.mark.parametrize("num_files", [1, 50])
+    def test_old_files_never_hashed(self, num_files, tmp_path, mocker):
+        self.write_old_files(tmp_path, num_files)
+        spy = mocker.spy(dsn.DirSnapshot, "_hash_file")
+        snapshot = dsn.DirSnapshot(tmp_path)
+        (tmp_path / "new.whl").write_bytes(b"new")
+        assert snapshot.changed_files() == [tmp_path / "new.whl"]
+        spy.assert_not_called()
+
+    def test_modified_file_detected(self, tmp_path):
+        self.write_old_files(tmp_path, 2)
+        snapshot = dsn.DirSnapshot(tmp_path)
+        (tmp_path / "old_1.whl").write_bytes(b"y" * 150)
+        assert snapshot.changed_files() == [tmp_path / "old_1.whl"]
+
+    def test_racy_file_with_same_stat_key_is_hashed(self, tmp_path):
+        racy_file = tmp_path / "racy.whl"
+        racy_file.write_bytes(b"a" * 10)
+        snapshot = dsn.DirSnapshot(tmp_path)
+        stat_result = racy_file.stat()
+        racy_file.write_bytes(b"b" * 10)
+        os.utime(
+            racy_file, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns)
+        )
+        assert snapshot.changed_files() == [racy_file]
+
+    def test_unchanged_racy_file_not_reported(self, tmp_path):
+        (tmp_path / "racy.whl").write_bytes(b"a" * 10)
+        (tmp_path / "sub_dir").mkdir()
+        snapshot = dsn.DirSnapshot(tmp_path)
+        assert snapshot.files == [tmp_path / "racy.whl"]
+        assert snapshot.changed_files() == []
+
+
 class ExpectedFileDistType(NamedTuple):
     file_name: str
     file_type: daft.ArchiveFileType
@@ -92,6 +159,72 @@ class TestCompressedFileExtractor:
             )
 
 
+class TestDistMetadataReader:
+    test_cases_path = Path(__file__).parent.absolute() / "package_test_cases"
+    reader = daft.DistMetadataReader()
+
+    @pytest.mark.parametrize(
+        "file_name, dist_type, read_from_archive",
+        [
+            ("testproj-0.0.0.tar.gz", daft.ArchiveDistType.SDIST, False),
+            ("testproj-0.0.0.zip", daft.ArchiveDistType.SDIST, True),
+            (
+                "testproj-0.0.0-py3-none-any.whl",
+                daft.ArchiveDistType.WHEEL,
+                False,
+            ),
+            (
+                "TestProj-0.0.0-py3-none-any.whl",
+                daft.ArchiveDistType.WHEEL,
+                True,
+            ),
+            ("Test.Proj-0.0.0.tar.gz", daft.ArchiveDistType.SDIST, True),
+        ],
+    )
+    def test_read(
+        self, file_name, dist_type, read_from_archive, tmp_path, mocker
+    ):
+        orig_name = file_name.replace("TestProj", "testproj").replace(
+            "Test.Proj", "testproj"
+        )
+        dist_path = tmp_path / file_name
+        dist_path.write_bytes((self.test_cases_path / orig_name).read_bytes())
+        from_archive_spy = mocker.spy(self.reader, "_from_archive")
+
+        metadata = self.reader.read(dist_path)
+
+        assert metadata == daft.DistMetadata(dist_type, "testproj", "0.0.0")
+        assert from_archive_spy.called == read_from_archive
+
+    def test_sdist_read_stops_at_pkg_info(self, tmp_path):
+        src_dir = tmp_path / "src" / "My.Pkg-1.0"
+        src_dir.mkdir(parents=True)
+        (src_dir / "PKG-INFO").write_text(
+            "Metadata-Version: 2.1\nName: My.Pkg\nVersion: 1.0\n"
+        )
+        (src_dir / "data.bin").write_bytes(os.urandom(1024 * 1024))
+        sdist_path = tmp_path / "My.Pkg-1.0.tar.gz"
+        with tarfile.open(sdist_path, "w:gz") as tf:
+            tf.add(src_dir / "PKG-INFO", arcname="My.Pkg-1.0/PKG-INFO")
+            tf.add(src_dir / "data.bin", arcname="My.Pkg-1.0/data.bin")
+        # Cut off the end of the archive, which the reader never gets to.
+        sdist_bytes = sdist_path.read_bytes()
+        sdist_path.write_bytes(sdist_bytes[: len(sdist_bytes) // 2])
+
+        assert self.reader.read(sdist_path) == daft.DistMetadata(
+            daft.ArchiveDistType.SDIST, "My.Pkg", "1.0"
+        )
+
+    def test_not_a_dist(self):
+        assert (
+            self.reader.read(
+                self.test_cases_path / "testproj-0.0.0-not-a-distribution.py"
+            )
+            is None
+        )
+        assert self.reader.read(self.test_cases_path / "testproj") is None
+
+
 class BrokenPkgRefIdentifier(pti.PkgRefIdentifier):
     def _check_all_types(self):
         return {
@@ -121,3 +254,483 @@ class TestPkgRefIdentifier:
         )
         pkg_ref_type = pkg_ref_identifier.identify()
         assert pkg_ref_type == pti.PkgRefType.MULTIPLE_POSSIBLE
+
+    def test_local_dist_skips_network_and_git(self, mocker):
+        pti.PkgRefIdentifier.clear_cache()
+        mock_get = mocker.patch.object(pti.pc.PyPIJsonClient, "project_json")
+        mock_run = mocker.patch.object(pti.subprocess, "run")
+        pkg_ref_type = pti.PkgRefIdentifier(
+            str(self.local_test_pkgs_path / "testproj-0.0.0-py3-none-any.whl")
+        ).identify()
+        assert pkg_ref_type == pti.PkgRefType.LOCAL_WHEEL
+        mock_get.assert_not_called()
+        mock_run.assert_not_called()
+
+    def test_github_url_skips_network(self, mocker):
+        pti.PkgRefIdentifier.clear_cache()
+        mock_get = mocker.patch.object(pti.pc.PyPIJsonClient, "project_json")
+        pkg_ref_type = pti.PkgRefIdentifier(
+            "https://github.com/psf/black"
+        ).identify()
+        assert pkg_ref_type == pti.PkgRefType.GIT_REPO
+        mock_get.assert_not_called()
+
+    def test_local_git_repo(self, local_bare_git_repo):
+        pti.PkgRefIdentifier.clear_cache()
+        pkg_ref_type = pti.PkgRefIdentifier(
+            str(local_bare_git_repo.work_dir)
+        ).identify()
+        assert pkg_ref_type == pti.PkgRefType.LOCAL_SRC_GIT
+
+    def test_identify_is_memoized(self, mocker):
+        pti.PkgRefIdentifier.clear_cache()
+        pkg_ref = str(self.local_test_pkgs_path / "testproj")
+        spy = mocker.spy(pti.PkgRefIdentifier, "_check_all_types")
+        for _ in range(3):
+            assert (
+                pti.PkgRefIdentifier(pkg_ref).identify()
+                == pti.PkgRefType.LOCAL_SRC_NONGIT
+            )
+        assert spy.call_count == 1
+
+
+class TestPyPIJsonClient:
+
+    @pytest.fixture
+    def local_pypi(self, local_http_server, mocker, monkeypatch, tmp_path):
+        serve_dir, base_url = local_http_server
+        project_dir = serve_dir / "pypi" / "dummy"
+        project_dir.mkdir(parents=True)
+        (project_dir / "json").write_text(
+            json.dumps(
+                {
+                    "info": {"name": "dummy"},
+                    "urls": [],
+                    "releases": {"0.1": [], "0.2": [{"filename": "0.2.whl"}]},
+                }
+            )
+        )
+        (project_dir / "0.1").mkdir()
+        (project_dir / "0.1" / "json").write_text(
+            json.dumps(
+                {"info": {"name": "dummy", "version": "0.1"}, "urls": []}
+            )
+        )
+        monkeypatch.setenv(pi.INDEX_URL_ENV_VAR, base_url)
+        monkeypatch.setenv(pi.CONFIG_FILE_ENV_VAR, str(tmp_path / "none.ini"))
+        monkeypatch.setenv(pc.cd.CACHE_DIR_ENV_VAR, str(tmp_path / "cache"))
+        pc.PyPIJsonClient.clear_cache()
+        pti.PkgRefIdentifier.clear_cache()
+        yield project_dir / "json"
+        pc.PyPIJsonClient.clear_cache()
+        pti.PkgRefIdentifier.clear_cache()
+
+    def test_session_is_shared(self):
+        assert pc.http_session() is pc.http_session()
+        assert pc.PyPIJsonClient().session is pc.http_session()
+
+    def test_missing_project(self, local_pypi):
+        assert pc.PyPIJsonClient().project_json("not-a-project") is None
+        assert not pti.PkgRefIdentifier("not-a-project").is_pypi_pkg()
+
+    def test_document_fetched_once_per_run(self, local_pypi, mocker, tmp_path):
+        spy = mocker.spy(pc.PyPIJsonClient, "_fetch")
+        identifier = pti.PkgRefIdentifier("dummy")
+        assert identifier.identify() == pti.PkgRefType.PYPI_PKG
+        retriever = rpr.PyPIPkgRetriever(
+            pkg_ref="dummy",
+            copy_dest=tmp_path,
+            pkg_metadata=identifier.pypi_metadata,
+        )
+        assert retriever._pkg_metadata["info"]["name"] == "dummy"
+        assert (
+            rpr.PyPIPkgRetriever(
+                pkg_ref="dummy", copy_dest=tmp_path
+            )._pkg_metadata
+            is retriever._pkg_metadata
+        )
+        assert spy.call_count == 1
+
+    def test_identify_memo_keyed_on_version_and_indexes(
+        self, local_pypi, mocker
+    ):
+        spy = mocker.spy(pti.PkgRefIdentifier, "_check_all_types")
+        assert pti.PkgRefIdentifier("dummy").identify() == (
+            pti.PkgRefType.PYPI_PKG
+        )
+        assert pti.PkgRefIdentifier(
+            "dummy", pypi_version="0.1"
+        ).identify() == (pti.PkgRefType.PYPI_PKG)
+        empty_index = pi.PackageIndex.from_url(
+            f"{os.environ[pi.INDEX_URL_ENV_VAR]}/empty"
+        )
+        assert pti.PkgRefIdentifier(
+            "dummy", pypi_client=pc.PyPIJsonClient(indexes=[empty_index])
+        ).identify() == (pti.PkgRefType.UNKNOWN)
+        assert spy.call_count == 3
+
+    def test_unchanged_document_revalidated(self, local_pypi, mocker):
+        pc.PyPIJsonClient().project_json("dummy")
+        pc.PyPIJsonClient.clear_cache()
+        spy = mocker.spy(requests.Session, "get")
+        document = pc.PyPIJsonClient().project_json("dummy")
+        assert document["info"]["name"] == "dummy"
+        assert "If-Modified-Since" in spy.call_args.kwargs["headers"]
+        assert spy.spy_return.status_code == 304
+
+    def test_changed_document_downloaded(self, local_pypi):
+        pc.PyPIJsonClient().project_json("dummy")
+        pc.PyPIJsonClient.clear_cache()
+        local_pypi.write_text(json.dumps({"info": {"name": "changed"}}))
+        later = time.time() + 60
+        os.utime(local_pypi, (later, later))
+        document = pc.PyPIJsonClient().project_json("dummy")
+        assert document["info"]["name"] == "changed"
+
+    def test_max_age_skips_network(self, local_pypi, mocker):
+        pc.PyPIJsonClient().project_json("dummy")
+        pc.PyPIJsonClient.clear_cache()
+        mock_get = mocker.patch.object(requests.Session, "get")
+        document = pc.PyPIJsonClient(max_age=3600).project_json("dummy")
+        assert document["info"]["name"] == "dummy"
+        mock_get.assert_not_called()
+
+    def test_etag_sent(self, tmp_path, mocker):
+        url = pi.PackageIndex.from_url(pi.DEFAULT_INDEX_URL).project_json_url(
+            "dummy"
+        )
+        disk_cache = pc.MetadataDiskCache(cache_dir=tmp_path)
+        disk_cache.save(
+            {
+                "url": url,
+                "etag": '"abc123"',
+                "last_modified": None,
+                "fetched_at": 0,
+                "document": {"info": {"name": "dummy"}},
+            }
+        )
+        session = mocker.Mock()
+        session.get.return_value = mocker.Mock(status_code=304)
+        client = pc.PyPIJsonClient(session=session, disk_cache=disk_cache)
+        assert client._fetch(url) == {"info": {"name": "dummy"}}
+        session.get.assert_called_once_with(
+            url, headers={"If-None-Match": '"abc123"'}
+        )
+        assert disk_cache.load(url)["fetched_at"] > 0
+
+    def test_version_uses_release_document(self, local_pypi, mocker, tmp_path):
+        spy = mocker.spy(pc.PyPIJsonClient, "_fetch")
+        identifier = pti.PkgRefIdentifier("dummy", pypi_version="0.1")
+        assert identifier.identify() == pti.PkgRefType.PYPI_PKG
+        retriever = rpr.PyPIPkgRetriever(
+            pkg_ref="dummy", copy_dest=tmp_path, version_command="0.1"
+        )
+        assert retriever._pkg_metadata["info"]["version"] == "0.1"
+        assert retriever._version_url_info == []
+        fetched_urls = [call.args[1] for call in spy.call_args_list]
+        assert fetched_urls == [
+            pi.configured_indexes()[0].version_json_url("dummy", "0.1")
+        ]
+
+    def test_version_falls_back_to_project_document(
+        self, local_pypi, tmp_path
+    ):
+        retriever = rpr.PyPIPkgRetriever(
+            pkg_ref="dummy", copy_dest=tmp_path, version_command="0.2"
+        )
+        assert retriever._version_url_info == [{"filename": "0.2.whl"}]
+
+    def test_missing_version(self, local_pypi, tmp_path):
+        identifier = pti.PkgRefIdentifier("dummy", pypi_version="9.9")
+        assert identifier.pypi_metadata is None
+        assert identifier.is_pypi_pkg()
+        retriever = rpr.PyPIPkgRetriever(
+            pkg_ref="dummy", copy_dest=tmp_path, version_command="9.9"
+        )
+        with pytest.raises(ce.PyPIVersionNotFound):
+            retriever.run()
+
+
+class TestPackageIndex:
+
+    content = os.urandom(1000)
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "https://mirror.lan/repo/simple",
+            "https://mirror.lan/repo/simple/",
+            "https://mirror.lan/repo/pypi",
+            "https://mirror.lan/repo",
+        ],
+    )
+    def test_from_url(self, url):
+        index = pi.PackageIndex.from_url(url)
+        assert index.json_url == "https://mirror.lan/repo/pypi"
+        assert index.simple_url == "https://mirror.lan/repo/simple"
+        assert index.simple_project_urls("My_Pkg")[0] == (
+            "https://mirror.lan/repo/simple/my-pkg/"
+        )
+
+    @pytest.mark.parametrize(
+        "url, expected_simple_urls",
+        [
+            (
+                "https://devpi.lan/root/pypi/+simple/",
+                [
+                    "https://devpi.lan/root/pypi/+simple/simple/my-pkg/",
+                    "https://devpi.lan/root/pypi/+simple/my-pkg/",
+                ],
+            ),
+            ("https://mirror.lan", ["https://mirror.lan/simple/my-pkg/"]),
+        ],
+    )
+    def test_from_other_simple_url(self, url, expected_simple_urls):
+        index = pi.PackageIndex.from_url(url)
+        assert index.simple_project_urls("My_Pkg") == expected_simple_urls
+
+    def test_configured_indexes_precedence(self, monkeypatch, tmp_path):
+        config_file = tmp_path / "srepkg.ini"
+        config_file.write_text(
+            "[index]\n"
+            "index_url = https://config.lan/simple\n"
+            "extra_index_urls =\n"
+            "    https://extra1.lan/simple\n"
+            "    https://extra2.lan/simple\n"
+        )
+        monkeypatch.setenv(pi.CONFIG_FILE_ENV_VAR, str(config_file))
+        monkeypatch.delenv(pi.INDEX_URL_ENV_VAR, raising=False)
+        monkeypatch.delenv(pi.EXTRA_INDEX_URL_ENV_VAR, raising=False)
+        monkeypatch.delenv(pi.JSON_API_URL_ENV_VAR, raising=False)
+
+        assert [index.simple_url for index in pi.configured_indexes()] == [
+            "https://config.lan/simple",
+            "https://extra1.lan/simple",
+            "https://extra2.lan/simple",
+        ]
+
+        monkeypatch.setenv(pi.INDEX_URL_ENV_VAR, "https://env.lan/simple")
+        monkeypatch.setenv(pi.EXTRA_INDEX_URL_ENV_VAR, "https://pypi.org")
+        monkeypatch.setenv(pi.JSON_API_URL_ENV_VAR, "https://json.lan/api/")
+        indexes = pi.configured_indexes()
+        assert indexes == [
+            pi.PackageIndex(
+                json_url="https://json.lan/api",
+                simple_url="https://env.lan/simple",
+            ),
+            pi.PackageIndex.from_url(pi.DEFAULT_INDEX_URL),
+        ]
+
+        indexes = pi.configured_indexes(
+            index_url="https://cli.lan/simple", extra_index_urls=[]
+        )
+        assert [index.simple_url for index in indexes] == [
+            "https://cli.lan/simple"
+        ]
+
+    def test_default_index(self, monkeypatch, tmp_path):
+        monkeypatch.setenv(pi.CONFIG_FILE_ENV_VAR, str(tmp_path / "none.ini"))
+        monkeypatch.delenv(pi.INDEX_URL_ENV_VAR, raising=False)
+        monkeypatch.delenv(pi.EXTRA_INDEX_URL_ENV_VAR, raising=False)
+        monkeypatch.delenv(pi.JSON_API_URL_ENV_VAR, raising=False)
+        assert pi.configured_indexes() == [
+            pi.PackageIndex(
+                json_url="https://pypi.org/pypi",
+                simple_url="https://pypi.org/simple",
+            )
+        ]
+
+    @pytest.fixture
+    def simple_index(self, local_http_server, monkeypatch, tmp_path):
+        """
+        Directory-served index with only a PEP 503 Simple API.
+        """
+        serve_dir, base_url = local_http_server
+        (serve_dir / "files").mkdir()
+        for filename in [
+            "dummy-0.1-py3-none-any.whl",
+            "dummy-0.2.tar.gz",
+            "dummy-0.3b1-py3-none-any.whl",
+        ]:
+            (serve_dir / "files" / filename).write_bytes(self.content)
+        project_dir = serve_dir / "simple" / "dummy"
+        project_dir.mkdir(parents=True)
+        (project_dir / "index.html").write_text(
+            "<html><body>\n"
+            '<a href="../../files/dummy-0.1-py3-none-any.whl'
+            f'#sha256={self.sha256}">dummy-0.1-py3-none-any.whl</a>\n'
+            '<a href="../../files/dummy-0.2.tar.gz" '
+            'data-requires-python="&gt;=3.8">dummy-0.2.tar.gz</a>\n'
+            '<a href="../../files/dummy-0.3b1-py3-none-any.whl">'
+            "dummy-0.3b1-py3-none-any.whl</a>\n"
+            "</body></html>\n"
+        )
+        monkeypatch.setenv(pc.cd.CACHE_DIR_ENV_VAR, str(tmp_path / "cache"))
+        pc.PyPIJsonClient.clear_cache()
+        yield base_url
+        pc.PyPIJsonClient.clear_cache()
+
+    def test_simple_api_fallback(self, simple_index, tmp_path):
+        client = pc.PyPIJsonClient(
+            indexes=[
+                # nothing listens on port 9 (discard), so this index fails
+                pi.PackageIndex.from_url("http://127.0.0.1:9"),
+                pi.PackageIndex.from_url(f"{simple_index}/simple"),
+            ]
+        )
+        document = client.project_json("Dummy")
+        assert document["info"] == {"name": "Dummy", "version": "0.2"}
+        assert sorted(document["releases"]) == ["0.1", "0.2", "0.3b1"]
+        assert document["urls"][0]["packagetype"] == "sdist"
+        assert document["urls"][0]["requires_python"] == ">=3.8"
+        assert client.project_json("not-a-project") is None
+
+        retriever = rpr.PyPIPkgRetriever(
+            pkg_ref="dummy",
+            copy_dest=tmp_path,
+            version_command="0.1",
+            pypi_client=client,
+        )
+        [wheel] = retriever._version_url_info
+        assert wheel["url"] == (
+            f"{simple_index}/files/dummy-0.1-py3-none-any.whl"
+        )
+        assert wheel["digests"] == {"sha256": self.sha256}
+        retriever._download(wheel)
+        assert (tmp_path / wheel["filename"]).read_bytes() == self.content
+
+    def test_simple_url_not_named_simple(
+        self, simple_index, local_http_server
+    ):
+        serve_dir, _ = local_http_server
+        (serve_dir / "simple").rename(serve_dir / "+simple")
+        client = pc.PyPIJsonClient(
+            indexes=[pi.PackageIndex.from_url(f"{simple_index}/+simple/")]
+        )
+        document = client.project_json("dummy")
+        assert sorted(document["releases"]) == ["0.1", "0.2", "0.3b1"]
+
+    def test_unreachable_indexes_raise(self, tmp_path, monkeypatch):
+        monkeypatch.setenv(pc.cd.CACHE_DIR_ENV_VAR, str(tmp_path / "cache"))
+        client = pc.PyPIJsonClient(
+            indexes=[pi.PackageIndex.from_url("http://127.0.0.1:9")]
+        )
+        with pytest.raises(requests.ConnectionError):
+            client.project_json("dummy")
+
+    def test_simple_json_page(self):
+        document = pi.simple_page_document(
+            "dummy",
+            content_type=pi.SIMPLE_JSON_CONTENT_TYPE,
+            body=json.dumps(
+                {
+                    "files": [
+                        {
+                            "filename": "dummy-1.0-py3-none-any.whl",
+                            "url": "/files/dummy-1.0-py3-none-any.whl",
+                            "hashes": {"sha256": self.sha256},
+                            "size": 1000,
+                        },
+                        {
+                            "filename": "dummy-1.1.tar.gz",
+                            "url": "dummy-1.1.tar.gz",
+                            "hashes": {},
+                            "yanked": "broken",
+                        },
+                    ]
+                }
+            ),
+            page_url="https://mirror.lan/simple/dummy/",
+        )
+        assert document["info"]["version"] == "1.0"
+        assert document["urls"] == [
+            {
+                "filename": "dummy-1.0-py3-none-any.whl",
+                "url": "https://mirror.lan/files/dummy-1.0-py3-none-any.whl",
+                "packagetype": "bdist_wheel",
+                "version": "1.0",
+                "digests": {"sha256": self.sha256},
+                "requires_python": None,
+                "yanked": False,
+                "size": 1000,
+            }
+        ]
+        assert document["releases"]["1.1"][0]["url"] == (
+            "https://mirror.lan/simple/dummy/dummy-1.1.tar.gz"
+        )
+
+
+class TestResumableDownload:
+
+    content = os.urandom(300 * 1024)
+
+    def download(self, served, dest_dir, **kwargs) -> rd.ResumableDownload:
+        serve_dir, base_url = served
+        (serve_dir / "dummy.whl").write_bytes(self.content)
+        return rd.ResumableDownload(
+            url=f"{base_url}/dummy.whl",
+            dest_path=dest_dir / "dummy.whl",
+            expected_sha256=hashlib.sha256(self.content).hexdigest(),
+            **kwargs,
+        )
+
+    @staticmethod
+    def write_partial(download: rd.ResumableDownload, data: bytes):
+        download.part_path.write_bytes(data)
+        download.journal_path.write_text(
+            json.dumps(
+                {"url": download._url, "sha256": download._expected_sha256}
+            )
+        )
+
+    def test_resumes_from_journal(self, local_range_http_server, tmp_path):
+        received = []
+        download = self.download(
+            local_range_http_server, tmp_path, on_bytes=received.append
+        )
+        self.write_partial(download, self.content[:100000])
+        assert download.run().read_bytes() == self.content
+        assert download.resumed_from == 100000
+        assert sum(received) == len(self.content)
+        assert not download.part_path.exists()
+        assert not download.journal_path.exists()
+
+    def test_stale_journal_restarts(self, local_range_http_server, tmp_path):
+        download = self.download(local_range_http_server, tmp_path)
+        download.part_path.write_bytes(self.content[:100000])
+        download.journal_path.write_text(json.dumps({"url": "other"}))
+        assert download.run().read_bytes() == self.content
+        assert download.resumed_from == 0
+
+    def test_no_range_support_restarts(self, local_http_server, tmp_path):
+        download = self.download(local_http_server, tmp_path)
+        self.write_partial(download, self.content[:100000])
+        assert download.run().read_bytes() == self.content
+        assert download.resumed_from == 0
+
+    def test_interrupted_download_resumed(
+        self, local_range_http_server, tmp_path, mocker
+    ):
+        mocker.patch.object(rd, "DOWNLOAD_CHUNK_SIZE", 64 * 1024)
+        orig_iter_content = requests.Response.iter_content
+        calls = []
+
+        def flaky_iter_content(response, *args, **kwargs):
+            calls.append(response)
+            for num_chunks, chunk in enumerate(
+                orig_iter_content(response, *args, **kwargs)
+            ):
+                if len(calls) == 1 and num_chunks == 2:
+                    raise requests.exceptions.ChunkedEncodingError("dropped")
+                yield chunk
+
+        mocker.patch.object(
+            requests.Response,
+            "iter_content",
+            autospec=True,
+            side_effect=flaky_iter_content,
+        )
+        download = self.download(local_range_http_server, tmp_path)
+        assert download.run().read_bytes() == self.content
+        assert download.resumed_from == 2 * 64 * 1024
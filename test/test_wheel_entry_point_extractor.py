@@ -1,10 +1,16 @@
 import entry_points_txt
 import pytest
+import shutil
 from pathlib import Path
 from zipfile import ZipFile
 import srepkg.error_handling.custom_exceptions as ce
 import srepkg.utils.wheel_entry_point_extractor as we_pe
-from test.shared_fixtures import sample_pkgs
+from test.shared_fixtures import (
+    local_http_server,
+    local_range_http_server,
+    sample_pkgs,
+    write_large_wheel,
+)
 
 
 @pytest.fixture
@@ -34,3 +40,67 @@ class TestWheelEntryPointExtractor:
         )
         with pytest.raises(ce.NoConsoleScriptEntryPoints):
             testproj_wheel.get_entry_points()
+
+    def test_rewritten_local_wheel_reindexed(self, sample_pkgs, tmp_path):
+        wheel_path = tmp_path / "testproj-0.0.0-py3-none-any.whl"
+        shutil.copy2(sample_pkgs.testproj_whl, wheel_path)
+        extractor = we_pe.WheelEntryPointExtractor(wheel_path)
+        assert extractor.get_entry_points().cs_entry_pts
+
+        rewritten_path = tmp_path / "rewritten.whl"
+        shutil.copy2(sample_pkgs.testprojnoentry_whl, rewritten_path)
+        rewritten_path.replace(wheel_path)
+
+        with pytest.raises(ce.NoEntryPtsTxtFile):
+            extractor.get_entry_points()
+
+
+class TestRemoteWheelEntryPointExtractor:
+
+    def test_partial_download(self, sample_pkgs, local_range_http_server):
+        serve_dir, base_url = local_range_http_server
+        write_large_wheel(
+            Path(sample_pkgs.testproj_whl),
+            serve_dir / "testproj-0.0.0-py3-none-any.whl",
+        )
+        extractor = we_pe.RemoteWheelEntryPointExtractor(
+            f"{base_url}/testproj-0.0.0-py3-none-any.whl"
+        )
+        assert (
+            extractor.get_entry_points()
+            == we_pe.WheelEntryPointExtractor(
+                Path(sample_pkgs.testproj_whl)
+            ).get_entry_points()
+        )
+        assert extractor.root_is_purelib()
+        assert extractor.range_file.length > 8 * 1024 * 1024
+        assert extractor.range_file.bytes_fetched < 256 * 1024
+
+    def test_remote_no_entry_pts_txt(
+        self, sample_pkgs, local_range_http_server
+    ):
+        serve_dir, base_url = local_range_http_server
+        write_large_wheel(
+            Path(sample_pkgs.testproj_whl),
+            serve_dir / "testproj-0.0.0-py3-none-any.whl",
+            skip_member="testproj-0.0.0.dist-info/entry_points.txt",
+        )
+        extractor = we_pe.RemoteWheelEntryPointExtractor(
+            f"{base_url}/testproj-0.0.0-py3-none-any.whl"
+        )
+        with pytest.raises(ce.NoEntryPtsTxtFile):
+            extractor.get_entry_points()
+
+    def test_range_requests_not_supported(
+        self, sample_pkgs, local_http_server
+    ):
+        serve_dir, base_url = local_http_server
+        write_large_wheel(
+            Path(sample_pkgs.testproj_whl),
+            serve_dir / "testproj-0.0.0-py3-none-any.whl",
+        )
+        extractor = we_pe.RemoteWheelEntryPointExtractor(
+            f"{base_url}/testproj-0.0.0-py3-none-any.whl"
+        )
+        with pytest.raises(ce.RangeRequestsNotSupported):
+            extractor.get_entry_points()
@@ -0,0 +1,64 @@
+import shutil
+import zipfile
+from pathlib import Path
+import srepkg.utils.wheel_index as wi
+from test.shared_fixtures import sample_pkgs
+
+
+class TestWheelIndex:
+
+    @staticmethod
+    def counting_opener(wheel_path: Path, opened: list):
+        def open_zip() -> zipfile.ZipFile:
+            opened.append(wheel_path)
+            return zipfile.ZipFile(wheel_path)
+
+        return open_zip
+
+    def test_metadata_served_from_memory(self, sample_pkgs):
+        wheel_path = Path(sample_pkgs.testproj_whl)
+        opened = []
+        index = wi.WheelIndex(
+            wheel_path=wheel_path,
+            open_zip=self.counting_opener(wheel_path, opened),
+        )
+
+        assert index.dist_info_dirname == "testproj-0.0.0.dist-info"
+        assert "console_scripts" in index.entry_points_txt
+        assert index.wheel_metadata["Root-Is-Purelib"] == "true"
+        assert index.metadata["Name"] == "testproj"
+        assert "testproj-0.0.0.dist-info/RECORD" in index.record
+        assert len(opened) == 1
+
+        index.read("testproj/__init__.py")
+        assert len(opened) == 2
+
+    def test_missing_dist_info_file(self, sample_pkgs):
+        index = wi.WheelIndex(wheel_path=sample_pkgs.testprojnoentry_whl)
+        assert index.entry_points_txt is None
+
+    def test_rewritten_wheel_reindexed(self, sample_pkgs, tmp_path):
+        wheel_path = tmp_path / "testproj-0.0.0-py3-none-any.whl"
+        shutil.copy2(sample_pkgs.testproj_whl, wheel_path)
+        index = wi.WheelIndex(wheel_path=wheel_path)
+        assert "console_scripts" in index.entry_points_txt
+
+        rewritten_path = tmp_path / "rewritten.whl"
+        shutil.copy2(sample_pkgs.testprojnoentry_whl, rewritten_path)
+        rewritten_path.replace(wheel_path)
+
+        assert index.entry_points_txt is None
+
+    def test_relocated_wheel_not_reread(self, sample_pkgs, tmp_path, mocker):
+        wheel_path = tmp_path / "old" / "testproj-0.0.0-py3-none-any.whl"
+        wheel_path.parent.mkdir()
+        shutil.copy2(sample_pkgs.testproj_whl, wheel_path)
+        index = wi.WheelIndex(wheel_path=wheel_path)
+        load_spy = mocker.spy(index, "_load")
+
+        wheel_path.parent.rename(tmp_path / "new")
+        index.relocate(tmp_path / "new" / wheel_path.name)
+
+        assert "console_scripts" in index.entry_points_txt
+        assert index.wheel_path == tmp_path / "new" / wheel_path.name
+        assert load_spy.call_count == 0
@@ -4,7 +4,9 @@ import pytest
 
 import srepkg.wheel_modifier as wm
 import tempfile
+import zipfile
 from pathlib import Path
+from wheel.wheelfile import WheelFile
 from test.shared_fixtures import sample_pkgs, tmp_construction_dir
 
 
@@ -54,3 +56,54 @@ def test_wheel_no_entry_points(sample_pkgs):
 def test_wheel_with_entry_but_no_console_scripts(sample_pkgs):
     wheel_dist_info = wm.WheelDistInfo(wheel_path=sample_pkgs.testprojnoconsolescript_section_whl)
     assert len(wheel_dist_info.console_script_names) == 0
+
+
+@pytest.mark.parametrize("copy_file_range_fails", [False, True])
+def test_rewrite_copies_unchanged_members(
+    sample_pkgs, tmp_path, mocker, copy_file_range_fails
+):
+    if copy_file_range_fails:
+        mocker.patch.object(
+            wm.os, "copy_file_range", side_effect=OSError, create=True
+        )
+    wheel_path = tmp_path / Path(sample_pkgs.testprojhyphenentry_whl).name
+    shutil.copy(sample_pkgs.testprojhyphenentry_whl, wheel_path)
+    with zipfile.ZipFile(wheel_path) as orig_zip:
+        orig_infos = {info.filename: info for info in orig_zip.infolist()}
+
+    wm.WheelEntryPointsModifier(wheel_path=wheel_path).modify_and_rebuild()
+
+    # WheelFile checks every member against its RECORD hash
+    with WheelFile(wheel_path) as wheel_file:
+        for info in wheel_file.infolist():
+            wheel_file.read(info.filename)
+            if info.filename.endswith(("entry_points.txt", "RECORD")):
+                continue
+            orig_info = orig_infos[info.filename]
+            assert (info.CRC, info.compress_size, info.compress_type) == (
+                orig_info.CRC,
+                orig_info.compress_size,
+                orig_info.compress_type,
+            )
+    assert list(orig_infos) == [
+        info.filename for info in zipfile.ZipFile(wheel_path).infolist()
+    ]
+    assert not wm.WheelDistInfo(
+        wheel_path=wheel_path
+    ).has_console_script_name_with_dash
+    assert list(tmp_path.iterdir()) == [wheel_path]
+
+
+def test_failed_rewrite_keeps_orig_wheel(sample_pkgs, tmp_path, mocker):
+    wheel_path = tmp_path / Path(sample_pkgs.testprojhyphenentry_whl).name
+    shutil.copy(sample_pkgs.testprojhyphenentry_whl, wheel_path)
+    orig_bytes = wheel_path.read_bytes()
+    mocker.patch.object(
+        wm.WheelMemberRewriter, "_copy_bytes", side_effect=OSError
+    )
+
+    with pytest.raises(OSError):
+        wm.WheelEntryPointsModifier(wheel_path=wheel_path).modify_and_rebuild()
+
+    assert wheel_path.read_bytes() == orig_bytes
+    assert list(tmp_path.iterdir()) == [wheel_path]